@@ -0,0 +1,211 @@
+# ==========================================================
+# AGGREGATION ENGINE - PYTHON / NUMPY BACKENDS
+# ==========================================================
+#
+# Masked sums and group-bys over the columnar ledger.
+#
+# AGGREGATION_MODE:
+#   "python"  -> plain loops (ledger_store)
+#   "numpy"   -> masked reductions + bincount group-bys
+#   "compare" -> run both, log mismatches, return python
+#
+
+import os
+import time
+import threading
+
+from rag.ledger_store import (
+    masked_sum as python_masked_sum,
+    group_sum as python_group_sum,
+    values_of,
+)
+
+# Imported on first non-python call, so the default mode never
+# pays for numpy at import time
+np = None
+_numpy_missing = False
+
+
+AGGREGATION_MODE = os.environ.get("AGGREGATION_MODE", "python").lower()
+
+VALID_MODES = ("python", "numpy", "compare")
+
+_stats = {
+    "calls": 0,
+    "mismatches": 0,
+    "python_seconds": 0.0,
+    "numpy_seconds": 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+# ==========================================================
+# MODE SWITCH
+# ==========================================================
+
+def set_aggregation_mode(mode):
+    global AGGREGATION_MODE
+
+    mode = mode.lower()
+    if mode not in VALID_MODES:
+        raise ValueError(f"Unknown aggregation mode: {mode}")
+
+    AGGREGATION_MODE = mode
+
+
+def _load_numpy():
+    global np, _numpy_missing
+
+    if np is None and not _numpy_missing:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            _numpy_missing = True
+
+    return np
+
+
+def get_aggregation_mode():
+    # Without numpy everything runs on the python path
+    if AGGREGATION_MODE != "python" and _load_numpy() is None:
+        return "python"
+    return AGGREGATION_MODE
+
+
+def aggregation_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+# ==========================================================
+# NUMPY COLUMN VIEWS
+# ==========================================================
+
+def _column(ledger, name):
+    """
+    Zero-copy numpy view of a ledger column, cached on the ledger
+    and dropped whenever the row count changes.
+    """
+    views = ledger.get("_numpy_views")
+
+    if views is None or views["rows"] != ledger["rows"]:
+        views = {"rows": ledger["rows"]}
+        ledger["_numpy_views"] = views
+
+    view = views.get(name)
+    if view is None:
+        column = ledger[name]
+        kind = "f" if column.typecode == "d" else "i"
+        view = np.frombuffer(column, dtype=f"{kind}{column.itemsize}")
+        views[name] = view
+
+    return view
+
+
+def _mask(ledger, where):
+    mask = np.ones(ledger["rows"], dtype=bool)
+
+    for column, allowed in (where or {}).items():
+        allowed = [value for value in allowed if value is not None]
+        if not allowed:
+            return np.zeros(ledger["rows"], dtype=bool)
+        mask &= np.isin(_column(ledger, column), allowed)
+
+    return mask
+
+
+def numpy_masked_sum(ledger, where=None):
+    selected = _column(ledger, "amount")[_mask(ledger, where)]
+
+    if not len(selected):
+        return 0
+
+    # cumsum accumulates left to right like the python loop,
+    # so totals match it exactly (np.sum is pairwise)
+    return float(np.cumsum(selected)[-1])
+
+
+def numpy_group_sum(ledger, by, where=None):
+    mask = _mask(ledger, where)
+    keys = _column(ledger, by)[mask]
+
+    if not len(keys):
+        return {}
+
+    vocab = values_of(ledger, by)
+    totals = np.bincount(
+        keys,
+        weights=_column(ledger, "amount")[mask],
+        minlength=len(vocab),
+    )
+
+    # Keep first-seen group order, same as the python dict
+    codes, first_seen = np.unique(keys, return_index=True)
+    ordered = codes[np.argsort(first_seen)]
+
+    return {vocab[code]: float(totals[code]) for code in ordered}
+
+
+# ==========================================================
+# DISPATCH
+# ==========================================================
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _same(a, b):
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(a[k] == b[k] for k in a)
+    return a == b
+
+
+def _run(label, python_fn, numpy_fn, *args):
+    mode = get_aggregation_mode()
+
+    if mode == "python":
+        return python_fn(*args)
+
+    if mode == "numpy":
+        return numpy_fn(*args)
+
+    expected, python_seconds = _timed(python_fn, *args)
+    actual, numpy_seconds = _timed(numpy_fn, *args)
+
+    matched = _same(expected, actual)
+
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["python_seconds"] += python_seconds
+        _stats["numpy_seconds"] += numpy_seconds
+        if not matched:
+            _stats["mismatches"] += 1
+
+    if not matched:
+        print(f"⚠️ Aggregation mismatch in {label}: {expected!r} != {actual!r}")
+
+    return expected
+
+
+def masked_sum(ledger, where=None):
+    return _run(
+        "masked_sum",
+        python_masked_sum,
+        numpy_masked_sum,
+        ledger,
+        where,
+    )
+
+
+def group_sum(ledger, by, where=None):
+    return _run(
+        f"group_sum({by})",
+        python_group_sum,
+        numpy_group_sum,
+        ledger,
+        by,
+        where,
+    )
@@ -5,8 +5,10 @@ from rag.finance_engine import (
     savings_rate as base_savings_rate,
 )
 
+from rag.ledger_store import get_ledger, codes_matching, codes_where
+from rag.aggregation_engine import masked_sum, group_sum
+
 import csv
-from collections import defaultdict
 
 CSV_FILE = "data/transactions.csv"
 
@@ -33,16 +35,13 @@ def savings_rate():
 # INVESTMENT RATIO (% of income)
 # ==========================================
 def investment_ratio():
-    data = load_data()
+    ledger = get_ledger(CSV_FILE)
     income = total_income()
-    investment = 0
 
-    for row in data:
-        if (
-            row["type"].lower() == "expense"
-            and row["category"].lower() == "investment"
-        ):
-            investment += float(row["amount"])
+    investment = masked_sum(ledger, {
+        "type": codes_matching(ledger, "type", "expense"),
+        "category": codes_matching(ledger, "category", "investment"),
+    })
 
     if income == 0:
         return 0
@@ -54,18 +53,23 @@ def investment_ratio():
 # FIXED VS VARIABLE EXPENSE RATIO
 # ==========================================
 def fixed_variable_ratio():
-    data = load_data()
+    ledger = get_ledger(CSV_FILE)
 
     fixed_categories = ["housing", "loan", "bills", "emi", "rent"]
-    fixed = 0
-    variable = 0
-
-    for row in data:
-        if row["type"].lower() == "expense":
-            if row["category"].lower() in fixed_categories:
-                fixed += float(row["amount"])
-            else:
-                variable += float(row["amount"])
+    expense_codes = codes_matching(ledger, "type", "expense")
+
+    fixed = masked_sum(ledger, {
+        "type": expense_codes,
+        "category": codes_where(
+            ledger, "category", lambda v: v.lower() in fixed_categories
+        ),
+    })
+    variable = masked_sum(ledger, {
+        "type": expense_codes,
+        "category": codes_where(
+            ledger, "category", lambda v: v.lower() not in fixed_categories
+        ),
+    })
 
     total = fixed + variable
 
@@ -85,12 +89,10 @@ def fixed_variable_ratio():
 # TOP SPENDING CATEGORY
 # ==========================================
 def top_spending_category():
-    data = load_data()
-    category_totals = defaultdict(float)
-
-    for row in data:
-        if row["type"].lower() == "expense":
-            category_totals[row["category"]] += float(row["amount"])
+    ledger = get_ledger(CSV_FILE)
+    category_totals = group_sum(ledger, "category", {
+        "type": codes_matching(ledger, "type", "expense"),
+    })
 
     if not category_totals:
         return None
@@ -1,10 +1,52 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from rag.chatbot import ask
+from rag.chatbot import ask_async, ask_stream
+from rag.warmup import start_warmup, readiness
+from rag import metrics
+from rag.local_intent import local_intent_stats
+from rag.intent_cache import intent_cache_stats
+
+
+# ---------------- Backpressure ----------------
+# At most ASK_CONCURRENCY questions in flight; a request that
+# cannot get a slot within ASK_QUEUE_TIMEOUT seconds gets a 503
+# instead of queueing without bound.
+ASK_CONCURRENCY = int(os.environ.get("ASK_CONCURRENCY", 32))
+ASK_QUEUE_TIMEOUT = float(os.environ.get("ASK_QUEUE_TIMEOUT", 2.0))
+
+_ask_slots = asyncio.Semaphore(ASK_CONCURRENCY)
+
+
+async def _acquire_slot():
+    try:
+        await asyncio.wait_for(_ask_slots.acquire(), ASK_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.increment("ask_rejected_busy")
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, please retry.",
+            headers={"Retry-After": "1"},
+        )
+
 
-app = FastAPI()
+# ---------------- Lifecycle ----------------
+@asynccontextmanager
+async def lifespan(app):
+    # Preload in the background so the server accepts
+    # connections (and answers /health) while warming up
+    start_warmup()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # ---------------- CORS ----------------
 app.add_middleware(
@@ -21,6 +63,74 @@ class QuestionRequest(BaseModel):
 
 # ---------------- Endpoint ----------------
 @app.post("/ask")
-def ask_question(request: QuestionRequest):
-    answer = ask(request.question)
-    return {"answer": answer}
\ No newline at end of file
+async def ask_question(request: QuestionRequest):
+    await _acquire_slot()
+
+    try:
+        answer = await ask_async(request.question)
+    finally:
+        _ask_slots.release()
+
+    return {"answer": answer}
+
+
+# ---------------- Streaming Endpoint (SSE) ----------------
+# event: token  data: {"text": "..."}       answer deltas
+# event: done   data: {"answer", "ttft_ms"}  after save_chat
+# event: error  data: {"error": "..."}
+class _SlotStreamingResponse(StreamingResponse):
+    """Holds an ask slot until the response is over. Released here
+    rather than in the body generator, which never runs (nor its
+    finally) if the client disconnects before streaming starts."""
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            _ask_slots.release()
+
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    await _acquire_slot()
+
+    async def events():
+        async for kind, payload in ask_stream(request.question):
+            if kind == "token":
+                data = {"text": payload}
+            elif kind == "error":
+                data = {"error": payload}
+            else:
+                data = payload
+
+            yield f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+
+    try:
+        return _SlotStreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except BaseException:
+        _ask_slots.release()
+        raise
+
+
+# ---------------- Health / Readiness ----------------
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+@app.get("/metrics")
+def get_metrics():
+    snapshot = metrics.snapshot()
+    snapshot["intent_classifier"] = local_intent_stats()
+    snapshot["intent_cache"] = intent_cache_stats()
+    return snapshot
@@ -0,0 +1,180 @@
+# ==========================================================
+# ASK CONTEXT - SPECULATIVE PREFETCH FOR ONE QUESTION
+# ==========================================================
+#
+# The inputs an answer may need (live metrics, the financial
+# profile, the pending intent, retrieved transactions) don't
+# depend on the intent, so while the LLM classifier call is in
+# flight they are loaded on the ask executor:
+#
+#   context = AskContext(question, month_prefix, executor)
+#   context.prefetch()                # before awaiting the classifier
+#   context.keep(needed_for(intent))  # cancel what the intent won't use
+#   context.get("profile")            # prefetched, or loaded on demand
+#   context.record()                  # per-stage timings -> metrics
+#
+# Without prefetch() every get() just loads lazily, so intents
+# that never look at the profile no longer build it.
+#
+
+import sys
+import threading
+import time
+
+from rag import metrics
+
+
+# ==========================================================
+# LOADERS
+# ==========================================================
+
+def _load_live_metrics(question, month_prefix):
+    from rag.live_state_store import load_live_metrics
+    return load_live_metrics()
+
+
+def _load_profile(question, month_prefix):
+    from rag.profile_engine import build_financial_profile
+    return build_financial_profile(month_prefix)
+
+
+def _load_pending(question, month_prefix):
+    from rag.memory_manager import get_pending_intent
+    return get_pending_intent()
+
+
+def _load_retrieval(question, month_prefix):
+    from rag.retriever import query_index
+    from rag.chatbot import detect_retrieval_filters
+
+    return query_index(question, filters=detect_retrieval_filters(question))
+
+
+LOADERS = {
+    "live_metrics": _load_live_metrics,
+    "profile": _load_profile,
+    "pending": _load_pending,
+    "retrieval": _load_retrieval,
+}
+
+# Started by prefetch(); "pending" is read before classification
+# anyway (the local intent tiers need it)
+SPECULATIVE = ("live_metrics", "profile", "retrieval")
+
+# Intents whose tool reads the (live-merged) financial profile
+PROFILE_INTENTS = {
+    "advisory",
+    "financial_health",
+    "risk_analysis",
+    "cashflow_analysis",
+    "transaction_query",
+    "budget_recommendation",
+}
+
+# Answered from tools / fixed replies, never from retrieval
+NO_RETRIEVAL_INTENTS = {"transaction_query"}
+
+# Tools that write user state: live metrics for the prompt are
+# read after them, not speculatively before
+STATEFUL_INTENTS = {"income_update", "transaction_entry", "daily_limit_management"}
+
+
+def needed_for(intent):
+    """Context entries an answer for `intent` can use."""
+    needed = {"pending"}
+
+    # Every LLM prompt carries the live metrics
+    if intent not in STATEFUL_INTENTS:
+        needed.add("live_metrics")
+
+    if intent in PROFILE_INTENTS:
+        needed.add("profile")
+    if intent not in NO_RETRIEVAL_INTENTS:
+        needed.add("retrieval")
+
+    return needed
+
+
+def _retriever_warm():
+    """Only speculate on retrieval once the embedding model is loaded;
+    a cold first query would pull in torch for a maybe-unused result."""
+    retriever = sys.modules.get("rag.retriever")
+    return retriever is not None and retriever.model is not None
+
+
+# ==========================================================
+# CONTEXT
+# ==========================================================
+
+class AskContext:
+
+    def __init__(self, question, month_prefix, executor=None):
+        self.question = question
+        self.month_prefix = month_prefix
+        self.executor = executor
+        self.timings = {}  # stage -> ms spent loading (or waiting for) it
+
+        self._values = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _load(self, name):
+        start = time.perf_counter()
+        try:
+            return LOADERS[name](self.question, self.month_prefix)
+        finally:
+            self.timings[f"load_{name}"] = (time.perf_counter() - start) * 1000
+
+    def prefetch(self, names=SPECULATIVE):
+        """Start loading `names` on the executor (no-op without one)."""
+        if self.executor is None:
+            return
+
+        with self._lock:
+            for name in names:
+                if name == "retrieval" and not _retriever_warm():
+                    continue
+                if name not in self._values and name not in self._futures:
+                    self._futures[name] = self.executor.submit(self._load, name)
+
+    def keep(self, names):
+        """Cancel prefetches outside `names`. Ones already running finish
+        in the background and are ignored."""
+        with self._lock:
+            for name in list(self._futures):
+                if name not in names:
+                    future = self._futures.pop(name)
+                    if future.cancel():
+                        metrics.increment(f"ask_prefetch_cancelled_{name}")
+                    else:
+                        metrics.increment(f"ask_prefetch_wasted_{name}")
+
+    def get(self, name):
+        """The value for `name`: prefetched, cached, or loaded now."""
+        with self._lock:
+            if name in self._values:
+                return self._values[name]
+            future = self._futures.pop(name, None)
+
+        if future is not None:
+            start = time.perf_counter()
+            try:
+                value = future.result()
+            finally:
+                self.timings[f"wait_{name}"] = (time.perf_counter() - start) * 1000
+            metrics.increment(f"ask_prefetch_used_{name}")
+        else:
+            value = self._load(name)
+
+        with self._lock:
+            self._values[name] = value
+
+        return value
+
+    def set(self, name, value):
+        with self._lock:
+            self._values[name] = value
+
+    def record(self, prefix="ask_stage"):
+        for stage, ms in self.timings.items():
+            metrics.observe(f"{prefix}_{stage}_ms", ms)
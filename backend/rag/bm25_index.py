@@ -0,0 +1,250 @@
+# ==========================================================
+# BM25 INDEX - IN-PROCESS INVERTED INDEX FOR HYBRID SEARCH
+# ==========================================================
+#
+# Transaction texts are templated ("On …, you made a expense
+# of ₹… at … for …"), so dense similarity is dominated by the
+# template and blurs exact merchant names and amounts. This
+# index scores only the distinguishing fields:
+#
+#   merchant, category, notes, amount
+#
+# Doc ids are FAISS vector ids, so results fuse directly with
+# index.search() output. Built from the document store on
+# first use, then kept current by add().
+#
+
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from rag.document_store import NO_DATA, key_present
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+BM25_FIELDS = ("merchant", "category", "notes")
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+
+# ==========================================================
+# TOKENIZING
+# ==========================================================
+
+def tokenize(text):
+    """'Swiggy ₹858.44, Food' -> ['swiggy', '858.44', 'food']"""
+    return _TOKEN.findall(str(text).lower())
+
+
+def amount_token(amount):
+    """858.44 -> '858.44', 20360.0 -> '20360' (as written in queries)."""
+    text = repr(float(amount))
+    return text[:-2] if text.endswith(".0") else text
+
+
+def document_tokens(text, data):
+    """Tokens of one document: its structured fields, or its text if none."""
+    if not data:
+        return tokenize(text)
+
+    tokens = []
+    for field in BM25_FIELDS:
+        tokens.extend(tokenize(data.get(field) or ""))
+
+    try:
+        tokens.append(amount_token(data.get("amount")))
+    except (TypeError, ValueError):
+        pass
+
+    return tokens
+
+
+def _group_by(keys, ids):
+    """Yield (key, ids having that key), one group per distinct key."""
+    order = np.argsort(keys, kind="stable")
+    values, starts = np.unique(keys[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+
+    for value, start, end in zip(values, starts, ends):
+        yield value, ids[order[start:end]]
+
+
+# ==========================================================
+# INDEX
+# ==========================================================
+
+class BM25Index:
+    """
+    Postings are numpy (doc ids, term frequencies) pairs per term.
+    add() buffers new postings in lists; they are merged into the
+    arrays the next time a term is searched.
+    """
+
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+
+        self._postings = {}
+        self._pending = defaultdict(list)
+        self._doc_len = np.zeros(0, "float32")
+        self._pending_len = []
+        self._total_len = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_len) + len(self._pending_len)
+
+    # ------------------------------------------------------
+    # Building
+    # ------------------------------------------------------
+
+    @classmethod
+    def from_store(cls, store):
+        """
+        Bulk build from a DocumentStore. Rows are grouped by
+        their vocab code, so each distinct field value is
+        tokenized once rather than once per document.
+        """
+        bm25 = cls()
+
+        n = len(store)
+        if not n:
+            return bm25
+
+        rows = store.rows[store.ids[:n]]  # indexed by vector id
+        has_data = rows["has_data"] != NO_DATA
+
+        groups = defaultdict(list)  # term -> [vector id arrays]
+        doc_len = np.zeros(n, "float32")
+        data_ids = np.flatnonzero(has_data)
+
+        def add_tokens(ids, tokens):
+            doc_len[ids] += len(tokens)
+            for token in tokens:
+                groups[token].append(ids)
+
+        for field in BM25_FIELDS:
+            vocab = store.vocab[field]
+            for code, ids in _group_by(rows[field][data_ids], data_ids):
+                add_tokens(ids, tokenize(vocab[code]))
+
+        amount_ids = np.flatnonzero(has_data & key_present(rows, "amount"))
+        for amount, ids in _group_by(rows["amount"][amount_ids], amount_ids):
+            add_tokens(ids, [amount_token(amount)])
+
+        # Documents without structured data fall back to their text
+        for vector_id in np.flatnonzero(~has_data):
+            tokens = tokenize(store.text(int(store.ids[vector_id])))
+            add_tokens(np.array([vector_id]), tokens)
+
+        for token, id_arrays in groups.items():
+            ids, tf = np.unique(np.concatenate(id_arrays), return_counts=True)
+            bm25._postings[token] = (ids.astype("int64"), tf.astype("float32"))
+
+        bm25._doc_len = doc_len
+        bm25._total_len = float(doc_len.sum())
+        return bm25
+
+    def add(self, doc_id, tokens):
+        """Index one document; doc ids must arrive in order (0, 1, 2, ...)."""
+        with self._lock:
+            if doc_id != len(self):
+                raise ValueError(f"Expected doc id {len(self)}, got {doc_id}")
+
+            for token, tf in Counter(tokens).items():
+                self._pending[token].append((doc_id, tf))
+
+            self._pending_len.append(len(tokens))
+            self._total_len += len(tokens)
+
+    def _merge_lengths(self):
+        if self._pending_len:
+            self._doc_len = np.concatenate([
+                self._doc_len,
+                np.array(self._pending_len, "float32")
+            ])
+            self._pending_len = []
+
+    def _term(self, token):
+        pending = self._pending.pop(token, None)
+        postings = self._postings.get(token)
+
+        if pending:
+            ids, tf = zip(*pending)
+            new = (np.array(ids, "int64"), np.array(tf, "float32"))
+
+            if postings is None:
+                postings = new
+            else:
+                postings = (
+                    np.concatenate([postings[0], new[0]]),
+                    np.concatenate([postings[1], new[1]])
+                )
+            self._postings[token] = postings
+
+        return postings
+
+    # ------------------------------------------------------
+    # Searching
+    # ------------------------------------------------------
+
+    def search(self, query, k=10, allowed=None):
+        """
+        Top-k (doc ids, scores) for `query`, best first. `allowed`
+        is an optional boolean mask over doc ids.
+        """
+        with self._lock:
+            self._merge_lengths()
+            n = len(self._doc_len)
+
+            if not n:
+                return np.empty(0, "int64"), np.empty(0, "float32")
+
+            avg_len = self._total_len / n or 1.0
+            scores = np.zeros(n, "float32")
+
+            for token in set(tokenize(query)):
+                postings = self._term(token)
+                if postings is None:
+                    continue
+
+                ids, tf = postings
+                idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[ids] / avg_len)
+                scores[ids] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if allowed is not None:
+            scores[:len(allowed)] *= allowed[:n]
+            scores[len(allowed):] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return candidates, scores[candidates]
+
+
+# ==========================================================
+# RANK FUSION
+# ==========================================================
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Fuse ranked id lists: score(d) = sum 1 / (k + rank_d).
+    Returns [(id, score)] best first.
+    """
+    fused = defaultdict(float)
+
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[int(doc_id)] += 1.0 / (k + rank)
+
+    return sorted(fused.items(), key=lambda item: -item[1])
@@ -0,0 +1,88 @@
+# ==========================================================
+# CACHE UTILS - BOUNDED LRU CACHE WITH TTL + HIT COUNTERS
+# ==========================================================
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+# ==========================================================
+# KEY NORMALIZATION
+# ==========================================================
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace: ' Food  spend? ' -> 'food spend?'"""
+    return re.sub(r"\s+", " ", str(text)).strip().lower()
+
+
+# ==========================================================
+# LRU CACHE
+# ==========================================================
+
+class LRUCache:
+    """
+    Thread-safe LRU cache. Entries older than `ttl` seconds
+    (None = never) count as misses and are dropped on access.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+
+            if entry is not _MISSING:
+                value, stored_at = entry
+
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                del self._data[key]
+
+            self.misses += 1
+            return default
+
+    def put(self, key, value, age=0.0):
+        """`age`: seconds the value has already lived (e.g. loaded from disk)."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() - age)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def items(self):
+        """(key, value) pairs, least recently used first."""
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._data.items()]
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
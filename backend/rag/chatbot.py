@@ -2,15 +2,15 @@
 # INTELLIGENT FINANCIAL AI - CHATBOT CORE
 # ==========================================================
 
-from rag.intent_classifier import classify_intent
-from rag.profile_engine import build_financial_profile
-from rag.live_state_store import load_live_metrics
-from groq import Groq
-
 import os
 import json
 import re
+import time
 import traceback
+from datetime import datetime
+
+from rag.intent_classifier import classify_intent
+from rag.live_state_store import load_live_metrics
 from rag.planning_engine import (
     loan_analysis,
     goal_planner,
@@ -28,25 +28,28 @@ from rag.daily_limit_engine import (
 from rag.memory_manager import (
     set_monthly_salary,
     set_daily_pocket_limit,
-    get_daily_pocket_limit
+    get_daily_pocket_limit,
+    save_chat,
+    get_recent_history,
+    set_pending_intent,
+    clear_pending_intent,
+    get_pending_intent
 )
 from rag.budget_advisor import suggest_budget_allocation, save_recommended_budget
 from rag.transaction_parser import add_transaction_from_text
+from rag import metrics
+from rag.local_intent import (
+    classify_local,
+    core_override,
+    record_llm_call
+)
+from rag.intent_cache import get_cached_intent, cache_intent
+from rag.ask_context import AskContext, needed_for
 
-
-from rag.finance_engine import *
-from rag.analytics_engine import *
-from rag.memory_manager import *
-
-from rag.retriever import query_index
-from groq import Groq
-
-import os
-import json
-import re
-import traceback
-
-from datetime import datetime
+# Deferred imports: groq (get_llm_client) and rag.retriever, which
+# loads faiss/numpy (and torch on first query), are imported where
+# they are used, so questions answered by the tools never pay for
+# them. `python -m rag.startup_benchmark` enforces this.
 
 
 # ==========================================================
@@ -63,6 +66,7 @@ def get_llm_client():
     if not api_key:
         raise ValueError("❌ GROQ_API_KEY not set.")
 
+    from groq import Groq
     return Groq(api_key=api_key)
 
 
@@ -86,21 +90,62 @@ def detect_month_from_question(question):
 
     # fallback → current month
     return datetime.now().strftime("%Y-%m")
+
+
 # ==========================================================
-# TOOL EXECUTION MAP
+# HELPER: RETRIEVAL FILTERS
 # ==========================================================
 
-def execute_financial_tool(intent, question, month_prefix):
+def detect_retrieval_filters(question):
+    """
+    Metadata filters for semantic retrieval, taken only from what
+    the question states explicitly (no current-month fallback).
+    """
+    from rag.retriever import field_values
 
-    numbers = extract_numbers(question)
-    live_metrics = load_live_metrics()
-    profile = build_financial_profile(month_prefix)
+    filters = {}
+    q_lower = question.lower()
+
+    match = re.search(r"(20\d{2}-\d{2})", question)
+    if match:
+        filters["month"] = match.group(1)
+
+    categories = [
+        category
+        for category in field_values("category")
+        if re.search(rf"\b{re.escape(category.lower())}\b", q_lower)
+    ]
+    if categories:
+        filters["category"] = categories
+
+    return filters
+# ==========================================================
+# TOOL EXECUTION MAP
+# ==========================================================
+
+def live_profile(context):
+    """Financial profile with live metrics merged in (real-time override)."""
+    profile = dict(context.get("profile"))
+    live_metrics = context.get("live_metrics")
 
-    # Merge live metrics into profile (real-time override)
     if live_metrics and isinstance(live_metrics, dict):
         financial_live = live_metrics.get("financial_metrics", {})
         profile.update(financial_live)
 
+    return profile
+
+
+def execute_financial_tool(intent, question, month_prefix, context=None):
+    """
+    Runs the tool for `intent`. The profile and live metrics come
+    from `context` (an AskContext, possibly prefetched) and are
+    only loaded for intents that use them.
+    """
+    if context is None:
+        context = AskContext(question, month_prefix)
+
+    numbers = extract_numbers(question)
+
 
     # ------------------------------------------------------
     # LOAN PLANNING
@@ -177,13 +222,13 @@ def execute_financial_tool(intent, question, month_prefix):
     # ADVISORY / HEALTH / RISK
     # ------------------------------------------------------
     if intent in ["advisory", "financial_health", "risk_analysis", "cashflow_analysis"]:
-        return profile
+        return live_profile(context)
 
     # ------------------------------------------------------
     # TRANSACTION DATA
     # ------------------------------------------------------
     if intent == "transaction_query":
-        return profile
+        return live_profile(context)
         # ------------------------------------------------------
     # DAILY LIMIT MANAGEMENT
     # ------------------------------------------------------
@@ -258,7 +303,8 @@ def execute_financial_tool(intent, question, month_prefix):
     # ------------------------------------------------------
     if intent == "budget_recommendation":
 
-        profile = build_financial_profile(month_prefix)
+        # Ledger profile without the live override
+        profile = context.get("profile")
 
         salary = profile.get("monthly_income")
 
@@ -279,7 +325,12 @@ def execute_financial_tool(intent, question, month_prefix):
 # LLM RESPONSE ENGINE
 # ==========================================================
 
-def generate_llm_response(question, tool_result=None):
+LLM_MODEL = "llama-3.3-70b-versatile"
+
+
+def build_llm_messages(question, tool_result=None, live_metrics=None):
+    """Chat messages for the answer model (reads history + live state,
+    unless `live_metrics` was already loaded)."""
     history = get_recent_history(limit=5)
 
     messages = [
@@ -309,7 +360,8 @@ def generate_llm_response(question, tool_result=None):
 
     # Inject live real-time metrics
     try:
-        live_metrics = load_live_metrics()
+        if live_metrics is None:
+            live_metrics = load_live_metrics()
         if live_metrics:
             context_parts.append(
                 "Live Financial State:\n" +
@@ -323,11 +375,17 @@ def generate_llm_response(question, tool_result=None):
 
     messages.append({"role": "user", "content": question})
 
+    return messages
+
+
+def generate_llm_response(question, tool_result=None, live_metrics=None):
+    messages = build_llm_messages(question, tool_result, live_metrics)
+
     # ✅ SAFE CLIENT CREATION (NEW)
     client = get_llm_client()
 
     response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
+        model=LLM_MODEL,
         messages=messages,
         temperature=0.3,
     )
@@ -336,180 +394,479 @@ def generate_llm_response(question, tool_result=None):
 
 
 # ==========================================================
-# MAIN ASK ORCHESTRATOR
+# INTENT OVERRIDES
 # ==========================================================
 
-def ask(question):
+def apply_intent_overrides(question, intent):
 
-    try:
-        month_prefix = detect_month_from_question(question)
+    # -------------------------------------------------
+    # HARD OVERRIDE FOR SIMPLE CORE QUERIES
+    # + GENERAL CORE FINANCIAL QUERIES
+    # (keyword lists live in local_intent, which also uses
+    # them to skip the LLM classifier for these questions)
+    # -------------------------------------------------
+    if core_override(question):
+        intent = "transaction_query"
 
-        # -------------------------------------------------
-        # 1️⃣ Always classify first (important)
-        # -------------------------------------------------
+    return intent
+
+
+def classify_without_llm(question, context=None):
+    """Local intent tiers, then the intent cache; None if both miss."""
+    pending_intent, _ = context.get("pending") if context else get_pending_intent()
+
+    local = classify_local(question, pending_intent)
+    if local:
+        return local
+
+    cached = get_cached_intent(question)
+    if cached:
+        cached["source"] = "cache"
+        return cached
+
+    return None
+
+
+def classify_question(question, context=None):
+    """
+    Local tiers / cache first; the Groq classifier only if they
+    miss. With a context, its speculative loads run while the
+    classifier call is in flight (never for locally decided
+    intents, which have no wait to hide).
+    """
+    start = time.perf_counter()
+
+    classification = classify_without_llm(question, context)
+
+    if classification is None:
+        if context:
+            context.prefetch()
+
+        llm_start = time.perf_counter()
         classification = classify_intent(question)
-        intent = classification["intent"]
+        record_llm_call(time.perf_counter() - llm_start)
 
-        q_lower = question.lower().strip()
+        cache_intent(question, classification)
 
-        # -------------------------------------------------
-        # HARD OVERRIDE FOR SIMPLE CORE QUERIES
-        # -------------------------------------------------
-        if q_lower in [
-            "salary",
-            "income",
-            "monthly salary",
-            "monthly_salary",
-            "monthly income"
-        ]:
-            intent = "transaction_query"
+    if context:
+        context.timings["classify"] = (time.perf_counter() - start) * 1000
 
-        # -------------------------------------------------
-        # GENERAL CORE FINANCIAL QUERIES
-        # -------------------------------------------------
-        core_keywords = [
-            "income",
-            "expense",
-            "monthly expense",
-            "monthly income",
-            "net savings",
-            "spending",
-            "surplus",
-            "cashflow"
-        ]
+    return classification
 
-        if any(keyword in q_lower for keyword in core_keywords):
-            intent = "transaction_query"
 
+async def classify_question_async(question, context=None):
+    from rag.intent_classifier import classify_intent_async
 
+    start = time.perf_counter()
 
-        # -------------------------------------------------
-        # 2️⃣ Check if previous intent pending
-        # -------------------------------------------------
-        pending_intent, required_fields = get_pending_intent()
+    classification = await run_blocking(classify_without_llm, question, context)
 
-        # 🔄 If user changed topic → clear old pending
-        if pending_intent and intent != pending_intent:
-            clear_pending_intent()
-            pending_intent = None
+    if classification is None:
+        if context:
+            context.prefetch()
 
-        # -------------------------------------------------
-        # 3️⃣ Handle pending intent (if still active)
-        # -------------------------------------------------
-        if pending_intent:
+        llm_start = time.perf_counter()
+        classification = await classify_intent_async(question)
+        record_llm_call(time.perf_counter() - llm_start)
 
-            numbers = extract_numbers(question)
+        await run_blocking(cache_intent, question, classification)
 
-            if numbers:
-                tool_result = execute_financial_tool(
-                    pending_intent,
-                    question,
-                    month_prefix
-                )
+    if context:
+        context.timings["classify"] = (time.perf_counter() - start) * 1000
 
-                # If calculation completed
-                if tool_result and tool_result.get("status") != "missing_parameters":
-                    clear_pending_intent()
-                    answer = generate_llm_response(question, tool_result)
-                    save_chat(question, answer)
-                    return answer
-
-            # Better conversational guidance
-            example_hint = ""
-            if pending_intent == "financial_goal":
-                example_hint = "Example: '800000 in 12 months'"
-            elif pending_intent == "loan_planning":
-                example_hint = "Example: '5000000 8% 20 years'"
-
-            answer = (
+    return classification
+
+
+# ==========================================================
+# ANSWER PLANNING (EVERYTHING EXCEPT LLM CALLS)
+# ==========================================================
+
+def plan_answer(question, intent, month_prefix, context=None):
+    """
+    Runs pending intents, tools and retrieval for a classified
+    question, reading inputs through `context` (an AskContext).
+    Returns either
+        {"answer": text}                  answered without the LLM
+        {"llm": [(prompt, tool_result)]}  LLM requests, each tried
+                                          only if the previous failed
+    Shared by ask() and ask_async(), which differ only in how
+    they call the LLM.
+    """
+    if context is None:
+        context = AskContext(question, month_prefix)
+
+    # -------------------------------------------------
+    # 2️⃣ Check if previous intent pending
+    # -------------------------------------------------
+    pending_intent, required_fields = context.get("pending")
+
+    # 🔄 If user changed topic → clear old pending
+    if pending_intent and intent != pending_intent:
+        clear_pending_intent()
+        pending_intent = None
+
+    # -------------------------------------------------
+    # 3️⃣ Handle pending intent (if still active)
+    # -------------------------------------------------
+    if pending_intent:
+
+        numbers = extract_numbers(question)
+
+        if numbers:
+            tool_result = execute_financial_tool(
+                pending_intent,
+                question,
+                month_prefix,
+                context
+            )
+
+            # If calculation completed
+            if tool_result and tool_result.get("status") != "missing_parameters":
+                clear_pending_intent()
+                return {"llm": [(question, tool_result)]}
+
+        # Better conversational guidance
+        example_hint = ""
+        if pending_intent == "financial_goal":
+            example_hint = "Example: '800000 in 12 months'"
+        elif pending_intent == "loan_planning":
+            example_hint = "Example: '5000000 8% 20 years'"
+
+        return {
+            "answer": (
                 f"To continue, I need: {', '.join(required_fields)}. "
                 f"{example_hint}"
             )
+        }
 
-            save_chat(question, answer)
-            return answer
-
-        # -------------------------------------------------
-        # 4️⃣ Execute tool for new intent
-        # -------------------------------------------------
-        tool_result = execute_financial_tool(intent, question, month_prefix)
+    # -------------------------------------------------
+    # 4️⃣ Execute tool for new intent
+    # -------------------------------------------------
+    tool_result = execute_financial_tool(intent, question, month_prefix, context)
 
-        if tool_result:
+    if tool_result:
 
-            if isinstance(tool_result, dict) and tool_result.get("status") == "missing_parameters":
-                answer = (
+        if isinstance(tool_result, dict) and tool_result.get("status") == "missing_parameters":
+            return {
+                "answer": (
                     f"I need more details: {', '.join(tool_result['required'])}. "
                     f"For example, include numbers like amount and timeline."
                 )
-                save_chat(question, answer)
-                return answer
+            }
 
-                        # Special handling for daily limit
-            if intent == "daily_limit_management" and isinstance(tool_result, dict):
+        # Special handling for daily limit
+        if intent == "daily_limit_management" and isinstance(tool_result, dict):
 
-                status = tool_result.get("status")
+            status = tool_result.get("status")
 
-                if status == "limit_set":
-                    answer = f"✅ Daily pocket limit set to ₹{tool_result['daily_limit']}."
+            if status == "limit_set":
+                answer = f"✅ Daily pocket limit set to ₹{tool_result['daily_limit']}."
 
-                elif status == "safe":
-                    answer = (
-                        f"🎉 You are within your daily limit.\n"
-                        f"Spent: ₹{tool_result['spent']} / ₹{tool_result['limit']}\n"
-                        f"Remaining: ₹{tool_result['remaining']}"
-                    )
+            elif status == "safe":
+                answer = (
+                    f"🎉 You are within your daily limit.\n"
+                    f"Spent: ₹{tool_result['spent']} / ₹{tool_result['limit']}\n"
+                    f"Remaining: ₹{tool_result['remaining']}"
+                )
 
-                elif status == "near_limit":
-                    answer = (
-                        f"⚠ You are near your daily limit.\n"
-                        f"Spent: ₹{tool_result['spent']} / ₹{tool_result['limit']}"
-                    )
+            elif status == "near_limit":
+                answer = (
+                    f"⚠ You are near your daily limit.\n"
+                    f"Spent: ₹{tool_result['spent']} / ₹{tool_result['limit']}"
+                )
 
-                elif status == "exceeded":
-                    tips = generate_reduction_suggestions()
-                    answer = (
-                        f"🚨 You exceeded your daily limit by ₹{tool_result['exceeded_by']}.\n\n"
-                        f"Suggestions to reduce expenses:\n- " + "\n- ".join(tips)
-                    )
+            elif status == "exceeded":
+                tips = generate_reduction_suggestions()
+                answer = (
+                    f"🚨 You exceeded your daily limit by ₹{tool_result['exceeded_by']}.\n\n"
+                    f"Suggestions to reduce expenses:\n- " + "\n- ".join(tips)
+                )
 
-                elif status == "limit_not_set":
-                    answer = "Daily pocket limit is not set. Please set it first."
+            elif status == "limit_not_set":
+                answer = "Daily pocket limit is not set. Please set it first."
 
-                else:
-                    answer = generate_llm_response(question, tool_result)
+            else:
+                return {"llm": [(question, tool_result)]}
 
-                save_chat(question, answer)
-                return answer
+            return {"answer": answer}
 
+    # -------------------------------------------------
+    # 5️⃣ RAG Fallback (semantic transaction retrieval)
+    # -------------------------------------------------
+    llm_requests = []
 
-        # -------------------------------------------------
-        # 5️⃣ RAG Fallback (semantic transaction retrieval)
-        # -------------------------------------------------
-        try:
-            if intent != "transaction_query":
-                retrieved_docs = query_index(question)
-                if retrieved_docs:
-                    context = "\n".join(retrieved_docs)
-                    answer = generate_llm_response(
-                        question + "\n\nRelevant Transaction Context:\n" + context
-                    )
-                    save_chat(question, answer)
-                    return answer
-        except Exception:
-            pass
+    try:
+        if intent != "transaction_query":
+            retrieved_docs = context.get("retrieval")
+            if retrieved_docs:
+                transaction_context = "\n".join(retrieved_docs)
+                llm_requests.append(
+                    (question + "\n\nRelevant Transaction Context:\n" + transaction_context, None)
+                )
+    except Exception:
+        pass
 
+    # -------------------------------------------------
+    # 6️⃣ Pure LLM (general finance / unrelated)
+    # -------------------------------------------------
+    llm_requests.append((question, None))
+
+    return {"llm": llm_requests}
+
+
+# ==========================================================
+# MAIN ASK ORCHESTRATOR
+# ==========================================================
+
+def ask(question):
+
+    try:
+        month_prefix = detect_month_from_question(question)
+        context = AskContext(question, month_prefix, get_executor())
 
         # -------------------------------------------------
-        # 6️⃣ Pure LLM (general finance / unrelated)
+        # 1️⃣ Always classify first (important)
+        #    (context loads run meanwhile if it goes to the LLM)
         # -------------------------------------------------
-        answer = generate_llm_response(question)
+        classification = classify_question(question, context)
+        intent = apply_intent_overrides(question, classification["intent"])
+        context.keep(needed_for(intent))
+
+        stage = time.perf_counter()
+        plan = plan_answer(question, intent, month_prefix, context)
+        context.timings["plan"] = (time.perf_counter() - stage) * 1000
+
+        answer = plan.get("answer")
+
+        if answer is None:
+            stage = time.perf_counter()
+            live_metrics = context.get("live_metrics")
+            *fallbacks, last = plan["llm"]
+
+            for prompt, tool_result in fallbacks:
+                try:
+                    answer = generate_llm_response(prompt, tool_result, live_metrics)
+                    break
+                except Exception:
+                    continue
+            else:
+                answer = generate_llm_response(*last, live_metrics)
+
+            context.timings["llm"] = (time.perf_counter() - stage) * 1000
+
         save_chat(question, answer)
+        context.record()
         return answer
 
     except Exception as e:
         return f"⚠️ System Error: {str(e)}"
 
 
+# ==========================================================
+# ASYNC ASK (API SERVER)
+# ==========================================================
+# Same flow as ask(), but the two Groq round trips go through
+# AsyncGroq and the blocking parts (tools, ledger aggregation,
+# embedding, JSON file I/O) run on a bounded thread pool, so
+# the event loop never blocks. Concurrency limits live in
+# api_server.
+
+ASK_EXECUTOR_WORKERS = int(os.environ.get("ASK_EXECUTOR_WORKERS", 8))
+
+_executor = None
+_async_llm_client = None
+
+
+def get_executor():
+    global _executor
+
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(
+            max_workers=ASK_EXECUTOR_WORKERS,
+            thread_name_prefix="ask"
+        )
+
+    return _executor
+
+
+async def run_blocking(fn, *args):
+    import asyncio
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), fn, *args)
+
+
+def get_async_llm_client():
+    global _async_llm_client
+
+    if _async_llm_client is None:
+        api_key = os.environ.get("GROQ_API_KEY")
+
+        if not api_key:
+            raise ValueError("❌ GROQ_API_KEY not set.")
+
+        from groq import AsyncGroq
+        _async_llm_client = AsyncGroq(api_key=api_key)
+
+    return _async_llm_client
+
+
+async def generate_llm_response_async(question, tool_result=None, live_metrics=None):
+    messages = await run_blocking(build_llm_messages, question, tool_result, live_metrics)
+
+    response = await get_async_llm_client().chat.completions.create(
+        model=LLM_MODEL,
+        messages=messages,
+        temperature=0.3,
+    )
+
+    return response.choices[0].message.content
+
+
+async def ask_async(question):
+    start = time.perf_counter()
+
+    try:
+        month_prefix = detect_month_from_question(question)
+        context = AskContext(question, month_prefix, get_executor())
+
+        classification = await classify_question_async(question, context)
+        intent = apply_intent_overrides(question, classification["intent"])
+        context.keep(needed_for(intent))
+
+        stage = time.perf_counter()
+        plan = await run_blocking(plan_answer, question, intent, month_prefix, context)
+        context.timings["plan"] = (time.perf_counter() - stage) * 1000
+
+        answer = plan.get("answer")
+
+        if answer is None:
+            stage = time.perf_counter()
+            live_metrics = await run_blocking(context.get, "live_metrics")
+            *fallbacks, last = plan["llm"]
+
+            for prompt, tool_result in fallbacks:
+                try:
+                    answer = await generate_llm_response_async(prompt, tool_result, live_metrics)
+                    break
+                except Exception:
+                    continue
+            else:
+                answer = await generate_llm_response_async(*last, live_metrics)
+
+            context.timings["llm"] = (time.perf_counter() - stage) * 1000
+
+        await run_blocking(save_chat, question, answer)
+        context.record()
+        metrics.observe("ask_latency_ms", (time.perf_counter() - start) * 1000)
+        return answer
+
+    except Exception as e:
+        metrics.increment("ask_errors")
+        return f"⚠️ System Error: {str(e)}"
+
+
+# ==========================================================
+# STREAMING ASK (SERVER-SENT EVENTS)
+# ==========================================================
+
+async def _stream_llm(prompt, tool_result, live_metrics=None):
+    """Yield answer text deltas from a streamed Groq completion."""
+    messages = await run_blocking(build_llm_messages, prompt, tool_result, live_metrics)
+
+    stream = await get_async_llm_client().chat.completions.create(
+        model=LLM_MODEL,
+        messages=messages,
+        temperature=0.3,
+        stream=True,
+    )
+
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def ask_stream(question):
+    """
+    ask_async() that yields the answer as it is generated:
+        ("token", text)              for each delta
+        ("done", {"answer", "ttft_ms"})  once saved via save_chat
+        ("error", message)           on failure
+    If the stream stops early (client disconnect, LLM error after
+    some text), the text produced so far is still saved.
+    Time to first token is recorded as the ask_ttft_ms metric.
+    A fallback LLM request is only tried if the previous one
+    failed before producing any text.
+    """
+    start = time.perf_counter()
+    ttft_ms = None
+    parts = []
+    saved = False
+
+    def first_token():
+        nonlocal ttft_ms
+        if ttft_ms is None:
+            ttft_ms = (time.perf_counter() - start) * 1000
+            metrics.observe("ask_ttft_ms", ttft_ms)
+
+    try:
+        month_prefix = detect_month_from_question(question)
+        context = AskContext(question, month_prefix, get_executor())
+
+        classification = await classify_question_async(question, context)
+        intent = apply_intent_overrides(question, classification["intent"])
+        context.keep(needed_for(intent))
+
+        stage = time.perf_counter()
+        plan = await run_blocking(plan_answer, question, intent, month_prefix, context)
+        context.timings["plan"] = (time.perf_counter() - stage) * 1000
+
+        if plan.get("answer") is not None:
+            first_token()
+            parts.append(plan["answer"])
+            yield "token", plan["answer"]
+
+        else:
+            requests = plan["llm"]
+            live_metrics = await run_blocking(context.get, "live_metrics")
+
+            for n, (prompt, tool_result) in enumerate(requests, start=1):
+                try:
+                    async for text in _stream_llm(prompt, tool_result, live_metrics):
+                        first_token()
+                        parts.append(text)
+                        yield "token", text
+                    break
+                except Exception:
+                    if parts or n == len(requests):
+                        raise
+
+        answer = "".join(parts)
+        await run_blocking(save_chat, question, answer)
+        saved = True
+        context.record()
+
+        metrics.observe("ask_stream_total_ms", (time.perf_counter() - start) * 1000)
+        yield "done", {
+            "answer": answer,
+            "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None
+        }
+
+    except Exception as e:
+        metrics.increment("ask_stream_errors")
+        yield "error", f"⚠️ System Error: {str(e)}"
+
+    finally:
+        # Client gone mid-stream (GeneratorExit / CancelledError) or
+        # the LLM failed after some text: keep what was answered.
+        # Synchronous, since a closing generator can't await.
+        if parts and not saved:
+            metrics.increment("ask_stream_partial_saves")
+            try:
+                save_chat(question, "".join(parts))
+            except Exception as e:
+                print(f"⚠️ Failed to save partial answer: {e}")
+
+
 
 # ==========================================================
 # RUN LOOP
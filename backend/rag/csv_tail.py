@@ -0,0 +1,208 @@
+# ==========================================================
+# CSV TAIL READER - PARSE ONLY NEWLY APPENDED ROWS
+# ==========================================================
+#
+# A cursor remembers the byte offset of the last complete
+# line that was consumed, plus enough of the file to notice
+# when it was truncated or rewritten rather than appended to.
+#
+
+import csv
+import io
+import os
+
+
+FINGERPRINT_BYTES = 64
+SCAN_CHUNK_BYTES = 1 << 20  # scan_appended read size
+
+
+# ==========================================================
+# CURSOR
+# ==========================================================
+
+def new_cursor():
+    return {
+        "file_id": None,
+        "offset": 0,
+        "fieldnames": None,
+        "header": b"",
+        "fingerprint": b"",
+    }
+
+
+def _file_id(stat):
+    return (stat.st_dev, stat.st_ino)
+
+
+def _read_at(f, offset, size):
+    if size <= 0:
+        return b""
+    f.seek(offset)
+    return f.read(size)
+
+
+def _is_same_file(cursor, f, stat):
+    """True if the file still starts with what the cursor already read."""
+    if cursor["fieldnames"] is None:
+        return False
+
+    if _file_id(stat) != cursor["file_id"]:
+        return False
+
+    if stat.st_size < cursor["offset"]:
+        return False
+
+    header = cursor["header"]
+    if _read_at(f, 0, len(header)) != header:
+        return False
+
+    fingerprint = cursor["fingerprint"]
+    start = cursor["offset"] - len(fingerprint)
+    return _read_at(f, start, len(fingerprint)) == fingerprint
+
+
+def cursor_matches(path, cursor):
+    """True if `path` is still the file `cursor` was reading, with
+    everything before the cursor unchanged (appends are fine)."""
+    try:
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            return _is_same_file(cursor, f, stat)
+    except OSError:
+        return False
+
+
+def _prepare(cursor, f, stat):
+    """
+    Reset the cursor to just past the header when the file is new,
+    truncated or rewritten. Returns (rebuilt, ready); ready is False
+    while the header line is still incomplete.
+    """
+    rebuilt = not _is_same_file(cursor, f, stat)
+
+    if rebuilt:
+        before = dict(cursor)
+        cursor.update(new_cursor())
+        cursor["file_id"] = _file_id(stat)
+
+        f.seek(0)
+        header = f.readline()
+        if not header.endswith(b"\n"):
+            # Still waiting for the header: only report the change
+            # into this state, not every poll while it lasts
+            return cursor != before, False
+
+        cursor["header"] = header
+        cursor["offset"] = len(header)
+        cursor["fingerprint"] = header[-FINGERPRINT_BYTES:]
+        cursor["fieldnames"] = next(
+            csv.reader([header.decode("utf-8")])
+        )
+
+    return rebuilt, True
+
+
+def _advance(cursor, complete):
+    """Move the cursor past `complete` (bytes ending in a newline)."""
+    cursor["offset"] += len(complete)
+
+    # Bytes just before the new offset, checked on the next call
+    tail = cursor["fingerprint"] + complete
+    cursor["fingerprint"] = tail[-FINGERPRINT_BYTES:]
+
+
+def parse_rows(text, cursor):
+    """Dict rows from text read past the cursor's header."""
+    return csv.DictReader(
+        io.StringIO(text, newline=""),
+        fieldnames=cursor["fieldnames"],
+    )
+
+
+# ==========================================================
+# READ APPENDED ROWS
+# ==========================================================
+
+def read_appended_rows(path, cursor):
+    """
+    Returns (rows, rebuilt).
+
+    rows    -> list of dict rows appended since the last call
+    rebuilt -> True when the file was new, truncated or rewritten
+               and rows were re-read from the start (the caller
+               should discard anything it folded before)
+
+    Only complete lines are consumed; a partially written last
+    line is picked up on the next call.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        rebuilt = cursor["fieldnames"] is not None
+        cursor.update(new_cursor())
+        return [], rebuilt
+
+    with open(path, "rb") as f:
+        rebuilt, ready = _prepare(cursor, f, stat)
+        if not ready:
+            return [], rebuilt
+
+        chunk = _read_at(f, cursor["offset"], stat.st_size - cursor["offset"])
+
+    end = chunk.rfind(b"\n") + 1
+    if end == 0:
+        return [], rebuilt
+
+    complete = chunk[:end]
+    _advance(cursor, complete)
+
+    return list(parse_rows(complete.decode("utf-8"), cursor)), rebuilt
+
+
+def scan_appended(path, cursor, on_text, chunk_bytes=SCAN_CHUNK_BYTES):
+    """
+    Streaming read_appended_rows for large reads: calls
+    on_text(text) for each chunk of complete lines (parse it with
+    parse_rows), advancing the cursor as it goes, so memory stays
+    bounded by chunk_bytes. Returns `rebuilt` as above.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        rebuilt = cursor["fieldnames"] is not None
+        cursor.update(new_cursor())
+        return rebuilt
+
+    with open(path, "rb") as f:
+        rebuilt, ready = _prepare(cursor, f, stat)
+        if not ready:
+            return rebuilt
+
+        f.seek(cursor["offset"])
+        pending = b""
+
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+
+            pending += block
+            end = pending.rfind(b"\n") + 1
+            if end == 0:
+                continue
+
+            complete, pending = pending[:end], pending[end:]
+            _advance(cursor, complete)
+            on_text(complete.decode("utf-8"))
+
+    return rebuilt
+
+
+def read_unterminated(path, cursor):
+    """Text after the cursor: a last line still missing its newline."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(cursor["offset"])
+            return f.read().decode("utf-8", errors="replace")
+    except OSError:
+        return ""
@@ -0,0 +1,129 @@
+# ==========================================================
+# DATE UTILS - SHARED DATE NORMALIZATION
+# ==========================================================
+#
+# The ledger mixes two layouts:
+#   DD-MM-YYYY  (original CSV rows)
+#   YYYY-MM-DD  (rows added by transaction_parser)
+#
+# Every date string is normalized once (memoized) to
+#   ordinal   -> date.toordinal()
+#   month key -> year * 12 + month - 1
+# so filters become integer comparisons.
+#
+
+from datetime import date, datetime
+from functools import lru_cache
+
+
+DATE_FORMATS = ("%d-%m-%Y", "%Y-%m-%d")
+
+
+# ==========================================================
+# PARSE (FAST PATH + STRPTIME FALLBACK)
+# ==========================================================
+
+def _slice_parse(value):
+    if len(value) != 10:
+        return None
+
+    if value[2] == "-" and value[5] == "-":
+        day, month, year = value[:2], value[3:5], value[6:]
+    elif value[4] == "-" and value[7] == "-":
+        year, month, day = value[:4], value[5:7], value[8:]
+    else:
+        return None
+
+    if not (year.isdigit() and month.isdigit() and day.isdigit()):
+        return None
+
+    return date(int(year), int(month), int(day))
+
+
+@lru_cache(maxsize=65536)
+def parse_date(value):
+    """
+    Returns (ordinal, month_key) for a date string in either
+    ledger layout, or None if it cannot be parsed.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+
+    try:
+        date_obj = _slice_parse(value)
+    except ValueError:
+        # Right shape, impossible date (e.g. 31-02-2026)
+        return None
+
+    if date_obj is None:
+        for fmt in DATE_FORMATS:
+            try:
+                date_obj = datetime.strptime(value, fmt).date()
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+
+    return date_obj.toordinal(), date_obj.year * 12 + date_obj.month - 1
+
+
+def to_ordinal(value):
+    parsed = parse_date(value)
+    return parsed[0] if parsed else None
+
+
+def to_month_key(value):
+    parsed = parse_date(value)
+    return parsed[1] if parsed else None
+
+
+# ==========================================================
+# MONTH KEYS
+# ==========================================================
+
+def month_key(month_prefix):
+    """
+    '2026-02' -> integer month key (year * 12 + month - 1).
+    Returns None for malformed input.
+    """
+    try:
+        year, month = month_prefix.split("-")
+        return int(year) * 12 + int(month) - 1
+    except Exception:
+        return None
+
+
+def month_prefix_of(key):
+    """Integer month key -> '2026-02'."""
+    year, month = divmod(key, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def month_bounds(month_prefix):
+    """'2026-02' -> (first, last) day ordinals, or None if malformed."""
+    key = month_key(month_prefix)
+    if key is None:
+        return None
+
+    year, month = divmod(key, 12)
+    next_year, next_month = divmod(key + 1, 12)
+
+    try:
+        first = date(year, month + 1, 1).toordinal()
+        last = date(next_year, next_month + 1, 1).toordinal() - 1
+    except ValueError:
+        return None
+
+    return first, last
+
+
+def today_ordinal():
+    return date.today().toordinal()
+
+
+def current_month_key():
+    today = date.today()
+    return today.year * 12 + today.month - 1
@@ -0,0 +1,594 @@
+# ==========================================================
+# DOCUMENT STORE - MEMORY-MAPPED COLUMNAR DOCUMENT STORE
+# ==========================================================
+#
+# Replaces the pickled list of {"text", "data"} dicts with
+# append-only files that are memory-mapped read-only:
+#
+#   <prefix>.rows                   fixed-width structured rows (ROW_DTYPE)
+#   <prefix>.text                   UTF-8 text blob
+#   <prefix>.offsets                int64 offsets into the text blob (n + 1)
+#   <prefix>.ids                    int64 vector id -> row mapping
+#   <prefix>.<column>.vocab         UTF-8 blob of a coded column's values
+#   <prefix>.<column>.vocab_offsets int64 offsets into it (values + 1)
+#
+# Opening a store maps the files instead of deserializing
+# them, so startup cost does not grow with the store and the
+# pages are shared between worker processes. Vocabulary values
+# are decoded one at a time when a row needs them; the value ->
+# code dictionaries only exist in a process that writes.
+#
+# The rows file is written last on append; its size decides how
+# many documents are committed. Writers and repairs hold an
+# exclusive lock on <prefix>.lock, so opening the store never
+# trims bytes another process is still appending. Readers take
+# no lock: they map only what the rows file has committed, and
+# refresh() picks up appends made by other processes.
+#
+
+import json
+import mmap
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+from rag.date_utils import to_ordinal
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one writer at a time
+    fcntl = None
+
+
+DOC_STORE_PREFIX = "documents"
+
+# Dictionary-encoded columns of the structured row
+CODED_FIELDS = (
+    "date",
+    "type",
+    "merchant",
+    "category",
+    "account",
+    "payment_method",
+    "notes",
+)
+
+VOCAB_COLUMNS = CODED_FIELDS + ("extra",)
+
+DATA_KEYS = (
+    "date",
+    "type",
+    "merchant",
+    "category",
+    "amount",
+    "account",
+    "payment_method",
+    "notes",
+)
+
+# has_data values: rows written before the presence mask existed
+# decode with every DATA_KEYS field; newer rows only with the
+# fields whose bit is set in "present"
+NO_DATA = 0
+ALL_KEYS = 1
+MASKED_KEYS = 2
+
+ROW_DTYPE = np.dtype(
+    [("has_data", "u1"), ("present", "u1"), ("ordinal", "i4")]
+    + [(field, "i4") for field in CODED_FIELDS]
+    + [("extra", "i4"), ("amount", "f8")],
+    align=True,
+)
+
+FILE_SUFFIXES = ("rows", "text", "offsets", "ids") + tuple(
+    suffix
+    for column in VOCAB_COLUMNS
+    for suffix in (f"{column}.vocab", f"{column}.vocab_offsets")
+)
+
+# Single JSONL [column, value] vocabulary of older stores,
+# split into the per-column files on first open
+LEGACY_VOCAB_SUFFIX = "vocab"
+
+_OFFSET_DTYPE = np.dtype("i8")
+
+
+def store_paths(prefix):
+    return {suffix: f"{prefix}.{suffix}" for suffix in FILE_SUFFIXES}
+
+
+def lock_path(prefix):
+    return f"{prefix}.lock"
+
+
+def store_exists(prefix=DOC_STORE_PREFIX):
+    return os.path.exists(store_paths(prefix)["rows"])
+
+
+def key_present(rows, key):
+    """Boolean mask of the rows whose data has `key`."""
+    bit = 1 << DATA_KEYS.index(key)
+    return (rows["has_data"] == ALL_KEYS) | (
+        (rows["has_data"] == MASKED_KEYS) & (rows["present"] & bit != 0)
+    )
+
+
+@contextmanager
+def store_lock(prefix):
+    """Exclusive lock serializing writers and repairs of a store."""
+    if fcntl is None:
+        yield
+        return
+
+    with open(lock_path(prefix), "a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# ==========================================================
+# STRING COLUMNS
+# ==========================================================
+
+def _file_id(path):
+    stat = os.stat(path)
+    return (stat.st_dev, stat.st_ino)
+
+
+def _map_offsets(path, count):
+    return np.memmap(path, dtype=_OFFSET_DTYPE, mode="r", shape=(count + 1,))
+
+
+def _map_blob(path):
+    if not os.path.getsize(path):
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class StringTable:
+    """
+    Read-only view of an append-only string column: a UTF-8 blob
+    plus n + 1 int64 offsets. Indexing decodes one value.
+    """
+
+    def __init__(self, blob_path, offsets_path, count=None):
+        if count is None:
+            count = max(os.path.getsize(offsets_path) // _OFFSET_DTYPE.itemsize - 1, 0)
+
+        self.count = count
+        self.file_id = _file_id(offsets_path)
+        self.offsets = _map_offsets(offsets_path, count)
+        self.blob = _map_blob(blob_path)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def end(self):
+        return int(self.offsets[self.count])
+
+
+def _append_strings(blob_path, offsets_path, values, start):
+    """Append values to a string column whose blob ends at `start`."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = start + np.cumsum([len(e) for e in encoded], dtype=_OFFSET_DTYPE)
+
+    with open(blob_path, "ab") as f:
+        f.write(b"".join(encoded))
+    with open(offsets_path, "ab") as f:
+        f.write(offsets.tobytes())
+
+
+class _View:
+    """One consistent set of mappings. Appends build a new view and
+    swap it in; readers holding the old one keep valid pages."""
+
+    def __init__(self, count=0, rows=None, ids=None, text=None, vocab=None):
+        self.file_id = None  # rows file; changes when a rebuild replaced it
+        self.count = count
+        self.rows = np.empty(0, ROW_DTYPE) if rows is None else rows
+        self.ids = np.empty(0, _OFFSET_DTYPE) if ids is None else ids
+        self.text = text
+        self.vocab = vocab or {column: [] for column in VOCAB_COLUMNS}
+
+
+# ==========================================================
+# STORE
+# ==========================================================
+
+class DocumentStore:
+    """
+    List-like view over the mapped files: len(store), store[i]
+    -> {"text", "data"}, store.append(doc). Lookups decode only
+    the rows asked for.
+    """
+
+    def __init__(self, prefix=DOC_STORE_PREFIX):
+        self.prefix = prefix
+        self.paths = store_paths(prefix)
+        self._view = _View()
+        self._codes = None  # column -> {value: code}, built on first write
+
+        with store_lock(prefix):
+            self._migrate_vocab()
+            self._create_missing()
+            self._repair()
+
+        self._map()
+
+    # ------------------------------------------------------
+    # Opening / mapping (repairs run under the store lock)
+    # ------------------------------------------------------
+
+    def _migrate_vocab(self):
+        legacy = f"{self.prefix}.{LEGACY_VOCAB_SUFFIX}"
+        if not os.path.exists(legacy):
+            return
+
+        values = {column: [] for column in VOCAB_COLUMNS}
+        with open(legacy, "rb") as f:
+            for line in f:
+                try:
+                    column, value = json.loads(line)
+                except ValueError:
+                    break  # torn trailing line left by a crash
+                values[column].append(value)
+
+        for column, column_values in values.items():
+            blob = self.paths[f"{column}.vocab"]
+            offsets = self.paths[f"{column}.vocab_offsets"]
+
+            open(blob, "wb").close()
+            with open(offsets, "wb") as f:
+                f.write(np.zeros(1, _OFFSET_DTYPE).tobytes())
+            if column_values:
+                _append_strings(blob, offsets, column_values, 0)
+
+        os.remove(legacy)
+
+    def _create_missing(self):
+        for suffix, path in self.paths.items():
+            if not os.path.exists(path):
+                open(path, "ab").close()
+
+            # Offset files always start with the 0 offset
+            if suffix.endswith("offsets") and os.path.getsize(path) == 0:
+                with open(path, "wb") as f:
+                    f.write(np.zeros(1, _OFFSET_DTYPE).tobytes())
+
+    def _repair_table(self, column):
+        """Drop vocab values whose bytes never made it to the blob."""
+        blob = self.paths[f"{column}.vocab"]
+        offsets_path = self.paths[f"{column}.vocab_offsets"]
+
+        offsets = np.fromfile(offsets_path, dtype=_OFFSET_DTYPE)
+        keep = max(int(np.searchsorted(offsets, os.path.getsize(blob), side="right")), 1)
+
+        os.truncate(offsets_path, keep * _OFFSET_DTYPE.itemsize)
+        os.truncate(blob, int(offsets[keep - 1]))
+
+    def _repair(self):
+        """Trim files back to the last fully committed row."""
+        count = os.path.getsize(self.paths["rows"]) // ROW_DTYPE.itemsize
+        os.truncate(self.paths["rows"], count * ROW_DTYPE.itemsize)
+
+        offsets = np.fromfile(self.paths["offsets"], dtype=_OFFSET_DTYPE)
+        if len(offsets) < count + 1:
+            raise ValueError(f"{self.paths['offsets']} is shorter than the row file")
+
+        os.truncate(self.paths["offsets"], (count + 1) * _OFFSET_DTYPE.itemsize)
+        os.truncate(self.paths["text"], int(offsets[count]))
+        os.truncate(self.paths["ids"], count * _OFFSET_DTYPE.itemsize)
+
+        for column in VOCAB_COLUMNS:
+            self._repair_table(column)
+
+    def _map(self):
+        """Map the committed rows and swap the new view in. The old
+        mappings are not closed: readers may still hold them, and
+        they are released once the last reference goes."""
+        count = os.path.getsize(self.paths["rows"]) // ROW_DTYPE.itemsize
+
+        view = _View(count)
+        view.file_id = _file_id(self.paths["rows"])
+        if count:
+            view.rows = np.memmap(self.paths["rows"], dtype=ROW_DTYPE, mode="r", shape=(count,))
+            view.ids = np.memmap(self.paths["ids"], dtype=_OFFSET_DTYPE, mode="r", shape=(count,))
+
+        view.text = StringTable(self.paths["text"], self.paths["offsets"], count)
+        view.vocab = {
+            column: StringTable(
+                self.paths[f"{column}.vocab"], self.paths[f"{column}.vocab_offsets"]
+            )
+            for column in VOCAB_COLUMNS
+        }
+
+        self._view = view
+
+    def close(self):
+        """Release this store's mappings (readers holding rows or
+        values from it are unaffected)."""
+        self._view = _View()
+        self._codes = None
+
+    def refresh(self):
+        """Pick up rows appended (or a rebuild swapped in) by another
+        process."""
+        stat = os.stat(self.paths["rows"])
+        view = self._view
+
+        if (
+            stat.st_size // ROW_DTYPE.itemsize != view.count
+            or (stat.st_dev, stat.st_ino) != view.file_id
+        ):
+            self._map()
+
+    # ------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------
+
+    @property
+    def count(self):
+        return self._view.count
+
+    @property
+    def rows(self):
+        return self._view.rows
+
+    @property
+    def ids(self):
+        return self._view.ids
+
+    @property
+    def vocab(self):
+        return self._view.vocab
+
+    def __len__(self):
+        return self._view.count
+
+    def text(self, row):
+        return self._view.text[row]
+
+    def _decode(self, view, row):
+        record = view.rows[row]
+        has_data = record["has_data"]
+
+        if has_data == NO_DATA:
+            return None
+
+        # Same key order as the rows built from the CSV
+        data = {}
+        for bit, key in enumerate(DATA_KEYS):
+            if has_data == MASKED_KEYS and not record["present"] & (1 << bit):
+                continue
+            if key == "amount":
+                data[key] = float(record["amount"])
+            else:
+                data[key] = view.vocab[key][record[key]]
+
+        # Fields outside DATA_KEYS, and originals that aren't the
+        # stored type (non-float amount, non-str text fields)
+        extra = view.vocab["extra"][record["extra"]]
+        if extra:
+            data.update(json.loads(extra))
+
+        return data
+
+    def data(self, row):
+        return self._decode(self._view, row)
+
+    def __getitem__(self, row):
+        view = self._view
+
+        if row < 0:
+            row += view.count
+        if not 0 <= row < view.count:
+            raise IndexError(row)
+
+        return {
+            "text": view.text[row],
+            "data": self._decode(view, row)
+        }
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def row_for_vector(self, vector_id):
+        return int(self._view.ids[vector_id])
+
+    def lookup(self, vector_ids):
+        """Documents for FAISS result ids, in the given order."""
+        return [self[self.row_for_vector(i)] for i in vector_ids]
+
+    # ------------------------------------------------------
+    # Writes (under the store lock)
+    # ------------------------------------------------------
+
+    def _sync_codes(self):
+        """Bring the value -> code dictionaries up to date with the
+        vocab on disk, including values other processes added."""
+        if self._codes is None:
+            self._codes = {column: {} for column in VOCAB_COLUMNS}
+            self._known = {column: (None, 0) for column in VOCAB_COLUMNS}
+
+        for column, table in self._view.vocab.items():
+            file_id, known = self._known[column]
+
+            # Replaced by a rebuild: start over from the new file
+            if file_id != table.file_id or known > len(table):
+                self._codes[column] = {}
+                known = 0
+
+            codes = self._codes[column]
+            for code in range(known, len(table)):
+                codes.setdefault(table[code], code)
+            self._known[column] = (table.file_id, len(table))
+
+    def _code(self, column, value, new_values):
+        codes = self._codes[column]
+        code = codes.get(value)
+
+        if code is None:
+            code = len(self._view.vocab[column]) + len(new_values[column])
+            codes[value] = code
+            new_values[column].append(value)
+
+        return code
+
+    def _encode_row(self, data, new_values):
+        record = np.zeros(1, ROW_DTYPE)
+        extra = {}
+
+        for field in CODED_FIELDS:
+            value = data.get(field) if data else None
+            if data and field in data and not isinstance(value, str):
+                extra[field] = value
+                value = None
+            record[field] = self._code(field, value or "", new_values)
+
+        if data is None:
+            record["extra"] = self._code("extra", "", new_values)
+            return record
+
+        present = 0
+        for bit, key in enumerate(DATA_KEYS):
+            if key in data:
+                present |= 1 << bit
+
+        for key, value in data.items():
+            if key not in DATA_KEYS:
+                extra[key] = value
+
+        # Stored as float for sums and filters; keep any other type
+        amount = data.get("amount")
+        try:
+            record["amount"] = float(amount or 0)
+        except (TypeError, ValueError):
+            pass
+        if "amount" in data and not isinstance(amount, float):
+            extra["amount"] = amount
+
+        record["has_data"] = MASKED_KEYS
+        record["present"] = present
+        record["ordinal"] = to_ordinal(str(data.get("date") or "")) or 0
+        record["extra"] = self._code(
+            "extra", json.dumps(extra, default=str) if extra else "", new_values
+        )
+        return record
+
+    def extend(self, docs):
+        """Append documents; row i is also vector id i."""
+        if not docs:
+            return
+
+        with store_lock(self.prefix):
+            # Another process may have appended since we mapped
+            self._map()
+            view = self._view
+
+            try:
+                self._sync_codes()
+                new_values = {column: [] for column in VOCAB_COLUMNS}
+                records = np.concatenate([
+                    self._encode_row(doc.get("data"), new_values) for doc in docs
+                ])
+            except BaseException:
+                self._codes = None  # may hold codes that were never written
+                raise
+
+            texts = [doc["text"].encode("utf-8") for doc in docs]
+            base = view.text.end()
+            offsets = base + np.cumsum([len(t) for t in texts], dtype=_OFFSET_DTYPE)
+            ids = np.arange(view.count, view.count + len(docs), dtype=_OFFSET_DTYPE)
+
+            for column, values in new_values.items():
+                if values:
+                    _append_strings(
+                        self.paths[f"{column}.vocab"],
+                        self.paths[f"{column}.vocab_offsets"],
+                        values,
+                        view.vocab[column].end(),
+                    )
+
+            with open(self.paths["text"], "ab") as f:
+                f.write(b"".join(texts))
+            with open(self.paths["offsets"], "ab") as f:
+                f.write(offsets.tobytes())
+            with open(self.paths["ids"], "ab") as f:
+                f.write(ids.tobytes())
+
+            # Commit point: rows file decides the document count
+            with open(self.paths["rows"], "ab") as f:
+                f.write(records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._map()
+
+    def append(self, doc):
+        self.extend([doc])
+
+    def truncate(self, count):
+        """Drop rows past `count` (e.g. ones the index never received)."""
+        if count >= len(self):
+            return
+
+        with store_lock(self.prefix):
+            self.close()
+            os.truncate(self.paths["rows"], count * ROW_DTYPE.itemsize)
+            self._repair()
+            self._map()
+
+
+# ==========================================================
+# REPLACE (ATOMIC-PER-FILE SWAP AFTER A REBUILD)
+# ==========================================================
+
+def remove_store(prefix):
+    paths = list(store_paths(prefix).values())
+    paths += [f"{prefix}.{LEGACY_VOCAB_SUFFIX}", lock_path(prefix)]
+
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def replace_store(source_prefix, target_prefix=DOC_STORE_PREFIX):
+    """
+    Move a freshly built store over the live one. The live rows
+    file is unlinked first and the new one moved in last, so a
+    crash midway leaves a store that opens empty rather than
+    inconsistent. Files are replaced, never truncated, so readers
+    still mapping the old store keep valid pages.
+    """
+    source = store_paths(source_prefix)
+    target = store_paths(target_prefix)
+
+    with store_lock(target_prefix):
+        if os.path.exists(target["rows"]):
+            os.remove(target["rows"])
+
+        # An older store's vocabulary would be re-imported on open
+        legacy_vocab = f"{target_prefix}.{LEGACY_VOCAB_SUFFIX}"
+        if os.path.exists(legacy_vocab):
+            os.remove(legacy_vocab)
+
+        for suffix in FILE_SUFFIXES:
+            if suffix != "rows":
+                os.replace(source[suffix], target[suffix])
+        os.replace(source["rows"], target["rows"])
+
+    if os.path.exists(lock_path(source_prefix)):
+        os.remove(lock_path(source_prefix))
@@ -0,0 +1,172 @@
+# ==========================================================
+# FILE WATCHER - INOTIFY WITH POLLING FALLBACK
+# ==========================================================
+#
+# wait(timeout) blocks until the watched file changes (True)
+# or the timeout passes (False). Bursts of writes are
+# debounced into a single wake-up.
+#
+# WATCHER_BACKEND:
+#   "auto"    -> inotify on Linux, polling elsewhere
+#   "inotify" -> inotify only (falls back if unavailable)
+#   "polling" -> stat() every poll interval
+#
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+
+WATCHER_BACKEND = os.environ.get("WATCHER_BACKEND", "auto").lower()
+
+DEBOUNCE_SECONDS = 0.2      # quiet period that ends a burst
+MAX_DEBOUNCE_SECONDS = 2.0  # never delay a wake-up longer than this
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+# ==========================================================
+# POLLING BACKEND
+# ==========================================================
+
+class PollingWatcher:
+    backend = "polling"
+
+    def __init__(self, path, poll_interval):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.last_seen = self._signature()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+
+        while True:
+            signature = self._signature()
+            if signature != self.last_seen:
+                self.last_seen = signature
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            time.sleep(min(self.poll_interval, remaining))
+
+    def close(self):
+        pass
+
+
+# ==========================================================
+# INOTIFY BACKEND
+# ==========================================================
+
+class InotifyWatcher:
+    backend = "inotify"
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # Watch the directory so replace-by-rename and re-creation
+        # of the file are seen too
+        directory = os.path.dirname(os.path.abspath(path))
+        self.name = os.path.basename(path).encode()
+
+        wd = libc.inotify_add_watch(self.fd, directory.encode(), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def _drain(self):
+        """Read pending events; True if any concern the watched file."""
+        relevant = False
+
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW or name == self.name:
+                    relevant = True
+
+    def _ready(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        return bool(readable)
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+
+        # Block until the first relevant event
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._ready(remaining):
+                return False
+            if self._drain():
+                break
+
+        # Debounce: absorb the rest of the burst
+        burst_deadline = time.monotonic() + MAX_DEBOUNCE_SECONDS
+        while True:
+            remaining = burst_deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            if not self._ready(min(DEBOUNCE_SECONDS, remaining)):
+                return True
+            self._drain()
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+# ==========================================================
+# FACTORY
+# ==========================================================
+
+def create_watcher(path, poll_interval, backend=None):
+    backend = (backend or WATCHER_BACKEND).lower()
+
+    if backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(path)
+        except Exception as e:
+            print(f"⚠️ inotify unavailable, falling back to polling: {e}")
+
+    return PollingWatcher(path, poll_interval)
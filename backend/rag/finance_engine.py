@@ -1,13 +1,53 @@
 import csv
-from collections import defaultdict
-from datetime import datetime
+import functools
 import json
+import os
+
+from rag.ledger_store import (
+    get_ledger,
+    codes_matching,
+    codes_containing,
+    codes_where,
+    select_rows,
+    row_at,
+)
+from rag.aggregation_engine import masked_sum, group_sum
+from rag import rollup_cube
+from rag.date_utils import month_key, to_ordinal
 
 BUDGET_FILE = "data/budget.json"
 
 
 CSV_FILE = "data/transactions.csv"
 
+# "columnar" -> in-memory columnar ledger (ledger_store)
+# "sqlite"   -> indexed SQL aggregates (sqlite_ledger, synced from the CSV)
+LEDGER_BACKEND = os.environ.get("LEDGER_BACKEND", "columnar").lower()
+
+# Month-scoped queries on the columnar backend read the monthly
+# rollup cube (rollup_cube) instead of scanning the ledger
+LEDGER_ROLLUP = os.environ.get("LEDGER_ROLLUP", "1") != "0"
+
+
+def _ledger_backend(fn):
+    """
+    Route a query to the sqlite_ledger function of the same name
+    when LEDGER_BACKEND is "sqlite", or to rollup_cube's when it
+    has one and LEDGER_ROLLUP is on. The columnar scan stays
+    reachable as fn.columnar (parity checks).
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if LEDGER_BACKEND == "sqlite":
+            from rag import sqlite_ledger
+            return getattr(sqlite_ledger, fn.__name__)(*args, **kwargs)
+        if LEDGER_ROLLUP and fn.__name__ in rollup_cube.QUERIES:
+            return getattr(rollup_cube, fn.__name__)(*args, **kwargs)
+        return fn(*args, **kwargs)
+
+    wrapper.columnar = fn
+    return wrapper
+
 
 # ==========================================
 # LOAD DATA (SAFE)
@@ -18,6 +58,25 @@ def load_data():
             return list(csv.DictReader(f))
     except Exception:
         return []
+# ==========================================
+# LEDGER FILTER HELPERS
+# ==========================================
+def _type_filter(ledger, tx_type):
+    return {"type": codes_matching(ledger, "type", tx_type)}
+
+
+def _month_filter(month_prefix):
+    return {"month": {month_key(month_prefix)}}
+
+
+def _date_filter(ledger, date_str):
+    # Match the calendar day in either date layout
+    ordinal = to_ordinal(date_str)
+    if ordinal is None:
+        return {"date_str": codes_where(ledger, "date_str", lambda v: v == date_str)}
+    return {"date": {ordinal}}
+
+
 # ==========================================
 # LOAD BUDGET DATA
 # ==========================================
@@ -32,25 +91,19 @@ def load_budget():
 # ==========================================
 # TOTAL INCOME
 # ==========================================
+@_ledger_backend
 def total_income():
-    data = load_data()
-    return sum(
-        float(row["amount"])
-        for row in data
-        if row["type"].lower() == "income"
-    )
+    ledger = get_ledger(CSV_FILE)
+    return masked_sum(ledger, _type_filter(ledger, "income"))
 
 
 # ==========================================
 # TOTAL EXPENSE
 # ==========================================
+@_ledger_backend
 def total_expense():
-    data = load_data()
-    return sum(
-        float(row["amount"])
-        for row in data
-        if row["type"].lower() == "expense"
-    )
+    ledger = get_ledger(CSV_FILE)
+    return masked_sum(ledger, _type_filter(ledger, "expense"))
 
 
 # ==========================================
@@ -63,26 +116,21 @@ def net_savings():
 # ==========================================
 # CATEGORY SPENDING
 # ==========================================
+@_ledger_backend
 def category_spending(category):
-    data = load_data()
-    return sum(
-        float(row["amount"])
-        for row in data
-        if row["type"].lower() == "expense"
-        and row["category"].lower() == category.lower()
-    )
+    ledger = get_ledger(CSV_FILE)
+    where = _type_filter(ledger, "expense")
+    where["category"] = codes_matching(ledger, "category", category)
+    return masked_sum(ledger, where)
 
 
 # ==========================================
 # ACCOUNT WISE SPENDING
 # ==========================================
+@_ledger_backend
 def account_wise_spending(account=None):
-    data = load_data()
-    summary = defaultdict(float)
-
-    for row in data:
-        if row["type"].lower() == "expense":
-            summary[row["account"]] += float(row["amount"])
+    ledger = get_ledger(CSV_FILE)
+    summary = group_sum(ledger, "account", _type_filter(ledger, "expense"))
 
     if account:
         return summary.get(account, 0)
@@ -97,59 +145,44 @@ def account_wise_spending(account=None):
 # ==========================================
 # ACCOUNT BALANCE (INCOME - EXPENSE)
 # ==========================================
+@_ledger_backend
 def account_balance(account):
-    data = load_data()
+    ledger = get_ledger(CSV_FILE)
+    income_codes = codes_matching(ledger, "type", "income")
+    types = ledger["type"]
+    amounts = ledger["amount"]
     balance = 0
 
-    for row in data:
-        if row["account"].lower() == account.lower():
-            if row["type"].lower() == "income":
-                balance += float(row["amount"])
-            else:
-                balance -= float(row["amount"])
+    where = {"account": codes_matching(ledger, "account", account)}
+
+    for i in select_rows(ledger, where):
+        if types[i] in income_codes:
+            balance += amounts[i]
+        else:
+            balance -= amounts[i]
 
     return balance
 
 # ==========================================
 # MONTHLY INCOME
 # ==========================================
+@_ledger_backend
 def monthly_income(month_prefix):
-    data = load_data()
-    total = 0
-
-    for row in data:
-        try:
-            date_obj = datetime.strptime(row["date"], "%d-%m-%Y")
-            formatted = date_obj.strftime("%Y-%m")
-
-            if formatted == month_prefix and row["type"].lower() == "income":
-                total += float(row["amount"])
-
-        except Exception:
-            continue
-
-    return total
+    ledger = get_ledger(CSV_FILE)
+    where = _month_filter(month_prefix)
+    where.update(_type_filter(ledger, "income"))
+    return masked_sum(ledger, where)
 
 
 # ==========================================
 # MONTHLY EXPENSE
 # ==========================================
+@_ledger_backend
 def monthly_expense(month_prefix):
-    data = load_data()
-    total = 0
-
-    for row in data:
-        try:
-            date_obj = datetime.strptime(row["date"], "%d-%m-%Y")
-            formatted = date_obj.strftime("%Y-%m")
-
-            if formatted == month_prefix and row["type"].lower() == "expense":
-                total += float(row["amount"])
-
-        except Exception:
-            continue
-
-    return total
+    ledger = get_ledger(CSV_FILE)
+    where = _month_filter(month_prefix)
+    where.update(_type_filter(ledger, "expense"))
+    return masked_sum(ledger, where)
 
 
 # ==========================================
@@ -167,28 +200,24 @@ def savings_rate_monthly(month_prefix):
 # ==========================================
 # MONTHLY SUMMARY (DD-MM-YYYY SAFE)
 # ==========================================
+@_ledger_backend
 def monthly_summary(month_prefix):
     """
     Example:
     '2026-02'
     """
-    data = load_data()
-    income = 0
-    expense = 0
-
-    for row in data:
-        try:
-            date_obj = datetime.strptime(row["date"], "%d-%m-%Y")
-            formatted = date_obj.strftime("%Y-%m")
+    ledger = get_ledger(CSV_FILE)
 
-            if formatted == month_prefix:
-                if row["type"].lower() == "income":
-                    income += float(row["amount"])
-                else:
-                    expense += float(row["amount"])
+    income_filter = _month_filter(month_prefix)
+    income_filter["type"] = codes_matching(ledger, "type", "income")
+    income = masked_sum(ledger, income_filter)
 
-        except Exception:
-            continue
+    # Anything that is not income counts as expense here
+    expense_filter = _month_filter(month_prefix)
+    expense_filter["type"] = codes_where(
+        ledger, "type", lambda v: v.lower() != "income"
+    )
+    expense = masked_sum(ledger, expense_filter)
 
     return {
         "income": income,
@@ -200,13 +229,12 @@ def monthly_summary(month_prefix):
 # ==========================================
 # HIGHEST CATEGORY
 # ==========================================
+@_ledger_backend
 def highest_category():
-    data = load_data()
-    category_totals = defaultdict(float)
-
-    for row in data:
-        if row["type"].lower() == "expense":
-            category_totals[row["category"]] += float(row["amount"])
+    ledger = get_ledger(CSV_FILE)
+    category_totals = group_sum(
+        ledger, "category", _type_filter(ledger, "expense")
+    )
 
     if not category_totals:
         return None
@@ -218,20 +246,22 @@ def highest_category():
 # ==========================================
 # BIGGEST TRANSACTION
 # ==========================================
+@_ledger_backend
 def biggest_transaction():
-    data = load_data()
-    max_tx = None
+    ledger = get_ledger(CSV_FILE)
+    max_index = None
     max_amount = 0
 
-    for row in data:
-        amt = float(row["amount"])
+    for i, amt in enumerate(ledger["amount"]):
         if amt > max_amount:
             max_amount = amt
-            max_tx = row
+            max_index = i
 
-    if not max_tx:
+    if max_index is None:
         return None
 
+    max_tx = row_at(ledger, max_index)
+
     return (
         f"Biggest Transaction: ₹{float(max_tx['amount']):,.2f} "
         f"at {max_tx['merchant']} "
@@ -255,91 +285,69 @@ def savings_rate():
 # ==========================================
 # PAYMENT METHOD SPENDING
 # ==========================================
+@_ledger_backend
 def payment_method_spending(method):
-    data = load_data()
-    return sum(
-        float(row["amount"])
-        for row in data
-        if row["type"].lower() == "expense"
-        and row["payment_method"].lower() == method.lower()
-    )
+    ledger = get_ledger(CSV_FILE)
+    where = _type_filter(ledger, "expense")
+    where["payment_method"] = codes_matching(ledger, "payment_method", method)
+    return masked_sum(ledger, where)
 
 
 # ==========================================
 # INCOME BY SOURCE
 # ==========================================
+@_ledger_backend
 def income_by_source(source):
-    data = load_data()
-    return sum(
-        float(row["amount"])
-        for row in data
-        if row["type"].lower() == "income"
-        and source.lower() in row["merchant"].lower()
-    )
+    ledger = get_ledger(CSV_FILE)
+    where = _type_filter(ledger, "income")
+    where["merchant"] = codes_containing(ledger, "merchant", source)
+    return masked_sum(ledger, where)
 
 
 # ==========================================
 # MERCHANT SPENDING
 # ==========================================
+@_ledger_backend
 def merchant_spending(merchant):
-    data = load_data()
-    return sum(
-        float(row["amount"])
-        for row in data
-        if row["type"].lower() == "expense"
-        and merchant.lower() in row["merchant"].lower()
-    )
+    ledger = get_ledger(CSV_FILE)
+    where = _type_filter(ledger, "expense")
+    where["merchant"] = codes_containing(ledger, "merchant", merchant)
+    return masked_sum(ledger, where)
 
 
 # ==========================================
 # SPENDING TREND (Daily)
 # ==========================================
+@_ledger_backend
 def daily_spending_summary():
-    data = load_data()
-    summary = defaultdict(float)
-
-    for row in data:
-        if row["type"].lower() == "expense":
-            summary[row["date"]] += float(row["amount"])
-
-    return dict(summary)
+    ledger = get_ledger(CSV_FILE)
+    return group_sum(ledger, "date_str", _type_filter(ledger, "expense"))
 
 
 # ==========================================
 # EXPENSE BY ACCOUNT + CATEGORY
 # ==========================================
+@_ledger_backend
 def account_category_breakdown(account):
-    data = load_data()
-    summary = defaultdict(float)
-
-    for row in data:
-        if (
-            row["type"].lower() == "expense"
-            and row["account"].lower() == account.lower()
-        ):
-            summary[row["category"]] += float(row["amount"])
-
-    return dict(summary)
+    ledger = get_ledger(CSV_FILE)
+    where = _type_filter(ledger, "expense")
+    where["account"] = codes_matching(ledger, "account", account)
+    return group_sum(ledger, "category", where)
 # =============================
 # TRANSACTION COUNT
 # =============================
+@_ledger_backend
 def transaction_count(category=None, date=None):
-    data = load_data()
-    count = 0
-
-    for row in data:
-        if row["type"].lower() != "expense":
-            continue
+    ledger = get_ledger(CSV_FILE)
+    where = _type_filter(ledger, "expense")
 
-        if category and row["category"].lower() != category.lower():
-            continue
+    if category:
+        where["category"] = codes_matching(ledger, "category", category)
 
-        if date and row["date"] != date:
-            continue
+    if date:
+        where.update(_date_filter(ledger, date))
 
-        count += 1
-
-    return count
+    return len(select_rows(ledger, where))
 
 
 # =============================
@@ -359,41 +367,33 @@ def percentage_of_category(category):
 # =============================
 # DATE BASED SPENDING
 # =============================
+@_ledger_backend
 def date_based_spending(date_str):
-    data = load_data()
-    total = 0
-
-    for row in data:
-        if row["type"].lower() == "expense" and row["date"] == date_str:
-            total += float(row["amount"])
-
-    return total
+    ledger = get_ledger(CSV_FILE)
+    where = _type_filter(ledger, "expense")
+    where.update(_date_filter(ledger, date_str))
+    return masked_sum(ledger, where)
 # ==========================================
 # BUDGET STATUS CHECK
 # ==========================================
-def check_budget_status(month_prefix=None):
-    data = load_data()
-    budgets = load_budget()
-    result = {}
+@_ledger_backend
+def category_expense_totals(month_prefix=None):
+    """Expense totals per category, for one month if given."""
+    ledger = get_ledger(CSV_FILE)
+    where = _type_filter(ledger, "expense")
 
-    # Calculate expense totals per category for month (if given)
-    category_totals = defaultdict(float)
+    if month_prefix:
+        where.update(_month_filter(month_prefix))
 
-    for row in data:
-        try:
-            if row["type"].lower() != "expense":
-                continue
+    return group_sum(ledger, "category", where)
 
-            if month_prefix:
-                date_obj = datetime.strptime(row["date"], "%d-%m-%Y")
-                formatted = date_obj.strftime("%Y-%m")
-                if formatted != month_prefix:
-                    continue
 
-            category_totals[row["category"]] += float(row["amount"])
+def check_budget_status(month_prefix=None):
+    budgets = load_budget()
+    result = {}
 
-        except Exception:
-            continue
+    # Calculate expense totals per category for month (if given)
+    category_totals = category_expense_totals(month_prefix)
 
     # Compare with budgets
     for category, budget in budgets.items():
@@ -418,47 +418,30 @@ def check_budget_status(month_prefix=None):
 # ==========================================
 # LARGE TRANSACTION DETECTION
 # ==========================================
+@_ledger_backend
 def detect_large_transactions(threshold=5000):
-    data = load_data()
-    large_txns = []
+    ledger = get_ledger(CSV_FILE)
+    amounts = ledger["amount"]
 
-    for row in data:
-        try:
-            amount = float(row["amount"])
-            if amount > threshold:
-                large_txns.append(row)
-        except Exception:
-            continue
+    large_rows = [i for i, amount in enumerate(amounts) if amount > threshold]
+    large_rows.sort(key=lambda i: amounts[i], reverse=True)
 
-    large_txns.sort(key=lambda x: float(x["amount"]), reverse=True)
-    return large_txns
+    return [row_at(ledger, i) for i in large_rows]
 # ==========================================
 # CATEGORY SPIKE DETECTION
 # ==========================================
-def detect_category_spike(category, current_month, previous_month):
-    current = 0
-    previous = 0
-
-    data = load_data()
-
-    for row in data:
-        try:
-            if row["type"].lower() != "expense":
-                continue
+@_ledger_backend
+def category_month_spending(category, month_prefix):
+    ledger = get_ledger(CSV_FILE)
+    where = _type_filter(ledger, "expense")
+    where["category"] = codes_matching(ledger, "category", category)
+    where.update(_month_filter(month_prefix))
+    return masked_sum(ledger, where)
 
-            if row["category"].lower() != category.lower():
-                continue
 
-            date_obj = datetime.strptime(row["date"], "%d-%m-%Y")
-            formatted = date_obj.strftime("%Y-%m")
-
-            if formatted == current_month:
-                current += float(row["amount"])
-            elif formatted == previous_month:
-                previous += float(row["amount"])
-
-        except Exception:
-            continue
+def detect_category_spike(category, current_month, previous_month):
+    current = category_month_spending(category, current_month)
+    previous = category_month_spending(category, previous_month)
 
     if previous == 0:
         return {"alert": False}
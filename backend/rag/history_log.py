@@ -0,0 +1,198 @@
+# ==========================================================
+# HISTORY LOG - APPEND-ONLY JSONL CHAT HISTORY
+# ==========================================================
+#
+# One JSON object per line in HISTORY_LOG_FILE:
+#   save  -> append one line (no read, no rewrite)
+#   read  -> last N turns from an in-memory ring buffer, or by
+#            reading the file backwards from the end; never a
+#            full-file parse
+# Once the file holds HISTORY_COMPACT_FACTOR x max_entries lines
+# it is compacted (temp file + rename) to the last max_entries.
+#
+# The first use migrates the legacy chat_history.json array if
+# the log doesn't exist yet (the JSON file is left in place).
+#
+
+import json
+import os
+import threading
+from collections import deque
+
+
+HISTORY_LOG_FILE = "data/chat_history.jsonl"
+LEGACY_HISTORY_FILE = "data/chat_history.json"
+
+HISTORY_RING_SIZE = 32  # turns kept in memory; prompts use 5-8
+HISTORY_COMPACT_FACTOR = 2
+_TAIL_BLOCK_SIZE = 8192
+
+_ring = deque(maxlen=HISTORY_RING_SIZE)
+_lock = threading.Lock()
+_lines = None  # lines in the file; None until first use
+_known_size = None  # file size after our last read / write
+
+
+# ==========================================================
+# READING FROM THE END
+# ==========================================================
+
+def read_tail(path, n):
+    """Last `n` entries of a JSONL file, oldest first, reading
+    backwards in blocks until enough lines are found."""
+    if n <= 0 or not os.path.exists(path):
+        return []
+
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+
+        # n complete lines need n + 1 newlines (or the file start)
+        while position > 0 and data.count(b"\n") <= n:
+            step = min(_TAIL_BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+
+    lines = data.splitlines()
+    if position > 0:
+        lines = lines[1:]  # starts mid-line
+
+    entries = []
+
+    for line in reversed(lines):
+        if len(entries) == n:
+            break
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue  # torn line after a crash
+
+    entries.reverse()
+    return entries
+
+
+def _count_lines(path):
+    count = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            count += block.count(b"\n")
+    return count
+
+
+# ==========================================================
+# SETUP / MIGRATION
+# ==========================================================
+
+def _migrate_legacy(max_entries):
+    try:
+        with open(LEGACY_HISTORY_FILE, "r") as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        return
+
+    if not isinstance(history, list) or not history:
+        return
+
+    history = history[-max_entries:]
+    tmp_path = HISTORY_LOG_FILE + ".tmp"
+
+    with open(tmp_path, "w") as f:
+        for entry in history:
+            f.write(json.dumps(entry) + "\n")
+
+    os.replace(tmp_path, HISTORY_LOG_FILE)
+    print(f"📦 Migrated {len(history)} chat turns from {LEGACY_HISTORY_FILE} to {HISTORY_LOG_FILE}.")
+
+
+def _sync(max_entries):
+    """(Re)load the ring and line count if this is the first use or
+    another process appended to the log (caller holds _lock)."""
+    if _lines is None and not os.path.exists(HISTORY_LOG_FILE):
+        try:
+            _migrate_legacy(max_entries)
+        except Exception as e:
+            print(f"⚠️ Failed to migrate {LEGACY_HISTORY_FILE}: {e}")
+
+    size = os.path.getsize(HISTORY_LOG_FILE) if os.path.exists(HISTORY_LOG_FILE) else 0
+
+    if _lines is not None and size == _known_size:
+        return
+
+    _reload(size)
+
+
+def _reload(size):
+    global _lines, _known_size
+
+    _ring.clear()
+    _ring.extend(read_tail(HISTORY_LOG_FILE, HISTORY_RING_SIZE))
+    _lines = _count_lines(HISTORY_LOG_FILE) if size else 0
+    _known_size = size
+
+
+def _compact(max_entries):
+    global _lines, _known_size
+
+    entries = read_tail(HISTORY_LOG_FILE, max_entries)
+    tmp_path = HISTORY_LOG_FILE + ".tmp"
+
+    with open(tmp_path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+    os.replace(tmp_path, HISTORY_LOG_FILE)
+    _lines = len(entries)
+    _known_size = os.path.getsize(HISTORY_LOG_FILE)
+
+
+# ==========================================================
+# PUBLIC API
+# ==========================================================
+
+def append_entry(entry, max_entries):
+    global _lines, _known_size
+
+    with _lock:
+        _sync(max_entries)
+
+        os.makedirs(os.path.dirname(HISTORY_LOG_FILE) or ".", exist_ok=True)
+
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+
+        with open(HISTORY_LOG_FILE, "ab") as f:
+            before = os.fstat(f.fileno()).st_size
+            f.write(line)
+
+        if before != _known_size:
+            # Another process (e.g. the CLI chatbot) appended since
+            # our last read: reload so its turns reach the ring too
+            _reload(os.path.getsize(HISTORY_LOG_FILE))
+        else:
+            _ring.append(entry)
+            _lines += 1
+            # If someone appended between fstat and our write, this
+            # won't match the file size and the next _sync reloads
+            _known_size = before + len(line)
+
+        if _lines >= HISTORY_COMPACT_FACTOR * max_entries:
+            try:
+                _compact(max_entries)
+            except Exception as e:
+                print(f"⚠️ Failed to compact {HISTORY_LOG_FILE}: {e}")
+
+
+def recent_entries(limit, max_entries):
+    """Last `limit` entries (at most max_entries), oldest first."""
+    limit = min(limit, max_entries)
+
+    with _lock:
+        _sync(max_entries)
+
+        if limit <= len(_ring) or len(_ring) == _lines:
+            return list(_ring)[-limit:] if limit > 0 else []
+
+    return read_tail(HISTORY_LOG_FILE, limit)
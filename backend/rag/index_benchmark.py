@@ -0,0 +1,252 @@
+# ==========================================================
+# INDEX BENCHMARK - RECALL VS LATENCY AGAINST FLAT SEARCH
+# ==========================================================
+#
+# Usage (from backend/):
+#   python -m rag.index_benchmark                  # vectors from vector.index
+#   python -m rag.index_benchmark --synthetic 1000000
+#   python -m rag.index_benchmark --retrieval      # dense vs hybrid
+#
+# Every ANN configuration is scored against exact IndexFlatL2
+# results on the same queries:
+#   recall@k = |ann_top_k ∩ exact_top_k| / k
+# and single-query latency (p50 / p95, ms).
+#
+# --retrieval scores the live retriever end to end on known-item
+# queries built from stored transactions ("Swiggy ₹858.44"):
+#   recall@k = fraction of queries whose source row is in the top k
+#
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from rag.index_factory import (
+    create_index,
+    apply_search_params,
+    auto_nlist,
+    training_size,
+    needs_training,
+)
+from rag.document_store import NO_DATA
+
+
+EMBEDDING_DIM = 384
+INDEX_FILE = "vector.index"
+
+NPROBE_SWEEP = (1, 4, 16, 64)
+EF_SEARCH_SWEEP = (16, 64, 256)
+
+
+# ==========================================================
+# DATA
+# ==========================================================
+
+def load_saved_vectors(index_file=INDEX_FILE):
+    saved = faiss.read_index(index_file)
+
+    if saved.ntotal == 0:
+        raise ValueError(f"{index_file} is empty")
+
+    # Flat indexes (the default) support reconstruct_n directly
+    return saved.reconstruct_n(0, saved.ntotal)
+
+
+def synthetic_vectors(n, dim=EMBEDDING_DIM, clusters=256, seed=0):
+    """Clustered unit vectors; loosely mimics templated transaction text."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    labels = rng.integers(0, clusters, n)
+
+    vectors = centers[labels] + 0.3 * rng.standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def sample_queries(vectors, n_queries, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+
+    queries = vectors[picks] + 0.05 * rng.standard_normal(
+        (len(picks), vectors.shape[1])
+    ).astype("float32")
+    faiss.normalize_L2(queries)
+    return queries
+
+
+# ==========================================================
+# MEASUREMENT
+# ==========================================================
+
+def _build(kind, vectors):
+    start = time.perf_counter()
+    index = create_index(vectors.shape[1], kind, len(vectors))
+
+    if needs_training(kind):
+        n_train = training_size(kind, auto_nlist(len(vectors)))
+        index.train(vectors[:max(n_train, 256)])
+
+    index.add(vectors)
+    return index, time.perf_counter() - start
+
+
+def _search_each(index, queries, k):
+    """Search one query at a time, as query_index does."""
+    latencies = []
+    ids = np.empty((len(queries), k), dtype="int64")
+
+    for row, query in enumerate(queries):
+        start = time.perf_counter()
+        _, found = index.search(query.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - start)
+        ids[row] = found[0]
+
+    return ids, np.array(latencies) * 1000
+
+
+def recall_at_k(found, exact):
+    k = exact.shape[1]
+    hits = sum(
+        len(set(f[f >= 0]) & set(e))
+        for f, e in zip(found, exact)
+    )
+    return hits / (len(exact) * k)
+
+
+def _row(label, build_seconds, found, exact, latencies_ms):
+    return {
+        "config": label,
+        "build_s": round(build_seconds, 2),
+        "recall": round(recall_at_k(found, exact), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+    }
+
+
+def benchmark_indexes(vectors, n_queries=200, k=10, kinds=("ivf_flat", "hnsw", "ivf_pq")):
+    queries = sample_queries(vectors, n_queries)
+
+    flat, build_seconds = _build("flat", vectors)
+    exact, latencies = _search_each(flat, queries, k)
+
+    results = [_row("flat", build_seconds, exact, exact, latencies)]
+
+    for kind in kinds:
+        index, build_seconds = _build(kind, vectors)
+
+        if kind == "hnsw":
+            sweep = [("efSearch", ef) for ef in EF_SEARCH_SWEEP]
+        else:
+            sweep = [("nprobe", nprobe) for nprobe in NPROBE_SWEEP]
+
+        for name, value in sweep:
+            if name == "efSearch":
+                apply_search_params(index, ef_search=value)
+            else:
+                apply_search_params(index, nprobe=value)
+
+            found, latencies = _search_each(index, queries, k)
+            results.append(
+                _row(f"{kind} {name}={value}", build_seconds, found, exact, latencies)
+            )
+
+    return results
+
+
+def known_item_queries(documents, n_queries, seed=2):
+    """(query, vector id) pairs naming a stored row's merchant and amount."""
+    from rag.bm25_index import amount_token
+
+    rng = np.random.default_rng(seed)
+    candidates = np.flatnonzero(documents.rows[documents.ids]["has_data"] != NO_DATA)
+    picks = rng.choice(candidates, size=min(n_queries, len(candidates)), replace=False)
+
+    queries = []
+    for vector_id in picks:
+        data = documents.data(documents.row_for_vector(int(vector_id)))
+        queries.append((
+            f"{data['merchant']} ₹{amount_token(data['amount'])}",
+            int(vector_id)
+        ))
+
+    return queries
+
+
+def benchmark_retrieval(n_queries=200, k=10, modes=("dense", "hybrid")):
+    from rag import retriever
+
+    retriever.load_model()
+    retriever.load_index()
+    retriever._get_bm25()
+
+    queries = known_item_queries(retriever.documents, n_queries)
+    results = []
+
+    for mode in modes:
+        retriever._result_cache.clear()
+        retriever._embedding_cache.clear()
+
+        found = 0
+        latencies = []
+
+        for query, target in queries:
+            start = time.perf_counter()
+            hits = retriever.search_documents(query, k, mode=mode)
+            latencies.append(time.perf_counter() - start)
+
+            texts = {hit["text"] for hit in hits}
+            target_text = retriever.documents.text(
+                retriever.documents.row_for_vector(target)
+            )
+            found += target_text in texts
+
+        latencies_ms = np.array(latencies) * 1000
+        results.append({
+            "config": mode,
+            "build_s": "-",
+            "recall": round(found / len(queries), 4),
+            "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        })
+
+    return results, len(retriever.documents)
+
+
+def print_results(results, n_vectors, k, against="flat"):
+    print(f"\n📊 {n_vectors:,} vectors, recall@{k} vs {against}\n")
+    print(f"{'config':<24}{'build s':>9}{'recall':>9}{'p50 ms':>10}{'p95 ms':>10}")
+
+    for row in results:
+        print(
+            f"{row['config']:<24}{row['build_s']:>9}{row['recall']:>9}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}"
+        )
+
+
+# ==========================================================
+# ENTRY POINT
+# ==========================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FAISS index recall vs latency benchmark")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="benchmark N synthetic vectors instead of vector.index")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--retrieval", action="store_true",
+                        help="compare dense vs hybrid search on known-item queries")
+    args = parser.parse_args()
+
+    if args.retrieval:
+        results, n_documents = benchmark_retrieval(args.queries, args.k)
+        print_results(results, n_documents, args.k, against="known items")
+
+    else:
+        if args.synthetic:
+            data = synthetic_vectors(args.synthetic)
+        else:
+            data = load_saved_vectors()
+
+        print_results(benchmark_indexes(data, args.queries, args.k), len(data), args.k)
@@ -0,0 +1,153 @@
+# ==========================================================
+# INDEX FACTORY - FLAT / IVF / HNSW / IVF-PQ FAISS INDEXES
+# ==========================================================
+#
+# RETRIEVER_INDEX_TYPE:
+#   "flat"     -> exact brute-force search (default)
+#   "ivf_flat" -> inverted lists, exact distances within lists
+#   "hnsw"     -> graph search, no training needed
+#   "ivf_pq"   -> inverted lists + product-quantized codes
+#
+# IVF types must be trained, which happens during
+# rebuild_index_from_csv(). Search-time knobs (nprobe,
+# efSearch) are applied whenever an index is created/loaded.
+#
+
+import math
+import os
+
+import faiss
+
+
+INDEX_TYPE = os.environ.get("RETRIEVER_INDEX_TYPE", "flat").lower()
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+IVF_NLIST = int(os.environ.get("RETRIEVER_IVF_NLIST", 0))  # 0 -> sized from row count
+IVF_NPROBE = int(os.environ.get("RETRIEVER_IVF_NPROBE", 16))
+IVF_TRAIN_MAX = 65536  # cap on vectors buffered for training
+
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = int(os.environ.get("RETRIEVER_HNSW_EF_SEARCH", 64))
+
+PQ_M = 48      # sub-quantizers (must divide the embedding dim)
+PQ_NBITS = 8   # bits per sub-quantizer code
+
+
+# ==========================================================
+# SIZING
+# ==========================================================
+
+def auto_nlist(n_rows):
+    """~4*sqrt(n) inverted lists, the usual FAISS rule of thumb."""
+    if IVF_NLIST:
+        return IVF_NLIST
+    return max(1, min(65536, int(4 * math.sqrt(max(n_rows, 1)))))
+
+
+def training_size(kind, nlist):
+    """Vectors to buffer before training (0 if no training needed)."""
+    if kind == "ivf_flat":
+        return min(nlist * 39, IVF_TRAIN_MAX)
+    if kind == "ivf_pq":
+        return min(max(nlist * 39, 2 ** PQ_NBITS * 39), IVF_TRAIN_MAX)
+    return 0
+
+
+def needs_training(kind):
+    return kind in ("ivf_flat", "ivf_pq")
+
+
+# ==========================================================
+# CREATE
+# ==========================================================
+
+def create_index(dim, kind=None, n_rows=0):
+    """
+    Builds an empty index of the requested type. IVF indexes
+    come back untrained; check `index.is_trained`.
+    """
+    kind = (kind or INDEX_TYPE).lower()
+
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {kind}")
+
+    if kind == "flat":
+        return faiss.IndexFlatL2(dim)
+
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        apply_search_params(index)
+        return index
+
+    nlist = auto_nlist(n_rows)
+    quantizer = faiss.IndexFlatL2(dim)
+
+    if kind == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, PQ_M, PQ_NBITS)
+
+    apply_search_params(index)
+    return index
+
+
+def create_empty_index(dim, kind=None):
+    """
+    Index for an empty store that must accept add() right away.
+    IVF types cannot be trained without data, so they start flat
+    until the next rebuild.
+    """
+    kind = (kind or INDEX_TYPE).lower()
+
+    if needs_training(kind):
+        return create_index(dim, "flat")
+
+    return create_index(dim, kind)
+
+
+# ==========================================================
+# SEARCH PARAMETERS
+# ==========================================================
+
+def apply_search_params(index, nprobe=None, ef_search=None):
+    """Set nprobe / efSearch on whatever index type this is."""
+    nprobe = nprobe or IVF_NPROBE
+    ef_search = ef_search or HNSW_EF_SEARCH
+
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except Exception:
+        pass
+
+    hnsw_index = faiss.downcast_index(index)
+    if hasattr(hnsw_index, "hnsw"):
+        hnsw_index.hnsw.efSearch = ef_search
+
+    return index
+
+
+def filtered_search_params(index, selector):
+    """
+    SearchParameters restricting a search to `selector`, carrying
+    over the index's own nprobe / efSearch (the parameter objects
+    otherwise fall back to FAISS defaults).
+    """
+    concrete = faiss.downcast_index(index)
+
+    if hasattr(concrete, "hnsw"):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=concrete.hnsw.efSearch)
+
+    try:
+        nprobe = faiss.extract_index_ivf(index).nprobe
+    except Exception:
+        return faiss.SearchParameters(sel=selector)
+
+    return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+
+
+def describe_index(index):
+    concrete = faiss.downcast_index(index)
+    return type(concrete).__name__
@@ -0,0 +1,207 @@
+# ==========================================================
+# INTENT CACHE - LLM CLASSIFICATIONS BY NORMALIZED QUESTION
+# ==========================================================
+#
+# classify_intent runs at temperature 0, so the same question
+# always gets the same intent. Results are kept in an in-memory
+# LRU backed by an append-only JSONL file, so repeats skip the
+# Groq round trip across restarts too.
+#
+# Key: lowercased question with punctuation stripped and every
+# number replaced by "#":
+#   "What's my income in 2026-02?" -> "whats my income in ##"
+#
+# Entries expire INTENT_CACHE_TTL seconds after they were first
+# stored (the age carries over when the file is reloaded). The
+# file is compacted from memory once it holds
+# INTENT_CACHE_COMPACT_FACTOR x the live entries.
+#
+
+import json
+import os
+import re
+import threading
+import time
+
+from rag.cache_utils import LRUCache, normalize_text
+
+
+INTENT_CACHE_FILE = "data/intent_cache.jsonl"
+INTENT_CACHE_SIZE = int(os.environ.get("INTENT_CACHE_SIZE", 2048))
+INTENT_CACHE_TTL = float(os.environ.get("INTENT_CACHE_TTL", 7 * 24 * 3600))  # seconds
+INTENT_CACHE_COMPACT_FACTOR = 2
+
+# "1" (default) -> cache LLM classifications, "0" -> always call Groq
+INTENT_CACHE_ENABLED = os.environ.get("INTENT_CACHE", "1") != "0"
+
+_cache = LRUCache(INTENT_CACHE_SIZE, ttl=INTENT_CACHE_TTL)  # key -> (classification, created_at)
+_file_lock = threading.Lock()
+_loaded = False
+_lines_on_disk = 0
+
+
+# ==========================================================
+# KEY NORMALIZATION
+# ==========================================================
+
+def normalize_question(question):
+    """Cache key for a question (see module header)."""
+    text = normalize_text(question)
+    text = re.sub(r"\d+(?:[.,]\d+)*", "#", text)
+    text = re.sub(r"[^\w#\s]", "", text).replace("_", " ")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# ==========================================================
+# DISK STORE
+# ==========================================================
+
+def load_intent_cache():
+    """Read INTENT_CACHE_FILE into the LRU once (latest entry wins)."""
+    global _loaded, _lines_on_disk
+
+    with _file_lock:
+        if _loaded:
+            return
+
+        from rag.intent_classifier import CLASSIFIER_MODEL
+
+        now = time.time()
+        lines = 0
+
+        if os.path.exists(INTENT_CACHE_FILE):
+            try:
+                with open(INTENT_CACHE_FILE, "r") as f:
+                    for line in f:
+                        lines += 1
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # torn last line after a crash
+
+                        # Another classifier model may answer differently
+                        if entry.get("model") != CLASSIFIER_MODEL:
+                            continue
+                        if now - entry["created_at"] >= INTENT_CACHE_TTL:
+                            continue
+
+                        _cache.put(
+                            entry["key"],
+                            (entry["result"], entry["created_at"]),
+                            age=now - entry["created_at"],
+                        )
+
+            except Exception as e:
+                print(f"⚠️ Failed to load {INTENT_CACHE_FILE}: {e}")
+
+        _lines_on_disk = lines
+        _loaded = True
+
+        # Stale / superseded lines from earlier runs
+        if lines > INTENT_CACHE_COMPACT_FACTOR * max(len(_cache), 1):
+            _compact()
+
+
+def _compact():
+    """Rewrite the file with only the live entries (caller holds _file_lock)."""
+    global _lines_on_disk
+
+    from rag.intent_classifier import CLASSIFIER_MODEL
+
+    entries = _cache.items()
+    tmp_path = INTENT_CACHE_FILE + ".tmp"
+
+    try:
+        with open(tmp_path, "w") as f:
+            for key, (result, created_at) in entries:
+                f.write(json.dumps({
+                    "key": key,
+                    "result": result,
+                    "created_at": created_at,
+                    "model": CLASSIFIER_MODEL,
+                }) + "\n")
+
+        os.replace(tmp_path, INTENT_CACHE_FILE)
+        _lines_on_disk = len(entries)
+
+    except Exception as e:
+        print(f"⚠️ Failed to compact {INTENT_CACHE_FILE}: {e}")
+
+
+def _append(key, result, created_at):
+    global _lines_on_disk
+
+    from rag.intent_classifier import CLASSIFIER_MODEL
+
+    with _file_lock:
+        try:
+            os.makedirs(os.path.dirname(INTENT_CACHE_FILE) or ".", exist_ok=True)
+
+            with open(INTENT_CACHE_FILE, "a") as f:
+                f.write(json.dumps({
+                    "key": key,
+                    "result": result,
+                    "created_at": created_at,
+                    "model": CLASSIFIER_MODEL,
+                }) + "\n")
+
+            _lines_on_disk += 1
+
+        except Exception as e:
+            print(f"⚠️ Failed to write {INTENT_CACHE_FILE}: {e}")
+            return
+
+        if _lines_on_disk > INTENT_CACHE_COMPACT_FACTOR * max(len(_cache), INTENT_CACHE_SIZE // 2):
+            _compact()
+
+
+# ==========================================================
+# PUBLIC API
+# ==========================================================
+
+def get_cached_intent(question):
+    """Cached {"intent", "confidence"} for the question, or None."""
+    if not INTENT_CACHE_ENABLED:
+        return None
+
+    load_intent_cache()
+
+    entry = _cache.get(normalize_question(question))
+    return dict(entry[0]) if entry else None
+
+
+def cache_intent(question, classification):
+    """Store an LLM classification. Low-confidence results are not kept:
+    classify_intent also returns general_finance/low when Groq fails."""
+    if not INTENT_CACHE_ENABLED or classification.get("confidence") == "low":
+        return
+
+    load_intent_cache()
+
+    key = normalize_question(question)
+    result = {
+        "intent": classification["intent"],
+        "confidence": classification["confidence"],
+    }
+    created_at = time.time()
+
+    _cache.put(key, (result, created_at))
+    _append(key, result, created_at)
+
+
+def clear_intent_cache():
+    global _lines_on_disk
+
+    with _file_lock:
+        _cache.clear()
+        _lines_on_disk = 0
+
+        if os.path.exists(INTENT_CACHE_FILE):
+            os.remove(INTENT_CACHE_FILE)
+
+
+def intent_cache_stats():
+    stats = _cache.stats()
+    stats["lines_on_disk"] = _lines_on_disk
+    stats["enabled"] = INTENT_CACHE_ENABLED
+    return stats
@@ -1,16 +1,49 @@
 # rag/intent_classifier.py
 
-from groq import Groq
 import os
 import json
 from dotenv import load_dotenv
 load_dotenv()
-API_KEY = os.environ.get("GROQ_API_KEY")
 
-if not API_KEY:
-    raise ValueError("❌ GROQ_API_KEY not set.")
 
-client = Groq(api_key=API_KEY)
+# ==========================================================
+# LAZY GROQ CLIENT
+# ==========================================================
+# Created on first classification, so importing this module
+# (and rag.chatbot) doesn't load groq or need the API key.
+_client = None
+_async_client = None
+
+CLASSIFIER_MODEL = "llama-3.1-8b-instant"
+
+
+def _api_key():
+    api_key = os.environ.get("GROQ_API_KEY")
+
+    if not api_key:
+        raise ValueError("❌ GROQ_API_KEY not set.")
+
+    return api_key
+
+
+def get_client():
+    global _client
+
+    if _client is None:
+        from groq import Groq
+        _client = Groq(api_key=_api_key())
+
+    return _client
+
+
+def get_async_client():
+    global _async_client
+
+    if _async_client is None:
+        from groq import AsyncGroq
+        _async_client = AsyncGroq(api_key=_api_key())
+
+    return _async_client
 
 
 # ==========================================================
@@ -51,16 +84,8 @@ INTENT_LIST = {
 # ==========================================================
 # INTENT CLASSIFIER (Safe + Robust)
 # ==========================================================
-def classify_intent(question: str) -> dict:
-    """
-    Returns:
-    {
-        "intent": "<category>",
-        "confidence": "high/medium/low"
-    }
-    """
-
-    prompt = f"""
+def build_prompt(question: str) -> str:
+    return f"""
 You are a professional intent classifier for an advanced AI Financial Assistant.
 
 Classify the user's question into ONE best-matching category.
@@ -106,42 +131,71 @@ User Question:
 "{question}"
 """
 
+
+def parse_classification(content: str) -> dict:
+    """Model output -> {"intent", "confidence"}, general_finance if unusable."""
+    content = content.strip()
+
+    # --------------------------------------------------
+    # SAFE JSON EXTRACTION
+    # --------------------------------------------------
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
+        result = json.loads(content)
+    except json.JSONDecodeError:
+        # Try to extract JSON manually if model adds text
+        try:
+            start = content.index("{")
+            end = content.rindex("}") + 1
+            result = json.loads(content[start:end])
+        except:
+            return {"intent": "general_finance", "confidence": "low"}
+
+    intent = result.get("intent", "").strip()
+    confidence = result.get("confidence", "low")
+
+    if intent not in INTENT_LIST:
+        return {"intent": "general_finance", "confidence": "low"}
+
+    if confidence not in ["high", "medium", "low"]:
+        confidence = "low"
+
+    return {
+        "intent": intent,
+        "confidence": confidence
+    }
+
+
+def classify_intent(question: str) -> dict:
+    """
+    Returns:
+    {
+        "intent": "<category>",
+        "confidence": "high/medium/low"
+    }
+    """
+    try:
+        response = get_client().chat.completions.create(
+            model=CLASSIFIER_MODEL,
+            messages=[{"role": "user", "content": build_prompt(question)}],
             temperature=0
         )
 
-        content = response.choices[0].message.content.strip()
+        return parse_classification(response.choices[0].message.content)
+
+    except Exception:
+        return {"intent": "general_finance", "confidence": "low"}
 
-        # --------------------------------------------------
-        # SAFE JSON EXTRACTION
-        # --------------------------------------------------
-        try:
-            result = json.loads(content)
-        except json.JSONDecodeError:
-            # Try to extract JSON manually if model adds text
-            try:
-                start = content.index("{")
-                end = content.rindex("}") + 1
-                result = json.loads(content[start:end])
-            except:
-                return {"intent": "general_finance", "confidence": "low"}
-
-        intent = result.get("intent", "").strip()
-        confidence = result.get("confidence", "low")
-
-        if intent not in INTENT_LIST:
-            return {"intent": "general_finance", "confidence": "low"}
 
-        if confidence not in ["high", "medium", "low"]:
-            confidence = "low"
+async def classify_intent_async(question: str) -> dict:
+    """classify_intent() over the async Groq client."""
+    try:
+        response = await get_async_client().chat.completions.create(
+            model=CLASSIFIER_MODEL,
+            messages=[{"role": "user", "content": build_prompt(question)}],
+            temperature=0
+        )
 
-        return {
-            "intent": intent,
-            "confidence": confidence
-        }
+        return parse_classification(response.choices[0].message.content)
 
     except Exception:
         return {"intent": "general_finance", "confidence": "low"}
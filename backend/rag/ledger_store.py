@@ -0,0 +1,473 @@
+# ==========================================================
+# LEDGER STORE - COLUMNAR IN-MEMORY TRANSACTION LEDGER
+# ==========================================================
+#
+# The CSV is parsed once into parallel column arrays and
+# kept resident. Text columns are dictionary-encoded: each
+# row stores an int code and the distinct values live in a
+# "<column>_values" list. The ledger is reloaded only when
+# the CSV's mtime or size changes, and then only the rows
+# appended since the last load are parsed (csv_tail cursor).
+#
+# Cold starts read <csv>.snapshot, a binary copy of the
+# columns regenerated in the background as the CSV grows,
+# plus the CSV tail written after it (LEDGER_SNAPSHOT=0 to
+# always parse the whole CSV).
+#
+
+import itertools
+import json
+import os
+import sys
+import threading
+from array import array
+from collections import defaultdict
+
+from rag.csv_tail import (
+    cursor_matches,
+    new_cursor,
+    parse_rows,
+    read_unterminated,
+    scan_appended,
+)
+from rag.date_utils import parse_date
+
+
+CSV_FILE = "data/transactions.csv"
+
+# Dictionary-encoded text columns (code column -> CSV field)
+CODED_COLUMNS = {
+    "date_str": "date",
+    "type": "type",
+    "merchant": "merchant",
+    "category": "category",
+    "account": "account",
+    "payment_method": "payment_method",
+    "notes": "notes",
+    # The amount as written in the CSV ("8986.90", "500"), so rows
+    # come back unchanged; queries use the float "amount" column
+    "amount_str": "amount",
+}
+
+CSV_FIELDS = [
+    "date",
+    "type",
+    "merchant",
+    "category",
+    "amount",
+    "account",
+    "payment_method",
+    "notes",
+]
+
+FIELD_COLUMNS = {field: column for column, field in CODED_COLUMNS.items()}
+
+# (ordinal, month key) stored for rows whose date cannot be parsed
+UNPARSED = (0, -1)
+
+ARRAY_COLUMNS = ["date", "month", "amount", *CODED_COLUMNS]
+
+LEDGER_SNAPSHOT = os.environ.get("LEDGER_SNAPSHOT", "1") != "0"
+SNAPSHOT_MAGIC = b"LEDGER-SNAPSHOT-2\n"
+# Rewrite the snapshot once this many rows (and this fraction of
+# the snapshot) were appended after it
+SNAPSHOT_MIN_NEW_ROWS = 10000
+SNAPSHOT_GROWTH = 0.1
+
+
+_ledgers = {}
+_lock = threading.Lock()
+_snapshot_rows = {}  # csv path -> rows in its snapshot on disk
+_snapshot_writers = {}
+
+# Ledgers extended in place of their predecessor (appends) keep its
+# generation, and with it its row order and codes
+_generations = itertools.count(1)
+
+
+# ==========================================================
+# BUILD LEDGER
+# ==========================================================
+
+def _empty_ledger(version=None):
+    ledger = {
+        "version": version,
+        "rows": 0,
+        "date": array("l"),
+        "month": array("l"),
+        "amount": array("d"),
+    }
+
+    for column in CODED_COLUMNS:
+        ledger[column] = array("l")
+        ledger[column + "_values"] = []
+
+    return ledger
+
+
+def _file_version(csv_path):
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _lookups_for(ledger):
+    """Per-column value -> code lookups, only needed while loading."""
+    return {
+        column: {value: code for code, value in enumerate(ledger[column + "_values"])}
+        for column in CODED_COLUMNS
+    }
+
+
+def _append_rows(ledger, lookups, rows):
+    for row in rows:
+        try:
+            amount = float(row["amount"])
+        except Exception:
+            continue
+
+        codes = []
+        for column, field in CODED_COLUMNS.items():
+            value = row.get(field) or ""
+            lookup = lookups[column]
+            code = lookup.get(value)
+            if code is None:
+                code = len(lookup)
+                lookup[value] = code
+                ledger[column + "_values"].append(value)
+            codes.append(code)
+
+        parsed = parse_date(row.get("date") or "") or UNPARSED
+
+        ledger["date"].append(parsed[0])
+        ledger["month"].append(parsed[1])
+        ledger["amount"].append(amount)
+
+        for column, code in zip(CODED_COLUMNS, codes):
+            ledger[column].append(code)
+
+
+def _copy_ledger(ledger, version):
+    """
+    Fresh copy of `ledger` holding only the rows read up to its
+    cursor (readers may still hold the old one, and numpy views on
+    its arrays would block appends anyway).
+    """
+    n = ledger["_cursor_rows"]
+    copy = {
+        "version": version,
+        "rows": n,
+        "_cursor": dict(ledger["_cursor"]),
+        "_generation": ledger["_generation"],
+    }
+
+    for column in ARRAY_COLUMNS:
+        copy[column] = ledger[column][:n]
+    for column in CODED_COLUMNS:
+        copy[column + "_values"] = list(ledger[column + "_values"])
+
+    return copy
+
+
+def _read_tail(csv_path, ledger):
+    """
+    Append the rows after ledger["_cursor"]. Returns False if the
+    CSV turned out to be rewritten under the cursor.
+    """
+    lookups = _lookups_for(ledger)
+    cursor = ledger["_cursor"]
+    had_rows = ledger["rows"] > 0
+
+    rebuilt = scan_appended(
+        csv_path,
+        cursor,
+        lambda text: _append_rows(ledger, lookups, parse_rows(text, cursor)),
+    )
+    if rebuilt and had_rows:
+        return False
+
+    ledger["_cursor_rows"] = len(ledger["amount"])
+
+    # A last line still missing its newline counts for queries but
+    # stays past the cursor, so the next load re-reads it
+    partial = read_unterminated(csv_path, cursor) if cursor["fieldnames"] else ""
+    if partial.strip():
+        _append_rows(ledger, lookups, parse_rows(partial, cursor))
+
+    ledger["rows"] = len(ledger["amount"])
+    return True
+
+
+def _build_ledger(csv_path, version, previous=None):
+    """
+    Load the ledger, starting from the first usable base:
+      1. the previous in-memory ledger (the CSV was appended to)
+      2. the on-disk snapshot, if its cursor still matches the CSV
+      3. nothing -> full CSV scan
+    and then reading only the CSV tail after the base's cursor.
+    """
+    try:
+        ledger, source = None, "scan"
+
+        if previous is not None and previous.get("_cursor") and cursor_matches(csv_path, previous["_cursor"]):
+            ledger, source = _copy_ledger(previous, version), "memory"
+
+        elif LEDGER_SNAPSHOT:
+            ledger = _read_snapshot(csv_path, version)
+            if ledger is not None:
+                source = "snapshot"
+
+        if ledger is None or not _read_tail(csv_path, ledger):
+            ledger, source = _empty_ledger(version), "scan"
+            ledger["_cursor"] = new_cursor()
+            _read_tail(csv_path, ledger)
+
+    except Exception:
+        return _empty_ledger(version), "scan"
+
+    return ledger, source
+
+
+# ==========================================================
+# SNAPSHOT (COMPACT BINARY COPY OF THE COLUMNS)
+# ==========================================================
+#
+# <csv>.snapshot holds the ledger up to a csv_tail cursor:
+#   SNAPSHOT_MAGIC, 8-byte header length, JSON header (rows,
+#   vocabularies, cursor, column layout), then each column's raw
+#   array bytes. Loading is one array.fromfile() per column, no
+#   text parsing or float(); the rows appended to the CSV after
+#   the cursor are read as a normal tail.
+#
+
+def snapshot_path(csv_path=CSV_FILE):
+    return csv_path + ".snapshot"
+
+
+def _encode_cursor(cursor):
+    encoded = dict(cursor)
+    encoded["header"] = cursor["header"].hex()
+    encoded["fingerprint"] = cursor["fingerprint"].hex()
+    return encoded
+
+
+def _decode_cursor(encoded):
+    cursor = dict(encoded)
+    cursor["file_id"] = tuple(encoded["file_id"])
+    cursor["header"] = bytes.fromhex(encoded["header"])
+    cursor["fingerprint"] = bytes.fromhex(encoded["fingerprint"])
+    return cursor
+
+
+def write_snapshot(csv_path, ledger):
+    """Atomically write the cursor-covered rows of `ledger`."""
+    n = ledger["_cursor_rows"]
+    path = snapshot_path(csv_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    columns = [(column, ledger[column][:n]) for column in ARRAY_COLUMNS]
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "rows": n,
+        "cursor": _encode_cursor(ledger["_cursor"]),
+        "columns": [[column, values.typecode, values.itemsize] for column, values in columns],
+        "vocab": {column: ledger[column + "_values"] for column in CODED_COLUMNS},
+    }).encode("utf-8")
+
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for _, values in columns:
+            values.tofile(f)
+
+    os.replace(tmp_path, path)
+    return n
+
+
+def _read_snapshot(csv_path, version):
+    """Ledger from the snapshot, or None if missing, unreadable or
+    not a prefix of the current CSV."""
+    try:
+        with open(snapshot_path(csv_path), "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+
+            size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(size).decode("utf-8"))
+
+            cursor = _decode_cursor(header["cursor"])
+            if header["byteorder"] != sys.byteorder or not cursor_matches(csv_path, cursor):
+                return None
+
+            n = header["rows"]
+            ledger = {"version": version, "rows": n, "_cursor": cursor}
+
+            for column, typecode, itemsize in header["columns"]:
+                values = array(typecode)
+                if values.itemsize != itemsize:
+                    return None
+                values.fromfile(f, n)
+                ledger[column] = values
+
+            for column in CODED_COLUMNS:
+                ledger[column + "_values"] = header["vocab"][column]
+
+    except (OSError, ValueError, KeyError, EOFError):
+        return None
+
+    if any(column not in ledger for column in ARRAY_COLUMNS):
+        return None
+
+    _snapshot_rows[csv_path] = n
+    return ledger
+
+
+def _snapshot_due(csv_path, ledger):
+    rows = ledger["_cursor_rows"]
+    saved = _snapshot_rows.get(csv_path)
+
+    if rows == 0:
+        return False
+    if saved is None:
+        return True
+    return rows - saved >= max(SNAPSHOT_MIN_NEW_ROWS, saved * SNAPSHOT_GROWTH)
+
+
+def _refresh_snapshot(csv_path, ledger):
+    """Rewrite the snapshot in the background once enough rows were
+    appended since it was taken (one writer at a time per CSV)."""
+    if not LEDGER_SNAPSHOT or not _snapshot_due(csv_path, ledger):
+        return
+
+    writer = _snapshot_writers.get(csv_path)
+    if writer is not None and writer.is_alive():
+        return
+
+    def write():
+        try:
+            _snapshot_rows[csv_path] = write_snapshot(csv_path, ledger)
+        except Exception as e:
+            print(f"⚠️ Failed to write ledger snapshot for {csv_path}: {e}")
+
+    writer = threading.Thread(target=write, name="ledger-snapshot", daemon=True)
+    _snapshot_writers[csv_path] = writer
+    writer.start()
+
+
+# ==========================================================
+# LOAD LEDGER (CACHED, RELOAD ON CHANGE)
+# ==========================================================
+
+def get_ledger(csv_path=CSV_FILE):
+    version = _file_version(csv_path)
+
+    ledger = _ledgers.get(csv_path)
+    if ledger is not None and ledger["version"] == version:
+        return ledger
+
+    with _lock:
+        ledger = _ledgers.get(csv_path)
+        if ledger is not None and ledger["version"] == version:
+            return ledger
+
+        if version is None:
+            ledger = _empty_ledger()
+        else:
+            ledger, source = _build_ledger(csv_path, version, previous=ledger)
+            if source == "scan":
+                # Whatever snapshot exists doesn't match this CSV
+                _snapshot_rows.pop(csv_path, None)
+            _refresh_snapshot(csv_path, ledger)
+
+        ledger.setdefault("_generation", next(_generations))
+        _ledgers[csv_path] = ledger
+        return ledger
+
+
+def invalidate(csv_path=None):
+    with _lock:
+        if csv_path is None:
+            _ledgers.clear()
+        else:
+            _ledgers.pop(csv_path, None)
+
+
+# ==========================================================
+# CODE LOOKUPS
+# ==========================================================
+
+def values_of(ledger, column):
+    return ledger[column + "_values"]
+
+
+def codes_where(ledger, column, predicate):
+    return {
+        code
+        for code, value in enumerate(values_of(ledger, column))
+        if predicate(value)
+    }
+
+
+def codes_matching(ledger, column, value):
+    """Codes whose value equals `value`, case-insensitively."""
+    value = value.lower()
+    return codes_where(ledger, column, lambda v: v.lower() == value)
+
+
+def codes_containing(ledger, column, fragment):
+    """Codes whose value contains `fragment`, case-insensitively."""
+    fragment = fragment.lower()
+    return codes_where(ledger, column, lambda v: fragment in v.lower())
+
+
+def row_at(ledger, i):
+    """Rebuild the CSV-style dict for row `i`."""
+    row = {}
+    for field in CSV_FIELDS:
+        column = FIELD_COLUMNS[field]
+        row[field] = values_of(ledger, column)[ledger[column][i]]
+
+    return row
+
+
+# ==========================================================
+# FILTER + AGGREGATE
+# ==========================================================
+
+def select_rows(ledger, where=None):
+    """
+    Row indices matching every filter in `where`, in file order.
+    `where` maps a column name to the set of allowed values/codes.
+    """
+    rows = range(ledger["rows"])
+
+    for column, allowed in (where or {}).items():
+        values = ledger[column]
+        rows = [i for i in rows if values[i] in allowed]
+
+    return rows
+
+
+def masked_sum(ledger, where=None):
+    amounts = ledger["amount"]
+    total = 0
+    for i in select_rows(ledger, where):
+        total += amounts[i]
+    return total
+
+
+def group_sum(ledger, by, where=None):
+    """Sum of amounts grouped by the decoded value of column `by`."""
+    amounts = ledger["amount"]
+    keys = ledger[by]
+    totals = defaultdict(float)
+
+    for i in select_rows(ledger, where):
+        totals[keys[i]] += amounts[i]
+
+    vocab = values_of(ledger, by)
+    return {vocab[code]: total for code, total in totals.items()}
@@ -1,13 +1,45 @@
 # ==========================================================
 # LIVE STATE STORE - REAL TIME FINANCIAL CORE
 # ==========================================================
-
+#
+# The live state is resident in memory: reads return a copy of
+# it and updates (add_expense, update_monthly_income, ...) are
+# O(1) changes under a lock. LIVE_STATE_FILE is only a durability
+# snapshot, written atomically (temp file + rename):
+#   - at most every LIVE_STATE_SNAPSHOT_INTERVAL seconds while
+#     there are unsaved updates (0 -> on every update)
+#   - immediately by save_live_metrics() / flush(), and at exit
+#
+# The stream engine publishes from its own process through the
+# same file, so reads pick up a snapshot written by someone else
+# (checked by stat at most every LIVE_STATE_RELOAD_INTERVAL s).
+#
+# subscribe(callback) -> callback(state, source) after each change,
+# source "update" (this process) or "reload" (file changed).
+#
+
+import atexit
+import copy
 import json
 import os
+import threading
+import time
 from datetime import datetime
 
 LIVE_STATE_FILE = "data/live_state.json"
 
+LIVE_STATE_SNAPSHOT_INTERVAL = float(os.environ.get("LIVE_STATE_SNAPSHOT_INTERVAL", 2.0))
+LIVE_STATE_RELOAD_INTERVAL = 1.0
+
+_state = None
+_lock = threading.RLock()
+_dirty = False
+_file_signature = None  # (mtime_ns, size, inode) of the snapshot we hold
+_last_stat_check = 0.0
+_flusher = None
+_flush_wakeup = threading.Event()
+_subscribers = []
+
 
 # ==========================================================
 # INITIALIZE STATE
@@ -26,10 +58,175 @@ def _default_state():
     }
 
 
-def _ensure_file():
-    if not os.path.exists(LIVE_STATE_FILE):
-        with open(LIVE_STATE_FILE, "w") as f:
-            json.dump(_default_state(), f, indent=2)
+def _signature():
+    try:
+        st = os.stat(LIVE_STATE_FILE)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+# ==========================================================
+# SNAPSHOT FILE
+# ==========================================================
+
+def _read_snapshot():
+    """State from LIVE_STATE_FILE, or None if missing / corrupted."""
+    try:
+        with open(LIVE_STATE_FILE, "r") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(state, dict) or "financial_metrics" not in state:
+        return None
+
+    state.setdefault("category_totals", {})
+    return state
+
+
+def _write_snapshot():
+    """Atomically write the resident state (caller holds _lock)."""
+    global _dirty, _file_signature
+
+    tmp_path = f"{LIVE_STATE_FILE}.{os.getpid()}.tmp"
+
+    try:
+        os.makedirs(os.path.dirname(LIVE_STATE_FILE) or ".", exist_ok=True)
+
+        with open(tmp_path, "w") as f:
+            json.dump(_state, f)
+
+        os.replace(tmp_path, LIVE_STATE_FILE)
+        _file_signature = _signature()
+        _dirty = False
+
+    except Exception as e:
+        print(f"⚠️ Failed to snapshot {LIVE_STATE_FILE}: {e}")
+
+
+def _flush_loop():
+    while True:
+        _flush_wakeup.wait()
+        _flush_wakeup.clear()
+
+        # Batch the updates arriving within one interval
+        time.sleep(LIVE_STATE_SNAPSHOT_INTERVAL)
+        flush()
+
+
+def _schedule_snapshot():
+    """Caller holds _lock and has just marked the state dirty."""
+    global _flusher
+
+    if LIVE_STATE_SNAPSHOT_INTERVAL <= 0:
+        _write_snapshot()
+        return
+
+    if _flusher is None:
+        _flusher = threading.Thread(target=_flush_loop, name="live-state-snapshot", daemon=True)
+        _flusher.start()
+
+    _flush_wakeup.set()
+
+
+def flush():
+    """Write the snapshot now if there are unsaved updates."""
+    with _lock:
+        if _dirty:
+            _write_snapshot()
+
+
+atexit.register(flush)
+
+
+# ==========================================================
+# RESIDENT STATE
+# ==========================================================
+
+def _notify(source):
+    with _lock:
+        if not _subscribers:
+            return
+        state = copy.deepcopy(_state)
+        callbacks = list(_subscribers)
+
+    for callback in callbacks:
+        try:
+            callback(state, source)
+        except Exception as e:
+            print(f"⚠️ Live state subscriber failed: {e}")
+
+
+def _resident_state():
+    """The in-memory state, (re)loaded when the snapshot file was
+    replaced by another process. Returns (state, reloaded)."""
+    global _state, _file_signature, _last_stat_check
+
+    with _lock:
+        now = time.monotonic()
+
+        if _state is not None and now - _last_stat_check < LIVE_STATE_RELOAD_INTERVAL:
+            return _state, False
+
+        _last_stat_check = now
+        signature = _signature()
+
+        if _state is not None and signature == _file_signature:
+            return _state, False
+
+        if _state is not None and _dirty:
+            # Unsaved local updates: keep them, our next snapshot wins
+            return _state, False
+
+        state = _read_snapshot() if signature else None
+        reloaded = _state is not None
+
+        if state is None:
+            # Missing or corrupted -> start fresh
+            _state = _default_state()
+            _write_snapshot()
+        else:
+            _state = state
+            _file_signature = signature
+
+        return _state, reloaded
+
+
+def _update(mutate):
+    """Apply `mutate(state)` under the lock, schedule a snapshot and
+    notify subscribers. Returns mutate's result."""
+    global _dirty
+
+    _, reloaded = _resident_state()
+    if reloaded:
+        _notify("reload")
+
+    with _lock:
+        result = mutate(_state)
+        _state["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        _dirty = True
+        _schedule_snapshot()
+
+        # Callers keep their result; the resident dicts stay private
+        result = copy.deepcopy(result)
+
+    _notify("update")
+    return result
+
+
+def subscribe(callback):
+    """Call `callback(state, source)` after every change. Returns an
+    unsubscribe function."""
+    with _lock:
+        _subscribers.append(callback)
+
+    def unsubscribe():
+        with _lock:
+            if callback in _subscribers:
+                _subscribers.remove(callback)
+
+    return unsubscribe
 
 
 # ==========================================================
@@ -37,16 +234,15 @@ def _ensure_file():
 # ==========================================================
 
 def load_live_metrics():
-    _ensure_file()
+    state, reloaded = _resident_state()
 
-    try:
-        with open(LIVE_STATE_FILE, "r") as f:
-            return json.load(f)
-    except:
-        # Recover if corrupted
-        state = _default_state()
-        save_live_metrics(state)
-        return state
+    with _lock:
+        snapshot = copy.deepcopy(state)
+
+    if reloaded:
+        _notify("reload")
+
+    return snapshot
 
 
 # ==========================================================
@@ -54,29 +250,37 @@ def load_live_metrics():
 # ==========================================================
 
 def save_live_metrics(state):
+    """Replace the whole state and snapshot it right away (the stream
+    engine publishes to other processes this way)."""
+    global _state, _last_stat_check
+
     state["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    with open(LIVE_STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2)
+    with _lock:
+        _state = copy.deepcopy(state)
+        _last_stat_check = time.monotonic()
+        _write_snapshot()
+
+    _notify("update")
 
 
 # ==========================================================
 # UPDATE SALARY
 # ==========================================================
 
-def update_monthly_income(amount: float):
-    state = load_live_metrics()
+def _recalculate_net_savings(metrics):
+    metrics["net_savings"] = metrics["monthly_income"] - metrics["monthly_expense"]
 
-    state["financial_metrics"]["monthly_income"] = float(amount)
 
-    # Recalculate net savings
-    income = state["financial_metrics"]["monthly_income"]
-    expense = state["financial_metrics"]["monthly_expense"]
+def update_monthly_income(amount: float):
 
-    state["financial_metrics"]["net_savings"] = income - expense
+    def mutate(state):
+        metrics = state["financial_metrics"]
+        metrics["monthly_income"] = float(amount)
+        _recalculate_net_savings(metrics)
+        return metrics
 
-    save_live_metrics(state)
-    return state["financial_metrics"]
+    return _update(mutate)
 
 
 # ==========================================================
@@ -84,32 +288,27 @@ def update_monthly_income(amount: float):
 # ==========================================================
 
 def add_expense(amount: float, category: str):
-    state = load_live_metrics()
-
     amount = float(amount)
 
-    # Update totals
-    state["financial_metrics"]["monthly_expense"] += amount
-    state["financial_metrics"]["daily_expense"] += amount
+    def mutate(state):
+        metrics = state["financial_metrics"]
 
-    # Update category
-    if category not in state["category_totals"]:
-        state["category_totals"][category] = 0.0
+        # Update totals
+        metrics["monthly_expense"] += amount
+        metrics["daily_expense"] += amount
 
-    state["category_totals"][category] += amount
+        # Update category
+        totals = state["category_totals"]
+        totals[category] = totals.get(category, 0.0) + amount
 
-    # Recalculate net savings
-    income = state["financial_metrics"]["monthly_income"]
-    expense = state["financial_metrics"]["monthly_expense"]
+        _recalculate_net_savings(metrics)
 
-    state["financial_metrics"]["net_savings"] = income - expense
+        return {
+            "updated_metrics": metrics,
+            "category_total": totals[category]
+        }
 
-    save_live_metrics(state)
-
-    return {
-        "updated_metrics": state["financial_metrics"],
-        "category_total": state["category_totals"][category]
-    }
+    return _update(mutate)
 
 
 # ==========================================================
@@ -117,9 +316,11 @@ def add_expense(amount: float, category: str):
 # ==========================================================
 
 def reset_daily_expense():
-    state = load_live_metrics()
-    state["financial_metrics"]["daily_expense"] = 0.0
-    save_live_metrics(state)
+
+    def mutate(state):
+        state["financial_metrics"]["daily_expense"] = 0.0
+
+    _update(mutate)
 
 
 # ==========================================================
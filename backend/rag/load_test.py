@@ -0,0 +1,297 @@
+# ==========================================================
+# LOAD TEST - /ask THROUGHPUT AT A TARGET p95
+# ==========================================================
+#
+# Usage (from a scratch copy of backend/, since every answer is
+# appended to the chat history in data/):
+#   python -m rag.load_test
+#   python -m rag.load_test --levels 1,8,32,64 --p95-ms 1500
+#   python -m rag.load_test --url http://127.0.0.1:8000   # running server
+#   python -m rag.load_test --stream     # /ask/stream, adds client-side TTFT
+#
+# Starts a stub Groq server (fixed latency per completion), runs
+# the API with GROQ_BASE_URL pointed at it, then drives /ask with
+# closed-loop clients at each concurrency level. Reports req/s,
+# p50 / p95 and 503s per level, and the best throughput whose
+# p95 stays under --p95-ms.
+#
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+DEFAULT_LEVELS = (1, 4, 16, 32, 64)
+DEFAULT_QUESTIONS = (
+    "How much did I spend on food in 2026-02?",
+    "Should I prepay my home loan or invest?",
+    "What is my monthly income?",
+    "Show my Swiggy transactions",
+)
+
+
+# ==========================================================
+# STUB LLM SERVER
+# ==========================================================
+
+def _stub_handler(answer_ms, classify_ms, stream_token_ms=20):
+
+    class StubGroqHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            classifying = body.get("model") == "llama-3.1-8b-instant"
+
+            # For streams, answer_ms is the time to the first token
+            time.sleep((classify_ms if classifying else answer_ms) / 1000)
+
+            if classifying:
+                content = '{"intent": "general_finance", "confidence": "high"}'
+            else:
+                content = "Stub answer."
+
+            if body.get("stream"):
+                self._stream(body, content)
+                return
+
+            payload = json.dumps({
+                "id": "stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream(self, body, content):
+            """Emit `content` word by word as chat.completion.chunk events."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            words = [word + " " for word in (content + " Streamed by the stub.").split()]
+            deltas = [{"role": "assistant", "content": ""}]
+            deltas += [{"content": word} for word in words]
+
+            for n, delta in enumerate(deltas + [{}]):
+                chunk = {
+                    "id": "stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [{
+                        "index": 0,
+                        "delta": delta,
+                        "finish_reason": None if delta else "stop",
+                    }],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+                if 0 < n < len(deltas):
+                    time.sleep(stream_token_ms / 1000)
+
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return StubGroqHandler
+
+
+def start_stub_llm(answer_ms, classify_ms, port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), _stub_handler(answer_ms, classify_ms))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ==========================================================
+# API SERVER UNDER TEST
+# ==========================================================
+
+def start_api_server(port, llm_url):
+    env = dict(os.environ, GROQ_BASE_URL=llm_url, GROQ_API_KEY="stub")
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "rag.api_server:app",
+         "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+    # Wait for warm-up so the first levels don't measure cold caches
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/ready")
+            response = conn.getresponse()
+            state = json.loads(response.read())
+
+            if response.status == 200 or not state.get("running", True):
+                return proc
+        except (OSError, ValueError):
+            pass
+
+        time.sleep(0.2)
+
+    proc.terminate()
+    raise RuntimeError("API server did not start")
+
+
+# ==========================================================
+# LOAD GENERATOR
+# ==========================================================
+
+def _client_loop(url, questions, stop_at, results, offset, stream=False):
+    parsed = urllib.parse.urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+    path = "/ask/stream" if stream else "/ask"
+
+    i = offset
+    while time.monotonic() < stop_at:
+        body = json.dumps({"question": questions[i % len(questions)]})
+        i += 1
+
+        start = time.perf_counter()
+        ttft = None
+        try:
+            conn.request("POST", path, body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+
+            if stream and response.status == 200:
+                for line in iter(response.readline, b""):
+                    if ttft is None and line.startswith(b"event: token"):
+                        ttft = time.perf_counter() - start
+
+            response.read()
+            status = response.status
+        except OSError:
+            conn.close()
+            status = 0
+
+        results.append((status, time.perf_counter() - start, ttft))
+
+
+def run_level(url, concurrency, duration, questions, stream=False):
+    results = []
+    stop_at = time.monotonic() + duration
+
+    threads = [
+        threading.Thread(
+            target=_client_loop,
+            args=(url, questions, stop_at, results, n, stream)
+        )
+        for n in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ok = np.array([seconds for status, seconds, _ in results if status == 200]) * 1000
+    ttft = np.array([t for status, _, t in results if status == 200 and t is not None]) * 1000
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "rps": round(len(ok) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ok, 50)), 1) if len(ok) else None,
+        "p95_ms": round(float(np.percentile(ok, 95)), 1) if len(ok) else None,
+        "ttft_p95_ms": round(float(np.percentile(ttft, 95)), 1) if len(ttft) else None,
+        "busy_503": sum(1 for status, _, _ in results if status == 503),
+        "errors": sum(1 for status, _, _ in results if status not in (200, 503)),
+    }
+
+
+def print_levels(levels, p95_target):
+    print(
+        f"\n{'clients':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'ttft p95':>10}{'503s':>7}{'errors':>8}"
+    )
+
+    for row in levels:
+        print(
+            f"{row['concurrency']:>8}{row['rps']:>9}{str(row['p50_ms']):>10}"
+            f"{str(row['p95_ms']):>10}{str(row['ttft_p95_ms']):>10}"
+            f"{row['busy_503']:>7}{row['errors']:>8}"
+        )
+
+    within = [
+        row for row in levels
+        if row["p95_ms"] is not None and row["p95_ms"] <= p95_target and not row["errors"]
+    ]
+
+    if within:
+        best = max(within, key=lambda row: row["rps"])
+        print(
+            f"\n✅ {best['rps']} req/s at p95 {best['p95_ms']} ms "
+            f"(≤ {p95_target:g} ms, {best['concurrency']} clients)"
+        )
+    else:
+        print(f"\n❌ No level kept p95 under {p95_target:g} ms")
+
+
+# ==========================================================
+# ENTRY POINT
+# ==========================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/ask load test against a stub LLM")
+    parser.add_argument("--url", help="test an already running API server instead")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--levels", default=",".join(map(str, DEFAULT_LEVELS)))
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--p95-ms", type=float, default=1000.0)
+    parser.add_argument("--llm-ms", type=float, default=300.0, help="stub answer latency")
+    parser.add_argument("--classify-ms", type=float, default=80.0, help="stub classifier latency")
+    parser.add_argument("--stream", action="store_true", help="drive /ask/stream instead of /ask")
+    args = parser.parse_args()
+
+    server = None
+    stub = None
+
+    if args.url:
+        url = args.url
+    else:
+        stub = start_stub_llm(args.llm_ms, args.classify_ms)
+        server = start_api_server(args.port, f"http://127.0.0.1:{stub.server_port}")
+        url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        levels = [
+            run_level(url, int(level), args.duration, DEFAULT_QUESTIONS, args.stream)
+            for level in args.levels.split(",")
+        ]
+        print_levels(levels, args.p95_ms)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        if stub:
+            stub.shutdown()
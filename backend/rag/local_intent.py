@@ -0,0 +1,386 @@
+# ==========================================================
+# LOCAL INTENT - RULE + EMBEDDING FAST PATH BEFORE THE LLM
+# ==========================================================
+#
+# Tiers, cheapest first:
+#   1. override  -> the chatbot's core keywords; ask() forces
+#                   transaction_query for these anyway, so the
+#                   LLM answer would be discarded
+#   2. pending   -> a follow-up with numbers and no other rule hit
+#                   continues the pending multi-step intent
+#   3. rules     -> regexes; resolves only when exactly one
+#                   intent matches
+#   4. embedding -> nearest intent centroid over INTENT_EXAMPLES,
+#                   using the retriever's MiniLM model (only if it
+#                   is already loaded, unless forced)
+# Anything below LOCAL_INTENT_THRESHOLD escalates to the LLM.
+#
+# LOCAL_INTENT_MODE: "rules+embedding" (default) | "rules" | "off"
+#
+
+import os
+import re
+import sys
+import threading
+import time
+
+
+LOCAL_INTENT_MODE = os.environ.get("LOCAL_INTENT_MODE", "rules+embedding")
+
+# Load the embedding model just for intents (otherwise only used
+# when retrieval already loaded it)
+LOCAL_INTENT_FORCE_EMBEDDINGS = os.environ.get("LOCAL_INTENT_EMBEDDINGS") == "1"
+
+LOCAL_INTENT_THRESHOLD = float(os.environ.get("LOCAL_INTENT_THRESHOLD", 0.62))
+LOCAL_INTENT_MARGIN = 0.05  # best centroid must beat the runner-up by this
+LOCAL_INTENT_HIGH = 0.75    # embedding score reported as "high" confidence
+LOCAL_INTENT_MIN_WORDS = 3  # shorter questions are too vague for centroids
+
+CORE_KEYWORDS = (
+    "income",
+    "expense",
+    "monthly expense",
+    "monthly income",
+    "net savings",
+    "spending",
+    "surplus",
+    "cashflow",
+)
+CORE_EXACT = ("salary", "income", "monthly salary", "monthly_salary", "monthly income")
+
+
+# ==========================================================
+# RULES
+# ==========================================================
+
+INTENT_RULES = (
+    ("daily_limit_management", r"\b(daily|pocket)\s+(spending\s+)?(limit|allowance)\b"),
+    ("income_update", r"\b(my\s+)?(salary|income)\s+(is|of|=|now)\b|\bi\s+earn\b"),
+    ("transaction_entry", r"^\s*(i\s+)?(spent|paid|bought|add(ed)?\s+(an?\s+)?expense)\b.*\d"),
+    ("transaction_query", r"\bhow\s+much\s+(did|have)\s+i\s+(spend|spent|pay|paid)\b"
+                          r"|\b(show|list)\s+(my\s+)?\w*\s*transactions?\b"),
+    ("loan_planning", r"\b(loan|emi|mortgage)\b"),
+    ("insurance_planning", r"\binsurance\b|\bterm\s+plan\b|\bhealth\s+cover\b"),
+    ("retirement_planning", r"\bretire(ment)?\b|\bpension\b"),
+    ("tax_planning", r"\btax(es)?\b|\b80c\b|\bitr\b"),
+    ("investment_planning", r"\bsip\b|\bmutual\s+funds?\b|\binvest(ing|ment)?\s+\d"),
+    ("budget_recommendation", r"\b(recommend|suggest)\w*\b.*\bbudget\b|\bbudget\s+(plan|allocation)\b"),
+    ("financial_health", r"\bfinancial\s+health\b|\bhealth\s+score\b"),
+    ("market_information", r"\b(nifty|sensex|stock\s+price|share\s+price)\b"),
+)
+
+_COMPILED_RULES = tuple((intent, re.compile(pattern, re.I)) for intent, pattern in INTENT_RULES)
+
+
+def core_override(question):
+    """True if the chatbot forces transaction_query for this question."""
+    q_lower = question.lower().strip()
+    return q_lower in CORE_EXACT or any(keyword in q_lower for keyword in CORE_KEYWORDS)
+
+
+def match_rules(question):
+    """Distinct intents whose rule matches, in rule order."""
+    return list(dict.fromkeys(
+        intent for intent, pattern in _COMPILED_RULES if pattern.search(question)
+    ))
+
+
+# ==========================================================
+# EMBEDDING CENTROIDS
+# ==========================================================
+
+INTENT_EXAMPLES = {
+    "transaction_query": [
+        "how much did I spend on food last month",
+        "show my recent transactions",
+        "what did I pay at amazon",
+        "list my purchases this week",
+    ],
+    "budget_analysis": [
+        "am I within my budget this month",
+        "which categories went over budget",
+        "analyse my budget",
+    ],
+    "financial_goal": [
+        "I want to save 5 lakh for a car in 2 years",
+        "how do I reach my savings goal",
+        "plan to buy a house in 5 years",
+    ],
+    "loan_planning": [
+        "can I afford a home loan of 50 lakh",
+        "what will my emi be for a car loan",
+        "should I prepay my loan",
+    ],
+    "insurance_planning": [
+        "how much life insurance do I need",
+        "is my health insurance cover enough",
+        "should I buy a term plan",
+    ],
+    "investment_planning": [
+        "where should I invest 10000 a month",
+        "is a sip in mutual funds good for me",
+        "how much will my investments grow",
+    ],
+    "retirement_planning": [
+        "how much do I need to retire at 55",
+        "am I saving enough for retirement",
+        "plan my retirement corpus",
+    ],
+    "tax_planning": [
+        "how can I save tax this year",
+        "which deductions can I claim",
+        "how much income tax will I pay",
+    ],
+    "risk_analysis": [
+        "how risky is my financial situation",
+        "what happens if I lose my job",
+        "am I exposed to too much debt",
+    ],
+    "cashflow_analysis": [
+        "is my cash flow positive",
+        "how much money comes in and goes out each month",
+        "will I run short of money this month",
+    ],
+    "financial_health": [
+        "how healthy are my finances",
+        "give me my financial health score",
+        "rate my overall financial situation",
+    ],
+    "advisory": [
+        "what should I do with my money",
+        "give me financial advice",
+        "how can I improve my finances",
+    ],
+    "general_finance": [
+        "what is compound interest",
+        "explain what a mutual fund is",
+        "what is an emergency fund",
+    ],
+    "market_information": [
+        "how is the stock market doing today",
+        "what is the nifty at",
+        "current gold price",
+    ],
+    "daily_limit_management": [
+        "set my daily limit to 500",
+        "have I crossed my daily pocket limit",
+        "how much can I still spend today",
+    ],
+    "income_update": [
+        "my salary is 80000",
+        "I got a raise, my income is now 1 lakh",
+        "update my monthly salary",
+    ],
+    "transaction_entry": [
+        "I spent 250 on lunch",
+        "add an expense of 1200 for groceries",
+        "paid 500 for the electricity bill",
+    ],
+    "behavioral_analysis": [
+        "do I overspend on weekends",
+        "what are my spending habits",
+        "am I an impulsive spender",
+    ],
+    "spending_pattern": [
+        "where does most of my money go",
+        "show my spending trend over months",
+        "which category do I spend the most on",
+    ],
+    "budget_recommendation": [
+        "suggest a budget for me",
+        "how should I split my salary",
+        "recommend a monthly budget plan",
+    ],
+    "financial_strategy": [
+        "what is the best strategy to become debt free",
+        "long term plan for wealth building",
+        "how should I prioritise saving versus paying debt",
+    ],
+    "comparison_analysis": [
+        "compare my spending this month with last month",
+        "did I spend more on food than on shopping",
+        "how does this year compare to last year",
+    ],
+    "unrelated": [
+        "tell me a joke",
+        "what is the weather today",
+        "who won the cricket match",
+    ],
+}
+
+_centroids = None  # (intents, matrix of unit centroids)
+_centroid_lock = threading.Lock()
+
+
+def _embedding_model():
+    """The retriever's model if loaded (or forced), else None."""
+    retriever = sys.modules.get("rag.retriever")
+
+    if retriever is not None and retriever.model is not None:
+        return retriever
+
+    if LOCAL_INTENT_FORCE_EMBEDDINGS:
+        from rag import retriever
+        if retriever.load_model():
+            return retriever
+
+    return None
+
+
+def _get_centroids(retriever):
+    global _centroids
+
+    with _centroid_lock:
+        if _centroids is None:
+            import numpy as np
+
+            intents = list(INTENT_EXAMPLES)
+            rows = []
+
+            for intent in intents:
+                vectors = retriever.model.encode(INTENT_EXAMPLES[intent]).astype("float32")
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                centroid = vectors.mean(axis=0)
+                rows.append(centroid / np.linalg.norm(centroid))
+
+            _centroids = (intents, np.vstack(rows))
+
+        return _centroids
+
+
+def match_embedding(question):
+    """(intent, score, margin) for the nearest centroid, or None."""
+    retriever = _embedding_model()
+    if retriever is None:
+        return None
+
+    intents, matrix = _get_centroids(retriever)
+
+    # embed_query returns a cached, L2-normalized (1, dim) vector
+    scores = matrix @ retriever.embed_query(question)[0]
+
+    order = scores.argsort()[::-1]
+    best, runner_up = float(scores[order[0]]), float(scores[order[1]])
+
+    return intents[order[0]], best, best - runner_up
+
+
+# ==========================================================
+# CLASSIFY + STATS
+# ==========================================================
+
+_stats = {
+    "questions": 0,
+    "override": 0,
+    "pending": 0,
+    "rules": 0,
+    "embedding": 0,
+    "escalated": 0,
+    "local_seconds": 0.0,
+    "llm_calls": 0,
+    "llm_seconds": 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def _record(source, seconds):
+    with _stats_lock:
+        _stats["questions"] += 1
+        _stats[source] += 1
+        _stats["local_seconds"] += seconds
+
+
+def classify_local(question, pending_intent=None):
+    """
+    {"intent", "confidence", "source", "score"} when a local tier
+    is confident enough, else None (caller escalates to the LLM).
+    `pending_intent` is the intent still waiting for parameters.
+    """
+    start = time.perf_counter()
+    result = None
+
+    if LOCAL_INTENT_MODE != "off":
+        if core_override(question):
+            result = {"intent": "transaction_query", "confidence": "high",
+                      "source": "override", "score": 1.0}
+
+        else:
+            matched = match_rules(question)
+
+            if pending_intent and not matched and re.search(r"\d", question):
+                result = {"intent": pending_intent, "confidence": "high",
+                          "source": "pending", "score": 1.0}
+
+            elif len(matched) == 1:
+                result = {"intent": matched[0], "confidence": "high",
+                          "source": "rules", "score": 1.0}
+
+            elif (
+                LOCAL_INTENT_MODE == "rules+embedding"
+                and len(re.findall(r"[a-z]+", question.lower())) >= LOCAL_INTENT_MIN_WORDS
+            ):
+                try:
+                    nearest = match_embedding(question)
+                except Exception as e:
+                    print(f"⚠️ Embedding intent match failed: {e}")
+                    nearest = None
+
+                if nearest:
+                    intent, score, margin = nearest
+
+                    # With several rule hits, only accept one of them
+                    allowed = not matched or intent in matched
+
+                    if allowed and score >= LOCAL_INTENT_THRESHOLD and margin >= LOCAL_INTENT_MARGIN:
+                        result = {
+                            "intent": intent,
+                            "confidence": "high" if score >= LOCAL_INTENT_HIGH else "medium",
+                            "source": "embedding",
+                            "score": round(score, 4),
+                        }
+
+    _record(result["source"] if result else "escalated", time.perf_counter() - start)
+    return result
+
+
+def record_llm_call(seconds):
+    """Time of an escalated LLM classification (for latency-saved stats)."""
+    with _stats_lock:
+        _stats["llm_calls"] += 1
+        _stats["llm_seconds"] += seconds
+
+
+def local_intent_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+
+    local = stats["override"] + stats["pending"] + stats["rules"] + stats["embedding"]
+    avg_llm_ms = stats["llm_seconds"] / stats["llm_calls"] * 1000 if stats["llm_calls"] else None
+
+    stats["resolved_locally"] = local
+    stats["local_fraction"] = round(local / stats["questions"], 4) if stats["questions"] else 0.0
+    stats["avg_llm_ms"] = round(avg_llm_ms, 1) if avg_llm_ms is not None else None
+
+    # Each local answer avoided one LLM round trip
+    stats["latency_saved_ms"] = (
+        round(local * avg_llm_ms - stats["local_seconds"] * 1000, 1)
+        if avg_llm_ms is not None else None
+    )
+
+    return stats
+
+
+# ==========================================================
+# ENTRY POINT
+# ==========================================================
+
+if __name__ == "__main__":
+    # python -m rag.local_intent "question" ...   (or one per line on stdin)
+    questions = sys.argv[1:] or [line.strip() for line in sys.stdin if line.strip()]
+
+    for question in questions:
+        result = classify_local(question)
+        label = f"{result['intent']} ({result['source']}, {result['score']})" if result else "→ LLM"
+        print(f"{label:<48} {question}")
+
+    print(local_intent_stats())
@@ -4,9 +4,12 @@
 
 import json
 import os
+import threading
 from datetime import datetime
 from typing import Any, Dict
 
+from rag.history_log import append_entry, recent_entries
+
 
 HISTORY_FILE = "data/chat_history.json"
 STATE_FILE = "data/conversation_state.json"
@@ -14,6 +17,15 @@ USER_MEMORY_FILE = "data/user_memory.json"
 
 MAX_HISTORY = 200
 
+# "jsonl" -> append-only data/chat_history.jsonl with an in-memory
+#            tail (rag.history_log); migrates HISTORY_FILE once
+# "json"  -> HISTORY_FILE, rewritten on every save
+HISTORY_BACKEND = os.environ.get("HISTORY_BACKEND", "jsonl")
+
+# The json backend's save_chat is a read-modify-write; concurrent
+# /ask requests (async executor threads) must not interleave it
+_history_lock = threading.Lock()
+
 
 # ==========================================================
 # INTERNAL SAFE JSON HELPERS
@@ -46,7 +58,7 @@ def _safe_write_json(path: str, data: Any):
 def initialize_memory():
     os.makedirs("data", exist_ok=True)
 
-    if not os.path.exists(HISTORY_FILE):
+    if HISTORY_BACKEND == "json" and not os.path.exists(HISTORY_FILE):
         _safe_write_json(HISTORY_FILE, [])
 
     if not os.path.exists(STATE_FILE):
@@ -63,26 +75,42 @@ def initialize_memory():
 def save_chat(question: str, answer: str):
     initialize_memory()
 
-    history = _safe_read_json(HISTORY_FILE, [])
-
-    if not isinstance(history, list):
-        history = []
-
-    history.append({
+    entry = {
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "question": question,
         "answer": answer
-    })
+    }
 
-    if len(history) > MAX_HISTORY:
-        history = history[-MAX_HISTORY:]
+    if HISTORY_BACKEND == "jsonl":
+        try:
+            append_entry(entry, MAX_HISTORY)
+        except Exception as e:
+            print(f"⚠️ Failed to save chat: {e}")
+        return
 
-    _safe_write_json(HISTORY_FILE, history)
+    with _history_lock:
+        history = _safe_read_json(HISTORY_FILE, [])
+
+        if not isinstance(history, list):
+            history = []
+
+        history.append(entry)
+
+        if len(history) > MAX_HISTORY:
+            history = history[-MAX_HISTORY:]
+
+        _safe_write_json(HISTORY_FILE, history)
 
 
 def get_recent_history(limit: int = 8):
     initialize_memory()
 
+    if HISTORY_BACKEND == "jsonl":
+        try:
+            return recent_entries(limit, MAX_HISTORY)
+        except Exception:
+            return []
+
     history = _safe_read_json(HISTORY_FILE, [])
 
     if isinstance(history, list):
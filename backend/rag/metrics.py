@@ -0,0 +1,75 @@
+# ==========================================================
+# METRICS - IN-PROCESS LATENCY SERIES + COUNTERS
+# ==========================================================
+#
+# observe("ask_ttft_ms", 412.0)   -> latency sample
+# increment("ask_stream_errors")  -> counter
+# snapshot()                      -> served by GET /metrics
+#
+# Percentiles are over the last METRICS_WINDOW samples of each
+# series; count / mean cover the whole process lifetime.
+#
+
+import threading
+from collections import deque
+
+
+METRICS_WINDOW = 2048
+
+_series = {}
+_counters = {}
+_lock = threading.Lock()
+
+
+# ==========================================================
+# RECORD
+# ==========================================================
+
+def observe(name, value):
+    with _lock:
+        series = _series.get(name)
+
+        if series is None:
+            series = {"count": 0, "total": 0.0, "recent": deque(maxlen=METRICS_WINDOW)}
+            _series[name] = series
+
+        series["count"] += 1
+        series["total"] += value
+        series["recent"].append(value)
+
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+# ==========================================================
+# READ
+# ==========================================================
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def snapshot():
+    with _lock:
+        timers = {}
+
+        for name, series in _series.items():
+            ordered = sorted(series["recent"])
+            timers[name] = {
+                "count": series["count"],
+                "mean": round(series["total"] / series["count"], 2),
+                "p50": round(_percentile(ordered, 0.50), 2),
+                "p95": round(_percentile(ordered, 0.95), 2),
+                "p99": round(_percentile(ordered, 0.99), 2),
+                "max": round(ordered[-1], 2),
+            }
+
+        return {"timers": timers, "counters": dict(_counters)}
+
+
+def reset():
+    with _lock:
+        _series.clear()
+        _counters.clear()
@@ -10,12 +10,19 @@ from collections import defaultdict
 
 from rag.live_state_store import save_live_metrics
 from rag.memory_manager import load_user_memory
+from rag.csv_tail import new_cursor, read_appended_rows
+from rag.file_watcher import create_watcher
+from rag.date_utils import parse_date, today_ordinal, current_month_key
 
 
 CSV_FILE = "data/transactions.csv"
-CHECK_INTERVAL = 3  # seconds
+CHECK_INTERVAL = 3  # seconds (polling watcher fallback)
+IDLE_RECONCILE_SECONDS = 60  # reconcile at least this often without events
 LARGE_TX_THRESHOLD = 10000  # anomaly detection threshold
 
+# "tail" -> fold only appended rows, "full" -> re-read the whole CSV
+STREAM_MODE = os.environ.get("STREAM_MODE", "tail")
+
 
 # ==========================================================
 # SAFE CSV READ
@@ -34,57 +41,58 @@ def read_transactions():
 
 
 # ==========================================================
-# COMPUTE LIVE METRICS FROM CSV
+# RUNNING AGGREGATES
 # ==========================================================
 
-def compute_metrics(transactions):
-
-    monthly_income = 0.0
-    monthly_expense = 0.0
-    daily_expense = 0.0
-    category_totals = defaultdict(float)
-    anomaly_flags = []
-    budget_alerts = []
+def new_aggregates():
+    return {
+        "rows": 0,
+        "monthly_income": defaultdict(float),
+        "monthly_expense": defaultdict(float),
+        "category_totals": defaultdict(lambda: defaultdict(float)),
+        "daily_expense": defaultdict(float),
+        "anomaly_flags": [],
+    }
 
-    # IMPORTANT: Match transaction_parser format
-    today_str = datetime.now().strftime("%d-%m-%Y")
-    current_month = datetime.now().strftime("%Y-%m")
 
+def fold_transactions(aggregates, transactions):
+    """
+    Add rows into the running per-month / per-day aggregates.
+    Cost is O(len(transactions)).
+    """
     for row in transactions:
         try:
             amount = float(row.get("amount", 0))
             tx_type = row.get("type", "").lower()
             category = row.get("category", "General")
 
-            # Parse date safely
-            try:
-                date_obj = datetime.strptime(row["date"], "%d-%m-%Y")
-            except Exception:
+            # Parse date safely (both ledger layouts)
+            parsed = parse_date(row["date"])
+            if parsed is None:
                 continue
 
-            month_prefix = date_obj.strftime("%Y-%m")
+            ordinal, month = parsed
 
             # -------------------------------
             # Monthly metrics
             # -------------------------------
-            if month_prefix == current_month:
-                if tx_type == "income":
-                    monthly_income += amount
-                else:
-                    monthly_expense += amount
-                    category_totals[category] += amount
+            if tx_type == "income":
+                aggregates["monthly_income"][month] += amount
+            else:
+                aggregates["monthly_expense"][month] += amount
+                aggregates["category_totals"][month][category] += amount
 
             # -------------------------------
             # Daily metrics
             # -------------------------------
-            if row["date"] == today_str and tx_type == "expense":
-                daily_expense += amount
+            if tx_type == "expense":
+                aggregates["daily_expense"][ordinal] += amount
 
             # -------------------------------
             # Anomaly detection
             # -------------------------------
             if amount >= LARGE_TX_THRESHOLD:
-                anomaly_flags.append({
+                aggregates["anomaly_flags"].append({
                     "amount": amount,
                     "category": category,
                     "date": row["date"]
@@ -93,6 +101,25 @@ def compute_metrics(transactions):
         except Exception:
             continue
 
+    aggregates["rows"] += len(transactions)
+    return aggregates
+
+
+# ==========================================================
+# LIVE METRICS FROM AGGREGATES
+# ==========================================================
+
+def metrics_from_aggregates(aggregates):
+
+    today = today_ordinal()
+    current_month = current_month_key()
+
+    monthly_income = aggregates["monthly_income"].get(current_month, 0.0)
+    monthly_expense = aggregates["monthly_expense"].get(current_month, 0.0)
+    daily_expense = aggregates["daily_expense"].get(today, 0.0)
+    category_totals = aggregates["category_totals"].get(current_month, {})
+
+    budget_alerts = []
     net_savings = monthly_income - monthly_expense
 
     # ------------------------------------------------------
@@ -120,47 +147,110 @@ def compute_metrics(transactions):
         },
         "category_totals": dict(category_totals),
         "budget_alerts": budget_alerts,
-        "anomaly_flags": anomaly_flags,
+        "anomaly_flags": list(aggregates["anomaly_flags"]),
         "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
 
 
 # ==========================================================
-# STREAM LOOP (ROW COUNT BASED WATCHER - STABLE)
+# COMPUTE LIVE METRICS FROM CSV (FULL REBUILD)
 # ==========================================================
 
-def start_stream():
+def compute_metrics(transactions):
+    aggregates = fold_transactions(new_aggregates(), transactions)
+    return metrics_from_aggregates(aggregates)
 
-    print("📡 Pathway Stream Engine Started...")
 
-    last_row_count = 0
+# ==========================================================
+# TAIL FOLLOW (O(new rows) PER TICK)
+# ==========================================================
 
-    while True:
-        try:
-            if not os.path.exists(CSV_FILE):
-                time.sleep(CHECK_INTERVAL)
-                continue
+def new_tail_state():
+    return {
+        "cursor": new_cursor(),
+        "aggregates": new_aggregates(),
+    }
+
+
+def tail_update(tail_state):
+    """
+    Folds rows appended since the last call into the running
+    aggregates. Returns the number of new rows, or -1 when the
+    file was truncated/rewritten and aggregates were rebuilt.
+    """
+    rows, rebuilt = read_appended_rows(CSV_FILE, tail_state["cursor"])
+
+    if rebuilt:
+        tail_state["aggregates"] = new_aggregates()
+
+    fold_transactions(tail_state["aggregates"], rows)
+
+    return -1 if rebuilt else len(rows)
+
+
+# ==========================================================
+# STREAM LOOP
+# ==========================================================
+
+def _full_tick(last_row_count):
+    transactions = read_transactions()
+    current_row_count = len(transactions)
+
+    # Detect change by row count
+    if current_row_count != last_row_count:
+        save_live_metrics(compute_metrics(transactions))
+        print("🔄 Live metrics reconciled from CSV.")
+
+    return current_row_count
+
+
+def _tail_tick(tail_state, last_day):
+    changed = tail_update(tail_state)
+    today = today_ordinal()
 
-            transactions = read_transactions()
-            current_row_count = len(transactions)
+    # Republish on new rows, rebuilds, or when the day rolls over
+    if changed or today != last_day:
+        save_live_metrics(metrics_from_aggregates(tail_state["aggregates"]))
 
-            # Detect change by row count
-            if current_row_count != last_row_count:
+        if changed < 0:
+            print("🔄 Live metrics rebuilt from CSV.")
+        elif changed:
+            print(f"🔄 Live metrics updated with {changed} new rows.")
 
-                metrics = compute_metrics(transactions)
+    return today
 
-                # Overwrite live state
-                save_live_metrics(metrics)
 
-                last_row_count = current_row_count
+def start_stream(mode=STREAM_MODE):
 
-                print("🔄 Live metrics reconciled from CSV.")
+    watcher = create_watcher(CSV_FILE, CHECK_INTERVAL)
 
-            time.sleep(CHECK_INTERVAL)
+    print(
+        f"📡 Pathway Stream Engine Started "
+        f"({mode} mode, {watcher.backend} watcher)..."
+    )
 
-        except Exception as e:
-            print("⚠️ Stream Error:", e)
-            time.sleep(CHECK_INTERVAL)
+    last_row_count = 0
+    tail_state = new_tail_state()
+    last_day = None
+
+    try:
+        while True:
+            try:
+                if os.path.exists(CSV_FILE):
+                    if mode == "tail":
+                        last_day = _tail_tick(tail_state, last_day)
+                    else:
+                        last_row_count = _full_tick(last_row_count)
+
+                # Sleep until the CSV changes; the idle timeout still
+                # reconciles periodically (e.g. day rollover)
+                watcher.wait(IDLE_RECONCILE_SECONDS)
+
+            except Exception as e:
+                print("⚠️ Stream Error:", e)
+                time.sleep(CHECK_INTERVAL)
+    finally:
+        watcher.close()
 
 
 # ==========================================================
@@ -1,55 +1,32 @@
 # rag/profile_engine.py
 
-from rag.finance_engine import load_data
+from rag.ledger_store import get_ledger, values_of
+from rag.date_utils import month_key
 from datetime import datetime
 from collections import defaultdict
+import copy
+import threading
 
+CSV_FILE = "data/transactions.csv"
 
-# ==========================================
-# HELPER: MONTH FILTER
-# ==========================================
-def _filter_by_month(data, month_prefix):
-    filtered = []
-
-    for row in data:
-        try:
-            date_obj = datetime.strptime(row["date"], "%Y-%m-%d")
-        except:
-            try:
-                date_obj = datetime.strptime(row["date"], "%d-%m-%Y")
-            except:
-                continue
-
-        formatted = date_obj.strftime("%Y-%m")
+FIXED_CATEGORIES = {"housing", "loan", "bills"}
+INVESTMENT_CATEGORIES = {"investment", "sip", "mutual fund"}
+DEBT_CATEGORIES = {"loan", "emi"}
 
-        if formatted == month_prefix:
-            filtered.append(row)
-
-    return filtered
+# (ledger version, month) -> profile; reset when the ledger changes
+_profile_cache = {}
+_profile_cache_version = None
+_cache_lock = threading.Lock()
 
 
 # ==========================================
-# BUILD COMPLETE FINANCIAL PROFILE
+# FUSED MONTH AGGREGATION (SINGLE PASS)
 # ==========================================
-def build_financial_profile(month_prefix=None):
-    """
-    Builds a complete financial profile that can be used for:
-    - Loan planning
-    - Insurance advisory
-    - Investment analysis
-    - Goal planning
-    - Risk evaluation
-    """
-
-    data = load_data()
-
-    if not data:
-        return {"error": "No transaction data available."}
-
-    if not month_prefix:
-        month_prefix = datetime.now().strftime("%Y-%m")
+def _aggregate_month(ledger, month_prefix):
+    target = month_key(month_prefix)
 
-    data = _filter_by_month(data, month_prefix)
+    type_names = [v.lower() for v in values_of(ledger, "type")]
+    category_names = [v.lower() for v in values_of(ledger, "category")]
 
     income = 0
     expense = 0
@@ -59,33 +36,52 @@ def build_financial_profile(month_prefix=None):
     investment = 0
     debt_payment = 0
 
-    for row in data:
-        try:
-            amount = float(row["amount"])
-            category = row["category"].lower()
-            txn_type = row["type"].lower()
+    # Dates are pre-parsed into month keys by the ledger,
+    # so the month filter is an integer comparison
+    for month, type_code, category_code, amount in zip(
+        ledger["month"], ledger["type"], ledger["category"], ledger["amount"]
+    ):
+        if month != target:
+            continue
 
-            if txn_type == "income":
-                income += amount
+        txn_type = type_names[type_code]
 
-            elif txn_type == "expense":
-                expense += amount
-                category_expense[category] += amount
+        if txn_type == "income":
+            income += amount
 
-                # Fixed expense detection
-                if category in ["housing", "loan", "bills"]:
-                    fixed_expense += amount
+        elif txn_type == "expense":
+            category = category_names[category_code]
 
-                # Investment detection
-                if category in ["investment", "sip", "mutual fund"]:
-                    investment += amount
+            expense += amount
+            category_expense[category] += amount
 
-                # Debt detection
-                if category in ["loan", "emi"]:
-                    debt_payment += amount
+            # Fixed expense detection
+            if category in FIXED_CATEGORIES:
+                fixed_expense += amount
 
-        except:
-            continue
+            # Investment detection
+            if category in INVESTMENT_CATEGORIES:
+                investment += amount
+
+            # Debt detection
+            if category in DEBT_CATEGORIES:
+                debt_payment += amount
+
+    return income, expense, category_expense, fixed_expense, investment, debt_payment
+
+
+# ==========================================
+# PROFILE METRICS
+# ==========================================
+def _compute_profile(ledger, month_prefix):
+    (
+        income,
+        expense,
+        category_expense,
+        fixed_expense,
+        investment,
+        debt_payment,
+    ) = _aggregate_month(ledger, month_prefix)
 
     surplus = income - expense
     savings_rate = round((surplus / income) * 100, 2) if income > 0 else 0
@@ -110,3 +106,45 @@ def build_financial_profile(month_prefix=None):
     }
 
     return profile
+
+
+# ==========================================
+# BUILD COMPLETE FINANCIAL PROFILE
+# ==========================================
+def build_financial_profile(month_prefix=None):
+    """
+    Builds a complete financial profile that can be used for:
+    - Loan planning
+    - Insurance advisory
+    - Investment analysis
+    - Goal planning
+    - Risk evaluation
+
+    Profiles are cached per month until the ledger changes;
+    callers get their own copy.
+    """
+    global _profile_cache_version
+
+    ledger = get_ledger(CSV_FILE)
+
+    if not ledger["rows"]:
+        return {"error": "No transaction data available."}
+
+    if not month_prefix:
+        month_prefix = datetime.now().strftime("%Y-%m")
+
+    with _cache_lock:
+        if _profile_cache_version != ledger["version"]:
+            _profile_cache.clear()
+            _profile_cache_version = ledger["version"]
+
+        profile = _profile_cache.get(month_prefix)
+
+    if profile is None:
+        profile = _compute_profile(ledger, month_prefix)
+
+        with _cache_lock:
+            if _profile_cache_version == ledger["version"]:
+                _profile_cache[month_prefix] = profile
+
+    return copy.deepcopy(profile)
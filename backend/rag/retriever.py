@@ -1,9 +1,37 @@
-from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
 import os
 import pickle
 import csv
+import time
+import json
+import base64
+import atexit
+import threading
+
+from rag.index_factory import (
+    INDEX_TYPE,
+    create_index,
+    create_empty_index,
+    apply_search_params,
+    describe_index,
+    auto_nlist,
+    training_size,
+    needs_training,
+    filtered_search_params,
+    PQ_NBITS,
+)
+from rag.cache_utils import LRUCache, normalize_text
+from rag.date_utils import to_ordinal, month_bounds
+from rag.bm25_index import BM25Index, document_tokens, reciprocal_rank_fusion
+from rag.document_store import (
+    DOC_STORE_PREFIX,
+    NO_DATA,
+    DocumentStore,
+    store_exists,
+    remove_store,
+    replace_store,
+)
 
 
 # ======================================================
@@ -11,16 +39,58 @@ import csv
 # ======================================================
 EMBEDDING_DIM = 384
 INDEX_FILE = "vector.index"
-DOC_FILE = "documents.pkl"
+DOC_FILE = "documents.pkl"  # legacy pickle store, migrated on first load
 CSV_FILE = "data/transactions.csv"
 
+REBUILD_BATCH_SIZE = int(os.environ.get("REBUILD_BATCH_SIZE", 256))  # texts per encode call
+REBUILD_CHUNK_ROWS = 4096  # CSV rows held in memory at once
+REBUILD_PROGRESS_EVERY = 10000  # rows between progress reports
+
+# "write_behind" -> append to WAL_FILE, checkpoint the index periodically
+# "sync"         -> rewrite the index on every add
+# (documents go straight to the append-only document store either way)
+PERSISTENCE_MODE = os.environ.get("RETRIEVER_PERSISTENCE", "write_behind")
+WAL_FILE = "documents.wal"
+CHECKPOINT_EVERY_DOCS = 500
+CHECKPOINT_INTERVAL_SECONDS = 60
+
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 1024))  # query -> embedding
+QUERY_CACHE_TTL = 3600  # seconds
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 512))  # (query, k, filters, version) -> hits
+
+# "hybrid" -> dense FAISS hits fused with BM25 hits (RRF)
+# "dense"  -> FAISS only
+SEARCH_MODE = os.environ.get("RETRIEVER_SEARCH_MODE", "hybrid")
+SEARCH_MODES = ("dense", "hybrid")
+HYBRID_CANDIDATES = 50  # hits taken from each ranker before fusion
+
+# Keys accepted by search_documents(filters=...)
+#   month                  "2026-02"
+#   date_from / date_to    inclusive, either ledger date layout
+#   category / account / type / merchant
+#                          one value or a list, case-insensitive
+#   min_amount / max_amount  inclusive
+TEXT_FILTERS = ("category", "account", "type", "merchant")
+FILTER_KEYS = TEXT_FILTERS + ("month", "date_from", "date_to", "min_amount", "max_amount")
+
 
 # ======================================================
 # GLOBAL LAZY OBJECTS
 # ======================================================
 model = None
 index = None
-documents = []
+documents = None  # DocumentStore once load_index() has run
+_bm25 = None  # BM25Index over `documents`, built on first hybrid search
+
+_state_lock = threading.RLock()
+_pending_writes = 0
+_last_checkpoint = time.monotonic()
+
+# Bumped whenever index contents change; keys the result cache
+index_version = 0
+
+_embedding_cache = LRUCache(QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+_result_cache = LRUCache(RESULT_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
 
 
 # ======================================================
@@ -30,6 +100,8 @@ def load_model():
     global model
     if model is None:
         try:
+            # Deferred: pulls in torch, which dominates import time
+            from sentence_transformers import SentenceTransformer
             model = SentenceTransformer("all-MiniLM-L6-v2")
         except Exception as e:
             print(f"⚠️ Failed to load embedding model: {e}")
@@ -38,44 +110,306 @@ def load_model():
 
 
 def load_index():
-    global index, documents
+    global index, documents, _bm25
 
     if index is not None:
         return
 
+    with _state_lock:
+        if index is not None:
+            return
+
+        # Never delete the live store over a load error: the files
+        # are left as they are for repair or a rebuild
+        try:
+            store = _open_store()
+        except Exception as e:
+            raise RuntimeError(f"Failed to open document store '{DOC_STORE_PREFIX}': {e}") from e
+
+        try:
+            if os.path.exists(INDEX_FILE) and len(store):
+                loaded_index = apply_search_params(faiss.read_index(INDEX_FILE))
+            else:
+                loaded_index = create_empty_index(EMBEDDING_DIM)
+        except Exception as e:
+            print(f"⚠️ Failed to load index: {e}; re-embedding the stored documents.")
+            loaded_index = _index_from_store(store)
+
+        # Recover appends made after the last checkpoint: vectors
+        # from the WAL, re-embedded when an entry is missing
+        entries = _replay_wal(store)
+
+        if len(store) > loaded_index.ntotal:
+            try:
+                added = _index_rows(loaded_index, store, len(store), entries)
+                print(f"♻️ Indexed {added} documents appended after the last checkpoint.")
+            except Exception as e:
+                # Kept in the store; indexed by the next catch-up
+                print(
+                    f"⚠️ {len(store) - loaded_index.ntotal} documents are not "
+                    f"searchable yet: {e}"
+                )
+        elif len(store) < loaded_index.ntotal:
+            print(
+                f"⚠️ Index has {loaded_index.ntotal - len(store)} vectors "
+                f"without documents; they are skipped until the next rebuild."
+            )
+
+        documents = store
+        index = loaded_index
+        _bm25 = None
+        _bump_index_version()
+
+        # Fold recovered entries (and any torn tail) into a fresh
+        # checkpoint so new appends start from a clean log
+        if os.path.exists(WAL_FILE) and os.path.getsize(WAL_FILE) > 0:
+            checkpoint()
+
+
+def _index_from_store(store):
+    """Flat index over the stored documents' texts (the fallback
+    when INDEX_FILE is unreadable)."""
+    new_index = create_empty_index(EMBEDDING_DIM)
+    _index_rows(new_index, store, len(store), {})
+    return new_index
+
+
+def _index_rows(target_index, store, stop, entries=None):
+    """
+    Add the vectors of store rows [target_index.ntotal, stop):
+    taken from WAL entries logged for that row and text, and
+    re-embedded from the stored text otherwise. Returns the
+    number of vectors added.
+    """
+    start = target_index.ntotal
+    if stop <= start:
+        return 0
+
+    if entries is None:
+        entries = _read_wal()
+
+    for chunk_start in range(start, stop, REBUILD_CHUNK_ROWS):
+        rows = range(chunk_start, min(chunk_start + REBUILD_CHUNK_ROWS, stop))
+        vectors = np.empty((len(rows), EMBEDDING_DIM), "float32")
+        missing = []
+
+        for i, row in enumerate(rows):
+            entry = entries.get(row)
+            if entry is not None and entry["text"] == store.text(row):
+                vectors[i] = np.frombuffer(base64.b64decode(entry["vector"]), dtype="float32")
+            else:
+                missing.append(i)
+
+        if missing:
+            if not load_model():
+                raise RuntimeError("embedding model unavailable, cannot embed documents")
+            vectors[missing] = _encode_batch(
+                [store.text(rows[i]) for i in missing],
+                REBUILD_BATCH_SIZE
+            )
+
+        target_index.add(vectors)
+
+    return stop - start
+
+
+def _catch_up(stop=None):
+    """
+    Index the rows other processes appended to `documents` (up to
+    `stop`), in FAISS and in BM25, so vector id i stays row i.
+    Caller holds _state_lock.
+    """
+    start = index.ntotal
+    added = _index_rows(index, documents, len(documents) if stop is None else stop)
+
+    if not added:
+        return
+
+    if _bm25 is not None:
+        for row in range(len(_bm25), start + added):
+            _bm25.add(row, document_tokens(documents.text(row), documents.data(row)))
+
+    _bump_index_version()
+    print(f"🔄 Indexed {added} documents appended by another process.")
+
+
+def _refresh_documents():
+    """Pick up documents other processes appended, with their vectors."""
+    with _state_lock:
+        documents.refresh()
+
+        try:
+            _catch_up()
+        except Exception as e:
+            # They stay unsearchable until the next catch-up
+            print(f"⚠️ Failed to index appended documents: {e}")
+
+
+def _open_store():
+    """Open the mapped store, migrating documents.pkl the first time."""
+    if store_exists(DOC_STORE_PREFIX) or not os.path.exists(DOC_FILE):
+        return DocumentStore(DOC_STORE_PREFIX)
+
+    with open(DOC_FILE, "rb") as f:
+        legacy_documents = pickle.load(f)
+
+    remove_store(DOC_STORE_PREFIX + ".migrate")
+    store = DocumentStore(DOC_STORE_PREFIX + ".migrate")
+    store.extend(legacy_documents)
+    store.close()
+
+    replace_store(DOC_STORE_PREFIX + ".migrate", DOC_STORE_PREFIX)
+    print(f"📦 Migrated {len(legacy_documents)} documents from {DOC_FILE}.")
+
+    return DocumentStore(DOC_STORE_PREFIX)
+
+
+# ======================================================
+# WRITE-AHEAD LOG
+# ======================================================
+def _append_wal(seq, text, structured_data, vector):
+    entry = {
+        "seq": seq,
+        "text": text,
+        "data": structured_data,
+        "vector": base64.b64encode(vector.tobytes()).decode("ascii")
+    }
+
+    with open(WAL_FILE, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_wal():
+    """
+    WAL entries by seq (the document's row in the store). A torn
+    final line (crash mid-write) ends the log.
+    """
+    entries = {}
+
+    if not os.path.exists(WAL_FILE):
+        return entries
+
     try:
-        if os.path.exists(INDEX_FILE) and os.path.exists(DOC_FILE):
-            index = faiss.read_index(INDEX_FILE)
-            with open(DOC_FILE, "rb") as f:
-                documents = pickle.load(f)
-        else:
-            index = faiss.IndexFlatL2(EMBEDDING_DIM)
-            documents = []
+        with open(WAL_FILE, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+                entries[entry["seq"]] = entry
+
     except Exception as e:
-        print(f"⚠️ Failed to load index: {e}")
-        index = faiss.IndexFlatL2(EMBEDDING_DIM)
-        documents = []
+        print(f"⚠️ Failed to read {WAL_FILE}: {e}")
+
+    return entries
+
+
+def _replay_wal(target_documents):
+    """
+    Re-appends documents logged to the WAL but never stored (logs
+    written before the document, by older versions). Returns the
+    WAL entries; their vectors are added by _index_rows().
+    """
+    entries = _read_wal()
+
+    # Entries are logged after their row is stored, so rows other
+    # processes logged since the store was opened are mapped first
+    target_documents.refresh()
+
+    while len(target_documents) in entries:
+        entry = entries[len(target_documents)]
+        target_documents.append({
+            "text": entry["text"],
+            "data": entry["data"]
+        })
+
+    return entries
+
+
+def checkpoint():
+    """Write the index to disk and truncate the WAL."""
+    global _pending_writes, _last_checkpoint
+
+    with _state_lock:
+        if index is None:
+            return
+
+        if not save_state():
+            return
+
+        try:
+            with open(WAL_FILE, "w"):
+                pass
+        except Exception as e:
+            print(f"⚠️ Failed truncating {WAL_FILE}: {e}")
+
+        _pending_writes = 0
+        _last_checkpoint = time.monotonic()
+
+
+def _checkpoint_due():
+    return (
+        _pending_writes >= CHECKPOINT_EVERY_DOCS
+        or time.monotonic() - _last_checkpoint >= CHECKPOINT_INTERVAL_SECONDS
+    )
+
+
+def _checkpoint_on_exit():
+    if _pending_writes:
+        checkpoint()
+
+
+atexit.register(_checkpoint_on_exit)
+
+
+def preload():
+    """
+    Load the model and index, run one encode so the first real
+    query doesn't pay for lazy initialization, and build the BM25
+    index if hybrid search is on. Returns False if the model is
+    unavailable.
+    """
+    if not load_model():
+        return False
+
+    load_index()
+    model.encode(["warm up"])
+
+    if SEARCH_MODE == "hybrid":
+        _get_bm25()
+
+    return True
 
 
 # ======================================================
 # SAVE STATE
 # ======================================================
 def save_state():
-    global index, documents
     try:
-        if index:
-            faiss.write_index(index, INDEX_FILE)
-            with open(DOC_FILE, "wb") as f:
-                pickle.dump(documents, f)
+        with _state_lock:
+            if index is None:
+                return False
+
+            # Write to a temp file, then rename, so a crash mid-write
+            # never leaves a half-written index behind. Documents are
+            # already durable in the append-only store.
+            faiss.write_index(index, INDEX_FILE + ".tmp")
+            os.replace(INDEX_FILE + ".tmp", INDEX_FILE)
+            return True
+
     except Exception as e:
         print(f"⚠️ Failed saving state: {e}")
+        return False
 
 
 # ======================================================
 # ADD DOCUMENT
 # ======================================================
 def add_document(text, structured_data=None):
-    global index, documents
+    global _pending_writes
 
     load_model()
     load_index()
@@ -86,14 +420,35 @@ def add_document(text, structured_data=None):
     try:
         vector = model.encode([text]).astype("float32")
         faiss.normalize_L2(vector)
-        index.add(vector)
 
-        documents.append({
-            "text": text,
-            "data": structured_data
-        })
+        with _state_lock:
+            # The store decides the row (other processes append to
+            # it too); vectors for the rows before ours come first
+            documents.append({
+                "text": text,
+                "data": structured_data
+            })
+            row = len(documents) - 1
+            _catch_up(stop=row)
+
+            if PERSISTENCE_MODE == "write_behind":
+                _append_wal(row, text, structured_data, vector)
+
+            index.add(vector)
 
-        save_state()
+            if _bm25 is not None:
+                _bm25.add(row, document_tokens(text, structured_data))
+
+            _bump_index_version()
+
+            if PERSISTENCE_MODE != "write_behind":
+                save_state()
+                return
+
+            _pending_writes += 1
+
+            if _checkpoint_due():
+                checkpoint()
 
     except Exception as e:
         print(f"⚠️ Failed to add document: {e}")
@@ -102,27 +457,238 @@ def add_document(text, structured_data=None):
 # ======================================================
 # SEMANTIC SEARCH
 # ======================================================
-def query_index(query, k=5):
+def _bump_index_version():
+    global index_version
+    index_version += 1
+
+
+def embed_query(query):
+    """Normalized query embedding, served from the LRU cache when possible."""
+    key = normalize_text(query)
+
+    vector = _embedding_cache.get(key)
+    if vector is None:
+        vector = model.encode([key]).astype("float32")
+        faiss.normalize_L2(vector)
+        _embedding_cache.put(key, vector)
+
+    return vector
+
+
+def query_cache_stats():
+    return {
+        "embeddings": _embedding_cache.stats(),
+        "results": _result_cache.stats(),
+        "index_version": index_version
+    }
+
+
+def _text_codes(field, wanted):
+    """Vocab codes of `field` whose value matches `wanted` case-insensitively."""
+    if isinstance(wanted, str):
+        wanted = [wanted]
+
+    wanted = {str(value).strip().lower() for value in wanted}
+
+    return [
+        code
+        for code, value in enumerate(documents.vocab[field])
+        if value.lower() in wanted
+    ]
+
+
+def _filter_mask(filters):
+    """
+    Boolean mask over document rows for `filters`, computed on
+    the mapped structured rows. Rows without structured data
+    never match a filter.
+    """
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown search filters: {sorted(unknown)}")
+
+    rows = documents.rows
+    mask = rows["has_data"] != NO_DATA
+
+    for field in TEXT_FILTERS:
+        if filters.get(field):
+            mask &= np.isin(rows[field], _text_codes(field, filters[field]))
+
+    first, last = None, None
+
+    if filters.get("month"):
+        bounds = month_bounds(filters["month"])
+        if bounds is None:
+            raise ValueError(f"Invalid month filter: {filters['month']}")
+        first, last = bounds
+
+    if filters.get("date_from"):
+        start = to_ordinal(filters["date_from"])
+        if start is None:
+            raise ValueError(f"Invalid date_from filter: {filters['date_from']}")
+        first = start if first is None else max(first, start)
+
+    if filters.get("date_to"):
+        end = to_ordinal(filters["date_to"])
+        if end is None:
+            raise ValueError(f"Invalid date_to filter: {filters['date_to']}")
+        last = end if last is None else min(last, end)
+
+    # Unparseable dates are stored as ordinal 0
+    if first is not None:
+        mask &= rows["ordinal"] >= first
+    if last is not None:
+        mask &= (rows["ordinal"] <= last) & (rows["ordinal"] > 0)
+
+    if filters.get("min_amount") is not None:
+        mask &= rows["amount"] >= float(filters["min_amount"])
+    if filters.get("max_amount") is not None:
+        mask &= rows["amount"] <= float(filters["max_amount"])
+
+    return mask
+
+
+def _filter_cache_key(filters):
+    return tuple(sorted(
+        (
+            key,
+            tuple(sorted(str(v).lower() for v in value))
+            if isinstance(value, (list, tuple, set)) else value
+        )
+        for key, value in filters.items()
+        if value is not None
+    ))
+
+
+def _vector_mask(filters):
+    """Filter mask indexed by vector id (vector v holds row ids[v])."""
+    return _filter_mask(filters)[documents.ids[:index.ntotal]]
+
+
+def _dense_hits(query, k, filters):
+    """
+    FAISS search, prefiltered by an id selector when filters are
+    given. Returns [(vector id, cosine similarity)].
+    """
+    vector = embed_query(query)
+
+    if not filters:
+        distances, indices = index.search(vector, k)
+    else:
+        allowed = _vector_mask(filters)
+
+        if not allowed.any():
+            return []
+
+        # The bitmap must stay referenced until the search returns
+        bitmap = np.packbits(allowed, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(allowed), faiss.swig_ptr(bitmap))
+
+        distances, indices = index.search(
+            vector,
+            min(k, int(allowed.sum())),
+            params=filtered_search_params(index, selector)
+        )
+
+    # ANN indexes pad with -1 when fewer than k hits are found;
+    # squared L2 between unit vectors is 2 - 2 * cosine
+    return [
+        (int(i), round(1.0 - float(d) / 2.0, 4))
+        for d, i in zip(distances[0], indices[0])
+        if 0 <= i < len(documents)
+    ]
+
+
+def _get_bm25():
+    global _bm25
+
+    with _state_lock:
+        if _bm25 is None:
+            start = time.perf_counter()
+            _bm25 = BM25Index.from_store(documents)
+            print(
+                f"🔤 BM25 index built over {len(_bm25):,} documents "
+                f"in {time.perf_counter() - start:.2f}s."
+            )
+        return _bm25
+
+
+def _hybrid_hits(query, k, filters):
+    """
+    Dense and BM25 candidates (same filters) fused with reciprocal
+    rank fusion. Returns [(vector id, fused score)].
+    """
+    candidates = max(k, HYBRID_CANDIDATES)
+
+    dense_ids = [i for i, _ in _dense_hits(query, candidates, filters)]
+
+    allowed = _vector_mask(filters) if filters else None
+    keyword_ids, _ = _get_bm25().search(query, candidates, allowed)
+
+    fused = reciprocal_rank_fusion([dense_ids, keyword_ids])
+    return [
+        (vector_id, round(score, 6))
+        for vector_id, score in fused[:k]
+        if vector_id < len(documents)
+    ]
+
+
+def search_documents(query, k=5, filters=None, mode=None):
+    """
+    Top-k documents for `query` as {"text", "score", "data"}
+    dicts, restricted to rows matching `filters` (see FILTER_KEYS).
+    Filtering happens inside the search, so k matching documents
+    come back even when most rows are excluded.
+
+    `score` is the cosine similarity in "dense" mode and the
+    RRF score in "hybrid" mode (default: SEARCH_MODE).
+    """
 
     load_model()
     load_index()
 
-    if not model or not documents:
+    if not model or documents is None:
         return []
 
-    try:
-        query_vector = model.encode([query]).astype("float32")
-        faiss.normalize_L2(query_vector)
+    # Appends from other processes (e.g. the indexer CLI)
+    _refresh_documents()
+    store = documents
 
-        distances, indices = index.search(
-            query_vector,
-            min(k, len(documents))
+    if not len(store):
+        return []
+
+    mode = mode or SEARCH_MODE
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    try:
+        filters = {
+            key: value
+            for key, value in (filters or {}).items()
+            if value not in (None, "", [])
+        }
+        k = min(k, len(documents))
+        result_key = (
+            normalize_text(query), k, _filter_cache_key(filters), mode, index_version
         )
 
+        hits = _result_cache.get(result_key)
+
+        if hits is None:
+            if mode == "hybrid":
+                hits = _hybrid_hits(query, k, filters)
+            else:
+                hits = _dense_hits(query, k, filters)
+            _result_cache.put(result_key, hits)
+
         results = []
-        for i in indices[0]:
-            if i < len(documents):
-                results.append(documents[i]["text"])
+        for vector_id, score in hits:
+            row = store.row_for_vector(vector_id)
+            results.append({
+                "text": store.text(row),
+                "score": score,
+                "data": store.data(row)
+            })
 
         return results
 
@@ -131,32 +697,64 @@ def query_index(query, k=5):
         return []
 
 
+def query_index(query, k=5, filters=None, mode=None):
+    """Texts of the top-k documents (see search_documents)."""
+    return [hit["text"] for hit in search_documents(query, k, filters, mode)]
+
+
+def field_values(field):
+    """Distinct non-empty values of a structured text field."""
+    load_index()
+
+    if field not in TEXT_FILTERS or documents is None:
+        return []
+
+    _refresh_documents()
+    rows = documents.rows
+    vocab = documents.vocab[field]
+
+    used = np.unique(rows[field][rows["has_data"] != NO_DATA])
+    return [vocab[code] for code in used if vocab[code]]
+
+
 # ======================================================
 # STRUCTURED ACCESS
 # ======================================================
 def get_all_structured():
     load_index()
+    _refresh_documents()
     return [
-        doc["data"]
-        for doc in documents
-        if doc.get("data")
+        data
+        for data in map(documents.data, range(len(documents)))
+        if data
     ]
 
 
 # ======================================================
 # STRUCTURED SUMMARY
 # ======================================================
+def _sequential_sum(values):
+    # cumsum adds left to right, matching the old Python loop exactly
+    return float(np.cumsum(values)[-1]) if len(values) else 0
+
+
 def structured_summary():
-    data = get_all_structured()
+    load_index()
 
-    total_income = 0
-    total_expense = 0
+    # Straight off the mapped rows, no per-document decoding
+    _refresh_documents()
+    rows = documents.rows
+    has_data = rows["has_data"] != NO_DATA
 
-    for row in data:
-        if row["type"].lower() == "income":
-            total_income += float(row["amount"])
-        else:
-            total_expense += float(row["amount"])
+    income_codes = [
+        code
+        for code, value in enumerate(documents.vocab["type"])
+        if value.lower() == "income"
+    ]
+    is_income = np.isin(rows["type"], income_codes)
+
+    total_income = _sequential_sum(rows["amount"][has_data & is_income])
+    total_expense = _sequential_sum(rows["amount"][has_data & ~is_income])
 
     return {
         "income": total_income,
@@ -166,55 +764,199 @@ def structured_summary():
 
 
 # ======================================================
-# REBUILD INDEX FROM CSV
+# REBUILD INDEX FROM CSV (BATCHED)
 # ======================================================
-def rebuild_index_from_csv(csv_path=CSV_FILE):
+def _row_to_document(row):
+    structured = {
+        "date": row["date"],
+        "type": row["type"],
+        "merchant": row["merchant"],
+        "category": row["category"],
+        "amount": float(row["amount"]),
+        "account": row["account"],
+        "payment_method": row["payment_method"],
+        "notes": row.get("notes", "")
+    }
+
+    text = (
+        f"On {structured['date']}, you made a {structured['type']} of ₹{structured['amount']} "
+        f"at {structured['merchant']} for {structured['category']} "
+        f"using {structured['payment_method']} from {structured['account']}."
+    )
+
+    return {
+        "text": text,
+        "data": structured
+    }
+
+
+def _iter_csv_chunks(csv_path, chunk_rows):
+    """Stream the CSV in lists of at most `chunk_rows` rows."""
+    with open(csv_path, "r") as f:
+        chunk = []
+
+        for row in csv.DictReader(f):
+            chunk.append(row)
+
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+
+def _count_csv_rows(csv_path):
+    with open(csv_path, "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def _train_and_fill(new_index, pending, kind):
+    """
+    Trains an IVF index on the buffered vectors and adds them.
+    Falls back to a flat index when there are too few vectors
+    to train on.
+    """
+    sample = np.vstack(pending)
+
+    min_points = faiss.extract_index_ivf(new_index).nlist
+    if kind == "ivf_pq":
+        min_points = max(min_points, 2 ** PQ_NBITS)
+
+    if len(sample) < min_points:
+        print(
+            f"⚠️ Only {len(sample)} vectors, too few to train {kind}; "
+            f"using a flat index."
+        )
+        new_index = create_index(EMBEDDING_DIM, "flat")
+    else:
+        print(f"   🧠 Training {kind} on {len(sample):,} vectors...")
+        new_index.train(sample)
+
+    new_index.add(sample)
+    return new_index
+
+
+def _encode_batch(texts, batch_size):
+    vectors = model.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    ).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def rebuild_index_from_csv(
+    csv_path=CSV_FILE,
+    batch_size=REBUILD_BATCH_SIZE,
+    chunk_rows=REBUILD_CHUNK_ROWS,
+    index_type=None,
+):
+    """
+    Re-embeds the whole ledger. Rows are streamed from the CSV
+    `chunk_rows` at a time, encoded `batch_size` at a time and
+    added to the index in bulk, so the working set stays bounded
+    by the chunk size. Documents go to a side store
+    (DOC_STORE_PREFIX + ".rebuild"); it and the new index are only
+    swapped in once the rebuild has finished.
+
+    IVF index types buffer the first vectors (bounded by
+    IVF_TRAIN_MAX) to train on before streaming the rest in.
+    """
 
     load_model()
 
-    global index, documents
+    global index, documents, _bm25
 
     if not model:
         print("❌ Embedding model not loaded.")
-        return
+        return None
+
+    kind = index_type or INDEX_TYPE
+    rebuild_prefix = DOC_STORE_PREFIX + ".rebuild"
+    pending = []
+    pending_rows = 0
 
-    index = faiss.IndexFlatL2(EMBEDDING_DIM)
-    documents = []
+    processed = 0
+    next_report = REBUILD_PROGRESS_EVERY
+    start = time.perf_counter()
 
     try:
-        with open(csv_path, "r") as f:
-            reader = csv.DictReader(f)
-
-            for row in reader:
-
-                structured = {
-                    "date": row["date"],
-                    "type": row["type"],
-                    "merchant": row["merchant"],
-                    "category": row["category"],
-                    "amount": float(row["amount"]),
-                    "account": row["account"],
-                    "payment_method": row["payment_method"],
-                    "notes": row.get("notes", "")
-                }
-
-                text = (
-                    f"On {structured['date']}, you made a {structured['type']} of ₹{structured['amount']} "
-                    f"at {structured['merchant']} for {structured['category']} "
-                    f"using {structured['payment_method']} from {structured['account']}."
+        remove_store(rebuild_prefix)
+        new_documents = DocumentStore(rebuild_prefix)
+
+        n_rows = _count_csv_rows(csv_path) if needs_training(kind) else 0
+        new_index = create_index(EMBEDDING_DIM, kind, n_rows)
+        train_rows = training_size(kind, auto_nlist(n_rows))
+
+        for chunk in _iter_csv_chunks(csv_path, chunk_rows):
+            chunk_documents = [_row_to_document(row) for row in chunk]
+
+            vectors = _encode_batch(
+                [doc["text"] for doc in chunk_documents],
+                batch_size
+            )
+            new_documents.extend(chunk_documents)
+
+            if new_index.is_trained:
+                new_index.add(vectors)
+            else:
+                pending.append(vectors)
+                pending_rows += len(vectors)
+
+                if pending_rows >= train_rows:
+                    new_index = _train_and_fill(new_index, pending, kind)
+                    pending = []
+
+            processed += len(chunk_documents)
+
+            if processed >= next_report:
+                elapsed = time.perf_counter() - start
+                print(
+                    f"   ⏳ {processed:,} rows indexed "
+                    f"({processed / elapsed:,.0f} rows/s)"
                 )
+                next_report += REBUILD_PROGRESS_EVERY
 
-                vector = model.encode([text]).astype("float32")
-                faiss.normalize_L2(vector)
-                index.add(vector)
+        if pending:
+            new_index = _train_and_fill(new_index, pending, kind)
 
-                documents.append({
-                    "text": text,
-                    "data": structured
-                })
-
-        save_state()
-        print("✅ Index rebuilt successfully.")
+        new_documents.close()
 
     except Exception as e:
         print(f"❌ Error rebuilding index: {e}")
+        remove_store(rebuild_prefix)
+        return None
+
+    with _state_lock:
+        replace_store(rebuild_prefix, DOC_STORE_PREFIX)
+
+        old_documents = documents
+        index = new_index
+        documents = DocumentStore(DOC_STORE_PREFIX)
+        _bm25 = None
+
+        # In-flight searches keep the mappings they already hold
+        if old_documents is not None:
+            old_documents.close()
+        _bump_index_version()
+
+        # WAL entries refer to the old document list
+        checkpoint()
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+
+    print(
+        f"✅ Index rebuilt successfully: {processed:,} rows "
+        f"in {elapsed:.1f}s ({rate:,.0f} rows/s, {describe_index(new_index)})."
+    )
+
+    return {
+        "index_type": describe_index(new_index),
+        "rows": processed,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rate, 1)
+    }
@@ -0,0 +1,373 @@
+# ==========================================================
+# ROLLUP CUBE - PER-MONTH RUNNING TOTALS OF THE LEDGER
+# ==========================================================
+#
+# A materialized rollup of the ledger: for every month, the
+# running totals the month-scoped finance_engine queries return
+# (monthly income / expense / summary, category totals for a
+# month, category x month), plus the all-time category totals.
+# Queries read one total instead of scanning the ledger, so they
+# no longer depend on how much history it holds.
+#
+# Every total is accumulated row by row in CSV order, the same
+# additions the scan path makes, so results are identical to it
+# (float sums depend on their order; totals of sub-cells added
+# together afterwards would not be).
+#
+# The cube follows the ledger: when get_ledger() has picked up
+# rows appended to the CSV, the next query folds just those rows
+# in. If the ledger was rebuilt from scratch (CSV rewritten) the
+# cube is rebuilt too; rebuild_rollup() forces it.
+#
+# Enabled by default, LEDGER_ROLLUP=0 to scan instead (see
+# finance_engine).
+#
+# Usage (from backend/):
+#   python -m rag.rollup_cube --verify   # parity vs. the scan path
+#   python -m rag.rollup_cube --bench    # per-query timings
+#
+
+import argparse
+import threading
+import time
+
+from rag.date_utils import month_key, month_prefix_of
+from rag.ledger_store import get_ledger, values_of
+
+
+CSV_FILE = "data/transactions.csv"
+
+# Month slot of the all-time category totals (month keys are ints)
+ALL_MONTHS = "all"
+
+_cubes = {}
+_lock = threading.Lock()
+
+
+# ==========================================================
+# BUILD / UPDATE
+# ==========================================================
+
+def _new_cube(ledger):
+    return {
+        "generation": ledger.get("_generation"),
+        "ledger": None,
+        "rows": 0,  # ledger rows folded into "totals" / "categories"
+        # (month, stream[, category]) -> running total, where stream
+        # is "income", "expense", "not_income" or "category" (expense
+        # by lowercased category)
+        "totals": {},
+        # month (or ALL_MONTHS) -> {category code: expense total},
+        # in first-appearance order like group_sum
+        "categories": {},
+        "type_lower": [],  # type code -> lowercased value
+        "category_lower": [],  # category code -> lowercased value
+        "view": None,  # (totals, categories) including the overlay rows
+    }
+
+
+def _lowered(cube, ledger, column):
+    lowered = cube[column + "_lower"]
+    values = values_of(ledger, column)
+    lowered.extend(value.lower() for value in values[len(lowered):])
+    return lowered
+
+
+def _add(totals, key, amount):
+    # Same start value (int 0) as masked_sum
+    totals[key] = totals.get(key, 0) + amount
+
+
+def _fold(cube, ledger, totals, categories, start, end):
+    months = ledger["month"]
+    types = ledger["type"]
+    category_codes = ledger["category"]
+    amounts = ledger["amount"]
+
+    type_lower = _lowered(cube, ledger, "type")
+    category_lower = _lowered(cube, ledger, "category")
+
+    for i in range(start, end):
+        month = months[i]
+        amount = amounts[i]
+        tx_type = type_lower[types[i]]
+
+        # Anything that is not income counts as expense in monthly_summary
+        if tx_type == "income":
+            _add(totals, (month, "income"), amount)
+        else:
+            _add(totals, (month, "not_income"), amount)
+
+        if tx_type != "expense":
+            continue
+
+        code = category_codes[i]
+        _add(totals, (month, "expense"), amount)
+        _add(totals, (month, "category", category_lower[code]), amount)
+
+        # Same start value (0.0) as group_sum
+        for slot in (month, ALL_MONTHS):
+            group = categories.get(slot)
+            if group is None:
+                group = categories[slot] = {}
+            group[code] = group.get(code, 0.0) + amount
+
+
+def _sync(csv_path):
+    """Bring the cube up to date with the current ledger (caller
+    holds _lock). Returns (ledger, totals, categories)."""
+    ledger = get_ledger(csv_path)
+    cube = _cubes.get(csv_path)
+
+    # Codes are only stable within one ledger generation
+    if cube is None or cube["generation"] != ledger.get("_generation"):
+        cube = _cubes[csv_path] = _new_cube(ledger)
+
+    if cube["ledger"] is not ledger:
+        # Rows up to the CSV cursor never change once read; a last
+        # line without its newline can, so it is only folded into a
+        # copy ("view") that the next sync throws away
+        stable = ledger.get("_cursor_rows", ledger["rows"])
+
+        if stable < cube["rows"]:
+            cube = _cubes[csv_path] = _new_cube(ledger)
+
+        _fold(cube, ledger, cube["totals"], cube["categories"], cube["rows"], stable)
+        cube["rows"] = stable
+
+        if ledger["rows"] > stable:
+            totals = dict(cube["totals"])
+            categories = {slot: dict(group) for slot, group in cube["categories"].items()}
+            _fold(cube, ledger, totals, categories, stable, ledger["rows"])
+            cube["view"] = (totals, categories)
+        else:
+            cube["view"] = (cube["totals"], cube["categories"])
+
+        cube["ledger"] = ledger
+
+    return (ledger, *cube["view"])
+
+
+def rebuild_rollup(csv_path=CSV_FILE):
+    """Drop the cube and rebuild it from the ledger."""
+    with _lock:
+        _cubes.pop(csv_path, None)
+        _sync(csv_path)
+
+    return rollup_stats(csv_path)
+
+
+def rollup_stats(csv_path=CSV_FILE):
+    with _lock:
+        cube = _cubes.get(csv_path)
+        if cube is None:
+            return {"rows": 0, "months": 0, "totals": 0}
+
+        return {
+            "rows": cube["rows"],
+            "months": len({key[0] for key in cube["totals"]}),
+            "totals": len(cube["totals"]) + sum(len(group) for group in cube["categories"].values()),
+        }
+
+
+# ==========================================================
+# READ TOTALS
+# ==========================================================
+
+def _total(month_prefix, *stream, csv_path=CSV_FILE):
+    with _lock:
+        _, totals, _ = _sync(csv_path)
+
+    return totals.get((month_key(month_prefix), *stream), 0)
+
+
+# ==========================================================
+# QUERIES (same names and results as finance_engine)
+# ==========================================================
+
+def monthly_income(month_prefix):
+    return _total(month_prefix, "income")
+
+
+def monthly_expense(month_prefix):
+    return _total(month_prefix, "expense")
+
+
+def monthly_summary(month_prefix):
+    with _lock:
+        _, totals, _ = _sync(CSV_FILE)
+
+    month = month_key(month_prefix)
+    income = totals.get((month, "income"), 0)
+    expense = totals.get((month, "not_income"), 0)
+
+    return {
+        "income": income,
+        "expense": expense,
+        "net": income - expense
+    }
+
+
+def category_expense_totals(month_prefix=None):
+    slot = month_key(month_prefix) if month_prefix else ALL_MONTHS
+
+    with _lock:
+        ledger, _, categories = _sync(CSV_FILE)
+        group = categories.get(slot, {})
+
+    vocab = values_of(ledger, "category")
+    return {vocab[code]: total for code, total in group.items()}
+
+
+def category_month_spending(category, month_prefix):
+    return _total(month_prefix, "category", category.lower())
+
+
+QUERIES = {
+    "monthly_income",
+    "monthly_expense",
+    "monthly_summary",
+    "category_expense_totals",
+    "category_month_spending",
+}
+
+
+# ==========================================================
+# PARITY / BENCHMARK
+# ==========================================================
+
+def _same(a, b):
+    # Exact: totals are accumulated in the scan's order, and dicts
+    # must also keep its first-appearance order
+    if isinstance(a, dict) and isinstance(b, dict):
+        return list(a.items()) == list(b.items())
+
+    return a == b
+
+
+def verify_cases(csv_path=CSV_FILE):
+    """(function name, args) pairs over the busiest categories and
+    the latest months, plus the finance_engine functions built on
+    top of the cube."""
+    ledger = get_ledger(csv_path)
+
+    counts = {}
+    for code in ledger["category"]:
+        counts[code] = counts.get(code, 0) + 1
+    busiest = sorted(counts, key=counts.get, reverse=True)[:3]
+    categories = [values_of(ledger, "category")[code] for code in busiest] + ["no-such-category"]
+
+    months = [
+        month_prefix_of(key)
+        for key in sorted({m for m in ledger["month"] if m >= 0})[-3:]
+    ] + ["1900-01", "bad"]
+
+    cases = [("category_expense_totals", ())]
+
+    for month in months:
+        cases += [
+            ("monthly_income", (month,)),
+            ("monthly_expense", (month,)),
+            ("monthly_summary", (month,)),
+            ("category_expense_totals", (month,)),
+            ("savings_rate_monthly", (month,)),
+            ("check_budget_status", (month,)),
+            ("financial_health_score", (month,)),
+        ]
+        cases += [("category_month_spending", (c, month)) for c in categories]
+        cases += [("category_month_spending", (c.upper(), month)) for c in categories[:1]]
+
+    for current, previous in zip(months[1:3], months[:2]):
+        cases += [("detect_category_spike", (c, current, previous)) for c in categories]
+
+    return cases
+
+
+def _run_both(name, args):
+    """(scan result, rollup result, scan seconds, rollup seconds)."""
+    from rag import finance_engine
+
+    enabled = finance_engine.LEDGER_ROLLUP
+    results = []
+
+    try:
+        for rollup in (False, True):
+            finance_engine.LEDGER_ROLLUP = rollup
+            start = time.perf_counter()
+            results.append(getattr(finance_engine, name)(*args))
+            results.append(time.perf_counter() - start)
+    finally:
+        finance_engine.LEDGER_ROLLUP = enabled
+
+    return results[0], results[2], results[1], results[3]
+
+
+def verify(csv_path=CSV_FILE):
+    """Compare every case with the LEDGER_ROLLUP=0 scan path.
+    Returns the list of mismatches."""
+    mismatches = []
+
+    for name, args in verify_cases(csv_path):
+        expected, actual, _, _ = _run_both(name, args)
+        if not _same(expected, actual):
+            mismatches.append((name, args, expected, actual))
+
+    return mismatches
+
+
+def bench(csv_path=CSV_FILE, repeat=5):
+    rebuild_start = time.perf_counter()
+    stats = rebuild_rollup(csv_path)
+    rebuild_ms = (time.perf_counter() - rebuild_start) * 1000
+
+    print(
+        f"📦 {stats['rows']} rows -> {stats['months']} months, "
+        f"{stats['totals']} totals (rebuilt in {rebuild_ms:.1f} ms)"
+    )
+
+    timings = {}
+    for _ in range(repeat):
+        for name, args in verify_cases(csv_path):
+            _, _, scan, rollup = _run_both(name, args)
+            total = timings.setdefault(name, [0.0, 0.0, 0])
+            total[0] += scan
+            total[1] += rollup
+            total[2] += 1
+
+    for name, (scan, rollup, calls) in timings.items():
+        print(
+            f"⏱️ {name:<26} scan {scan / calls * 1000:8.3f} ms   "
+            f"rollup {rollup / calls * 1000:8.3f} ms"
+        )
+
+
+# ==========================================================
+# ENTRY POINT
+# ==========================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monthly rollup cube rebuild / parity check")
+    parser.add_argument("--verify", action="store_true",
+                        help="compare every month query with the scan path")
+    parser.add_argument("--bench", action="store_true",
+                        help="time each month query, scan vs. rollup")
+    args = parser.parse_args()
+
+    if not args.bench:
+        stats = rebuild_rollup()
+        print(f"📦 Rollup rebuilt: {stats['rows']} rows, {stats['months']} months, {stats['totals']} totals")
+
+    if args.bench:
+        bench()
+
+    if args.verify:
+        mismatches = verify()
+
+        for name, call_args, expected, actual in mismatches[:20]:
+            print(f"❌ {name}{call_args}: {expected!r} != {actual!r}")
+
+        if mismatches:
+            print(f"\n❌ {len(mismatches)} mismatches")
+            raise SystemExit(1)
+
+        print(f"✅ {len(verify_cases())} queries match the scan path")
@@ -0,0 +1,688 @@
+# ==========================================================
+# SQLITE LEDGER - INDEXED SQL BACKEND FOR finance_engine
+# ==========================================================
+#
+# Mirrors data/transactions.csv into a SQLite database (WAL
+# mode) so finance_engine queries become indexed aggregates
+# instead of scans over every row:
+#   date              -> single days, month ranges
+#   (category, date)  -> category totals, category x month
+#   (account, date)   -> balances, account breakdowns
+#   (type, date)      -> income / expense totals per month
+#
+# Months are stored as day-ordinal ranges (date_utils), so a
+# month filter is a range scan on the date part of an index.
+#
+# The database follows the CSV: sync() imports rows appended
+# since the last sync (csv_tail cursor kept in the meta table)
+# and re-imports everything when the CSV was rewritten. A last
+# line still missing its newline counts for queries (as in the
+# columnar ledger) but stays past the cursor: its rows are
+# marked by the "tail_id" meta key and replaced on every sync.
+#
+# Enabled with LEDGER_BACKEND=sqlite (see finance_engine).
+#
+# Usage (from backend/):
+#   python -m rag.sqlite_ledger --import   # one-shot full import
+#   python -m rag.sqlite_ledger --verify   # parity vs. the CSV path
+#
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from rag.csv_tail import new_cursor, parse_rows, read_appended_rows, read_unterminated
+from rag.date_utils import parse_date, to_ordinal, month_bounds
+from rag.ledger_store import CSV_FIELDS, UNPARSED
+
+
+CSV_FILE = "data/transactions.csv"
+SQLITE_LEDGER_FILE = os.environ.get("SQLITE_LEDGER_FILE", "data/ledger.db")
+
+IMPORT_BATCH_ROWS = 10000
+
+# Text columns compare case-insensitively (like codes_matching);
+# group-bys use BINARY so "Food" and "food" stay separate groups
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id             INTEGER PRIMARY KEY,
+    date_str       TEXT NOT NULL,
+    date           INTEGER NOT NULL,
+    month          INTEGER NOT NULL,
+    type           TEXT NOT NULL COLLATE NOCASE,
+    merchant       TEXT NOT NULL COLLATE NOCASE,
+    category       TEXT NOT NULL COLLATE NOCASE,
+    amount         REAL NOT NULL,
+    amount_str     TEXT NOT NULL,
+    account        TEXT NOT NULL COLLATE NOCASE,
+    payment_method TEXT NOT NULL COLLATE NOCASE,
+    notes          TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Trailing (type, category, amount) columns make the aggregates index-only
+# (covering) instead of one table lookup per matching row
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_tx_date ON transactions (date, type, amount);
+CREATE INDEX IF NOT EXISTS idx_tx_category_date ON transactions (category, date, type, amount);
+CREATE INDEX IF NOT EXISTS idx_tx_account_date ON transactions (account, date, type, amount);
+CREATE INDEX IF NOT EXISTS idx_tx_type_date ON transactions (type, date, category, amount);
+"""
+INDEX_NAMES = ("idx_tx_date", "idx_tx_category_date", "idx_tx_account_date", "idx_tx_type_date")
+
+
+def _create_indexes(conn):
+    # One statement at a time: executescript() would COMMIT an open transaction
+    for statement in INDEXES.strip().splitlines():
+        conn.execute(statement)
+
+INSERT_SQL = (
+    "INSERT INTO transactions (date_str, date, month, type, merchant, category, "
+    "amount, amount_str, account, payment_method, notes) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_local = threading.local()
+_sync_lock = threading.Lock()
+_synced_versions = {}  # db path -> CSV (mtime_ns, size) at the last sync
+
+
+# ==========================================================
+# CONNECTION
+# ==========================================================
+
+def _connect(db_path):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+    if "amount_str" not in columns:
+        # Database from before amount_str: start over, the next
+        # sync() re-imports the CSV
+        conn.executescript("DROP TABLE transactions; DELETE FROM meta;")
+        conn.executescript(SCHEMA)
+
+    _create_indexes(conn)
+    return conn
+
+
+def get_connection(db_path=None):
+    """Per-thread connection (sqlite3 connections aren't shared)."""
+    db_path = db_path or SQLITE_LEDGER_FILE
+    connections = getattr(_local, "connections", None)
+
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = connections[db_path] = _connect(db_path)
+
+    return conn
+
+
+# ==========================================================
+# IMPORT / SYNC
+# ==========================================================
+
+def _encode_cursor(cursor):
+    return json.dumps({
+        "file_id": cursor["file_id"],
+        "offset": cursor["offset"],
+        "fieldnames": cursor["fieldnames"],
+        "header": cursor["header"].hex(),
+        "fingerprint": cursor["fingerprint"].hex(),
+    })
+
+
+def _decode_cursor(text):
+    try:
+        data = json.loads(text)
+        return {
+            "file_id": tuple(data["file_id"]) if data["file_id"] else None,
+            "offset": data["offset"],
+            "fieldnames": data["fieldnames"],
+            "header": bytes.fromhex(data["header"]),
+            "fingerprint": bytes.fromhex(data["fingerprint"]),
+        }
+    except (TypeError, ValueError, KeyError):
+        return new_cursor()
+
+
+def _row_values(row):
+    """CSV dict row -> INSERT parameters, or None (same rows as ledger_store)."""
+    try:
+        amount = float(row["amount"])
+    except Exception:
+        return None
+
+    date_str = row.get("date") or ""
+    ordinal, month = parse_date(date_str) or UNPARSED
+
+    return (
+        date_str,
+        ordinal,
+        month,
+        row.get("type") or "",
+        row.get("merchant") or "",
+        row.get("category") or "",
+        amount,
+        row["amount"],
+        row.get("account") or "",
+        row.get("payment_method") or "",
+        row.get("notes") or "",
+    )
+
+
+def _insert_rows(conn, rows):
+    inserted = 0
+    batch = []
+
+    for row in rows:
+        values = _row_values(row)
+        if values is None:
+            continue
+
+        batch.append(values)
+        if len(batch) >= IMPORT_BATCH_ROWS:
+            conn.executemany(INSERT_SQL, batch)
+            inserted += len(batch)
+            batch = []
+
+    if batch:
+        conn.executemany(INSERT_SQL, batch)
+        inserted += len(batch)
+
+    return inserted
+
+
+def _csv_version(csv_path):
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def sync(csv_path=CSV_FILE, db_path=None):
+    """
+    Bring the database up to date with the CSV. Returns the number
+    of rows imported, or -1 after a full re-import.
+    """
+    db_path = db_path or SQLITE_LEDGER_FILE
+    version = _csv_version(csv_path)
+
+    if version is not None and _synced_versions.get(db_path) == version:
+        return 0
+
+    with _sync_lock:
+        if version is not None and _synced_versions.get(db_path) == version:
+            return 0
+
+        conn = get_connection(db_path)
+
+        # IMMEDIATE: one writer at a time, across processes too
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stored = conn.execute(
+                "SELECT value FROM meta WHERE key = 'csv_cursor'"
+            ).fetchone()
+            cursor = _decode_cursor(stored[0]) if stored else new_cursor()
+
+            # Drop the unterminated tail of the last sync, it is
+            # re-read from the cursor below
+            tail = conn.execute("SELECT value FROM meta WHERE key = 'tail_id'").fetchone()
+            if tail:
+                conn.execute("DELETE FROM transactions WHERE id >= ?", (int(tail[0]),))
+
+            rows, rebuilt = read_appended_rows(csv_path, cursor)
+
+            if rebuilt:
+                # Bulk load without indexes, then build them once
+                conn.execute("DELETE FROM transactions")
+                for name in INDEX_NAMES:
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+            inserted = _insert_rows(conn, rows)
+
+            if rebuilt:
+                _create_indexes(conn)
+
+            partial = read_unterminated(csv_path, cursor) if cursor["fieldnames"] else ""
+            tail_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM transactions").fetchone()[0]
+
+            if partial.strip():
+                _insert_rows(conn, parse_rows(partial, cursor))
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("csv_cursor", _encode_cursor(cursor)), ("tail_id", str(tail_id))]
+            )
+            conn.execute("COMMIT")
+
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        _synced_versions[db_path] = version
+
+    if rebuilt and stored:
+        print(f"🔄 SQLite ledger re-imported from {csv_path} ({inserted:,} rows).")
+
+    return -1 if rebuilt else inserted
+
+
+def import_csv(csv_path=CSV_FILE, db_path=None):
+    """One-shot full import (drops whatever the database held)."""
+    db_path = db_path or SQLITE_LEDGER_FILE
+    conn = get_connection(db_path)
+
+    with _sync_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM meta WHERE key = 'csv_cursor'")
+        conn.execute("COMMIT")
+        _synced_versions.pop(db_path, None)
+
+    start = time.perf_counter()
+    sync(csv_path, db_path)
+
+    conn.execute("ANALYZE")
+    rows = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    print(f"✅ Imported {rows:,} rows into {db_path} in {time.perf_counter() - start:.2f}s.")
+    return rows
+
+
+def _query(sql, params=()):
+    sync()
+    return get_connection().execute(sql, params).fetchall()
+
+
+def _scalar(sql, params=()):
+    value = _query(sql, params)[0][0]
+    return value if value is not None else 0
+
+
+# ==========================================================
+# FILTER HELPERS
+# ==========================================================
+
+def _month_range(month_prefix):
+    """SQL + params for the days of a month (no rows if malformed)."""
+    bounds = month_bounds(month_prefix) if month_prefix else None
+    if bounds is None:
+        return "0", ()
+    return "date BETWEEN ? AND ?", bounds
+
+
+def _day(date_str):
+    ordinal = to_ordinal(date_str)
+    if ordinal is None:
+        return "date_str = ?", (date_str,)
+    return "date = ?", (ordinal,)
+
+
+def _like(fragment):
+    escaped = fragment.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _group(by, where, params=()):
+    """{value: total} in first-appearance order, like group_sum."""
+    rows = _query(
+        f"SELECT {by} COLLATE BINARY, SUM(amount) FROM transactions "
+        f"WHERE {where} GROUP BY {by} COLLATE BINARY ORDER BY MIN(id)",
+        params,
+    )
+    return {value: total for value, total in rows}
+
+
+def _row_dict(row):
+    """Transaction row -> CSV-style dict (same as ledger_store.row_at)."""
+    row = dict(zip(("date", "type", "merchant", "category", "amount",
+                    "account", "payment_method", "notes"), row))
+
+    return {field: row[field] for field in CSV_FIELDS}
+
+
+_ROW_COLUMNS = "date_str, type, merchant, category, amount_str, account, payment_method, notes"
+
+
+# ==========================================================
+# FINANCE QUERIES (same names + results as finance_engine)
+# ==========================================================
+
+def total_income():
+    return _scalar("SELECT SUM(amount) FROM transactions WHERE type = 'income'")
+
+
+def total_expense():
+    return _scalar("SELECT SUM(amount) FROM transactions WHERE type = 'expense'")
+
+
+def category_spending(category):
+    return _scalar(
+        "SELECT SUM(amount) FROM transactions WHERE type = 'expense' AND category = ?",
+        (category,)
+    )
+
+
+def account_wise_spending(account=None):
+    summary = _group("account", "type = 'expense'")
+
+    if account:
+        return summary.get(account, 0)
+
+    if not summary:
+        return "No account data available."
+
+    most_used = max(summary, key=summary.get)
+    return f"Most Used Account: {most_used} (₹{summary[most_used]:,.2f})"
+
+
+def account_balance(account):
+    return _scalar(
+        "SELECT SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END) "
+        "FROM transactions WHERE account = ?",
+        (account,)
+    )
+
+
+def monthly_income(month_prefix):
+    month_sql, params = _month_range(month_prefix)
+    return _scalar(
+        f"SELECT SUM(amount) FROM transactions WHERE type = 'income' AND {month_sql}",
+        params
+    )
+
+
+def monthly_expense(month_prefix):
+    month_sql, params = _month_range(month_prefix)
+    return _scalar(
+        f"SELECT SUM(amount) FROM transactions WHERE type = 'expense' AND {month_sql}",
+        params
+    )
+
+
+def monthly_summary(month_prefix):
+    month_sql, params = _month_range(month_prefix)
+
+    # Anything that is not income counts as expense here
+    income, expense = _query(
+        "SELECT SUM(CASE WHEN type = 'income' THEN amount END), "
+        "SUM(CASE WHEN type <> 'income' THEN amount END) "
+        f"FROM transactions WHERE {month_sql}",
+        params
+    )[0]
+
+    income = income or 0
+    expense = expense or 0
+
+    return {
+        "income": income,
+        "expense": expense,
+        "net": income - expense
+    }
+
+
+def highest_category():
+    category_totals = _group("category", "type = 'expense'")
+
+    if not category_totals:
+        return None
+
+    highest = max(category_totals, key=category_totals.get)
+    return f"{highest} (₹{category_totals[highest]:,.2f})"
+
+
+def biggest_transaction():
+    rows = _query(
+        f"SELECT {_ROW_COLUMNS} FROM transactions WHERE amount > 0 "
+        "ORDER BY amount DESC, id LIMIT 1"
+    )
+
+    if not rows:
+        return None
+
+    max_tx = _row_dict(rows[0])
+
+    return (
+        f"Biggest Transaction: ₹{float(max_tx['amount']):,.2f} "
+        f"at {max_tx['merchant']} "
+        f"({max_tx['category']})"
+    )
+
+
+def payment_method_spending(method):
+    return _scalar(
+        "SELECT SUM(amount) FROM transactions WHERE type = 'expense' AND payment_method = ?",
+        (method,)
+    )
+
+
+def income_by_source(source):
+    return _scalar(
+        "SELECT SUM(amount) FROM transactions "
+        "WHERE type = 'income' AND merchant LIKE ? ESCAPE '\\'",
+        (_like(source),)
+    )
+
+
+def merchant_spending(merchant):
+    return _scalar(
+        "SELECT SUM(amount) FROM transactions "
+        "WHERE type = 'expense' AND merchant LIKE ? ESCAPE '\\'",
+        (_like(merchant),)
+    )
+
+
+def daily_spending_summary():
+    return _group("date_str", "type = 'expense'")
+
+
+def account_category_breakdown(account):
+    return _group("category", "type = 'expense' AND account = ?", (account,))
+
+
+def transaction_count(category=None, date=None):
+    where = ["type = 'expense'"]
+    params = []
+
+    if category:
+        where.append("category = ?")
+        params.append(category)
+
+    if date:
+        day_sql, day_params = _day(date)
+        where.append(day_sql)
+        params.extend(day_params)
+
+    return _scalar(f"SELECT COUNT(*) FROM transactions WHERE {' AND '.join(where)}", params)
+
+
+def date_based_spending(date_str):
+    day_sql, params = _day(date_str)
+    return _scalar(
+        f"SELECT SUM(amount) FROM transactions WHERE type = 'expense' AND {day_sql}",
+        params
+    )
+
+
+def category_expense_totals(month_prefix=None):
+    if month_prefix:
+        month_sql, params = _month_range(month_prefix)
+        return _group("category", f"type = 'expense' AND {month_sql}", params)
+
+    return _group("category", "type = 'expense'")
+
+
+def category_month_spending(category, month_prefix):
+    month_sql, params = _month_range(month_prefix)
+    return _scalar(
+        f"SELECT SUM(amount) FROM transactions "
+        f"WHERE type = 'expense' AND category = ? AND {month_sql}",
+        (category, *params)
+    )
+
+
+def detect_large_transactions(threshold=5000):
+    rows = _query(
+        f"SELECT {_ROW_COLUMNS} FROM transactions WHERE amount > ? "
+        "ORDER BY amount DESC, id",
+        (threshold,)
+    )
+    return [_row_dict(row) for row in rows]
+
+
+# ==========================================================
+# PARITY CHECK
+# ==========================================================
+
+def _same(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+
+    return a == b
+
+
+def verify_cases():
+    """(function name, args) pairs covering every backed query."""
+    sync()
+
+    def distinct(column, limit=5):
+        return [row[0] for row in _query(
+            f"SELECT {column} COLLATE BINARY FROM transactions "
+            f"GROUP BY {column} COLLATE BINARY ORDER BY COUNT(*) DESC LIMIT {limit}"
+        )]
+
+    categories = distinct("category") + ["no-such-category"]
+    accounts = distinct("account") + ["no-such-account"]
+    methods = distinct("payment_method")
+    merchants = [m[:4] for m in distinct("merchant")]
+    dates = distinct("date_str", 3) + ["01-01-1900"]
+
+    months = [
+        f"{key // 12:04d}-{key % 12 + 1:02d}"
+        for key in sorted({row[0] for row in _query(
+            "SELECT DISTINCT month FROM transactions WHERE month >= 0"
+        )})[-3:]
+    ] + ["1900-01", "bad"]
+
+    cases = [
+        ("total_income", ()),
+        ("total_expense", ()),
+        ("account_wise_spending", ()),
+        ("highest_category", ()),
+        ("biggest_transaction", ()),
+        ("daily_spending_summary", ()),
+        ("detect_large_transactions", (5000,)),
+        ("category_expense_totals", ()),
+        ("transaction_count", ()),
+    ]
+    cases += [("category_spending", (c,)) for c in categories]
+    cases += [("category_spending", (c.upper(),)) for c in categories[:1]]
+    cases += [("account_wise_spending", (a,)) for a in accounts]
+    cases += [("account_balance", (a,)) for a in accounts]
+    cases += [("account_category_breakdown", (a,)) for a in accounts]
+    cases += [("payment_method_spending", (m,)) for m in methods]
+    cases += [("merchant_spending", (m,)) for m in merchants]
+    cases += [("income_by_source", (m,)) for m in merchants]
+    cases += [("date_based_spending", (d,)) for d in dates]
+    cases += [("transaction_count", (categories[0], d)) for d in dates]
+
+    for month in months:
+        cases += [
+            ("monthly_income", (month,)),
+            ("monthly_expense", (month,)),
+            ("monthly_summary", (month,)),
+            ("category_expense_totals", (month,)),
+        ]
+        cases += [("category_month_spending", (c, month)) for c in categories[:3]]
+
+    return cases
+
+
+def verify(timings=True):
+    """Compare every case against finance_engine's columnar path.
+    Returns the list of mismatches; raises RuntimeError if there
+    are no transactions (every query would trivially match)."""
+    from rag import finance_engine
+    from rag.ledger_store import get_ledger
+
+    rows = _scalar("SELECT COUNT(*) FROM transactions")
+    if not rows:
+        raise RuntimeError(f"no transactions to compare (is {CSV_FILE} missing or empty?)")
+
+    mismatches = []
+    csv_rows = get_ledger(finance_engine.CSV_FILE)["rows"]
+    if csv_rows != rows:
+        mismatches.append(("rows", (), csv_rows, rows))
+
+    csv_seconds = sql_seconds = 0.0
+
+    for name, args in verify_cases():
+        start = time.perf_counter()
+        expected = getattr(finance_engine, name).columnar(*args)
+        csv_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = globals()[name](*args)
+        sql_seconds += time.perf_counter() - start
+
+        if not _same(expected, actual):
+            mismatches.append((name, args, expected, actual))
+
+    if timings:
+        print(f"⏱️ columnar {csv_seconds * 1000:.1f} ms, sqlite {sql_seconds * 1000:.1f} ms")
+
+    return mismatches
+
+
+# ==========================================================
+# ENTRY POINT
+# ==========================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite ledger import / parity check")
+    parser.add_argument("--import", dest="do_import", action="store_true",
+                        help="full import of the CSV")
+    parser.add_argument("--verify", action="store_true",
+                        help="compare every query with the CSV (columnar) path")
+    args = parser.parse_args()
+
+    if args.do_import or not args.verify:
+        import_csv()
+
+    if args.verify:
+        try:
+            mismatches = verify()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+
+        for name, call_args, expected, actual in mismatches[:20]:
+            print(f"❌ {name}{call_args}: {expected!r} != {actual!r}")
+
+        if mismatches:
+            print(f"\n❌ {len(mismatches)} mismatches")
+            raise SystemExit(1)
+
+        print(f"✅ {len(verify_cases())} queries match the CSV path")
@@ -0,0 +1,135 @@
+# ==========================================================
+# STARTUP BENCHMARK - IMPORT-TIME BUDGET FOR rag.chatbot
+# ==========================================================
+#
+# Usage (from backend/):
+#   python -m rag.startup_benchmark
+#   python -m rag.startup_benchmark --module rag.api_server --budget-ms 1500
+#
+# Imports the module in fresh interpreters under
+# `python -X importtime` and fails (exit 1) when
+#   - the median cumulative import time exceeds the budget, or
+#   - a heavy module that should stay deferred was imported.
+#
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", 250))
+STARTUP_RUNS = 5
+
+# Must only load on first use (retrieval / LLM calls)
+FORBIDDEN_MODULES = (
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "faiss",
+    "groq",
+    "numpy",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# ==========================================================
+# MEASURE
+# ==========================================================
+
+def import_profile(module):
+    """
+    One fresh `python -X importtime -c 'import <module>'` run.
+    Returns {module: (self_us, cumulative_us, depth)}.
+    """
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+    )
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    profile = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            profile[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+
+    return profile
+
+
+def run_benchmark(module, runs=STARTUP_RUNS):
+    profiles = [import_profile(module) for _ in range(runs)]
+
+    totals_ms = [profile[module][1] / 1000 for profile in profiles]
+    last = profiles[-1]
+
+    loaded = set(last)
+    forbidden = sorted(
+        name for name in loaded
+        if name.split(".")[0] in FORBIDDEN_MODULES
+    )
+    forbidden_roots = sorted({name.split(".")[0] for name in forbidden})
+
+    slowest = sorted(
+        ((name, cumulative / 1000) for name, (_, cumulative, depth) in last.items()
+         if depth == 1),
+        key=lambda item: -item[1],
+    )[:10]
+
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(totals_ms), 1),
+        "max_ms": round(max(totals_ms), 1),
+        "modules_loaded": len(loaded),
+        "forbidden": forbidden_roots,
+        "slowest": [(name, round(ms, 1)) for name, ms in slowest],
+    }
+
+
+# ==========================================================
+# ENTRY POINT
+# ==========================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--module", default="rag.chatbot")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=STARTUP_RUNS)
+    parser.add_argument("--allow", action="append", default=[],
+                        help="top-level module to allow despite FORBIDDEN_MODULES")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.module, args.runs)
+    forbidden = [name for name in result["forbidden"] if name not in args.allow]
+
+    print(f"\n⏱️ import {result['module']}: median {result['median_ms']} ms "
+          f"(max {result['max_ms']} ms, {result['modules_loaded']} modules, "
+          f"budget {args.budget_ms:g} ms)\n")
+
+    for name, ms in result["slowest"]:
+        print(f"   {ms:>9.1f} ms  {name}")
+
+    failed = False
+
+    if result["median_ms"] > args.budget_ms:
+        print(f"\n❌ Over budget by {result['median_ms'] - args.budget_ms:.1f} ms")
+        failed = True
+
+    if forbidden:
+        print(f"\n❌ Deferred modules imported eagerly: {', '.join(forbidden)}")
+        failed = True
+
+    if not failed:
+        print("\n✅ Within budget")
+
+    sys.exit(1 if failed else 0)
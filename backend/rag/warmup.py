@@ -0,0 +1,148 @@
+# ==========================================================
+# WARMUP - PRELOAD MODEL, INDEX AND LEDGER CACHES
+# ==========================================================
+#
+# Everything behind /ask is lazy: the embedding model, FAISS
+# index, document store, BM25 index, ledger columns, monthly
+# rollup (or the SQLite ledger import with LEDGER_BACKEND=sqlite)
+# and the profile cache all load on first use.
+# start_warmup() loads them in a background thread at server
+# start, so the first real request is served hot; readiness()
+# reports progress for the /ready endpoint.
+#
+
+import threading
+import time
+import traceback
+
+
+_state = {
+    "ready": False,
+    "running": False,
+    "steps": {},
+    "error": None,
+}
+_lock = threading.Lock()
+
+
+# ==========================================================
+# STEPS
+# ==========================================================
+
+def _warm_retriever():
+    from rag import retriever
+
+    if not retriever.preload():
+        raise RuntimeError("embedding model unavailable")
+
+
+def _warm_ledger():
+    from rag.ledger_store import get_ledger
+    from rag.aggregation_engine import masked_sum
+
+    # Builds the columns (and numpy views when enabled)
+    masked_sum(get_ledger())
+
+
+def _warm_sqlite_ledger():
+    from rag import finance_engine, sqlite_ledger
+
+    if finance_engine.LEDGER_BACKEND != "sqlite":
+        return
+
+    # Imports the CSV (all of it on a fresh database) before the
+    # first query has to
+    sqlite_ledger.sync()
+
+
+def _warm_rollup():
+    from rag import finance_engine
+    from rag.rollup_cube import rebuild_rollup
+
+    # Queries only read the cube on the columnar backend with the
+    # rollup enabled; otherwise building it is wasted work
+    if not finance_engine.LEDGER_ROLLUP or finance_engine.LEDGER_BACKEND == "sqlite":
+        return
+
+    rebuild_rollup()
+
+
+def _warm_profile():
+    from rag.profile_engine import build_financial_profile
+
+    build_financial_profile()
+
+
+def _warm_intent_cache():
+    from rag.intent_cache import load_intent_cache
+
+    load_intent_cache()
+
+
+WARMUP_STEPS = (
+    ("retriever", _warm_retriever),
+    ("intent_cache", _warm_intent_cache),
+    ("ledger", _warm_ledger),
+    ("sqlite_ledger", _warm_sqlite_ledger),
+    ("rollup", _warm_rollup),
+    ("profile", _warm_profile),
+)
+
+
+# ==========================================================
+# RUN
+# ==========================================================
+
+def run_warmup():
+    """Run every step, recording timings; ready only if all pass."""
+    ok = True
+
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+
+        try:
+            step()
+            result = {"ok": True}
+        except Exception as e:
+            traceback.print_exc()
+            result = {"ok": False, "error": str(e)}
+            ok = False
+
+        result["seconds"] = round(time.perf_counter() - start, 3)
+
+        with _lock:
+            _state["steps"][name] = result
+
+        status = "✅" if result["ok"] else "❌"
+        print(f"{status} Warm-up {name}: {result['seconds']}s")
+
+    with _lock:
+        _state["ready"] = ok
+        _state["running"] = False
+        if not ok:
+            _state["error"] = "warm-up step failed"
+
+    return ok
+
+
+def start_warmup():
+    """Start warm-up in a daemon thread (no-op if already started)."""
+    with _lock:
+        if _state["running"] or _state["ready"]:
+            return
+
+        _state["running"] = True
+        _state["error"] = None
+        _state["steps"] = {}
+
+    threading.Thread(target=run_warmup, name="warmup", daemon=True).start()
+
+
+def readiness():
+    with _lock:
+        return {
+            "ready": _state["ready"],
+            "running": _state["running"],
+            "steps": {name: dict(step) for name, step in _state["steps"].items()},
+            "error": _state["error"],
+        }
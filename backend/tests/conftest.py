@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# The rag package lives in backend/ and is imported as rag.x
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
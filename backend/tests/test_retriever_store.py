@@ -0,0 +1,114 @@
+# ==========================================================
+# RETRIEVER - DOCUMENTS APPENDED BY ANOTHER PROCESS
+# ==========================================================
+#
+# A second DocumentStore handle stands in for another process
+# (e.g. the indexer CLI) appending to the same store. A small
+# bag-of-words encoder replaces the sentence-transformers model
+# so the test needs no model download.
+#
+# Run from backend/:
+#   python -m pytest -q tests
+#
+
+import zlib
+
+import numpy as np
+import pytest
+
+from rag import retriever
+from rag.document_store import DOC_STORE_PREFIX, DocumentStore
+
+
+class WordModel:
+    def encode(self, texts, **kwargs):
+        vectors = np.zeros((len(texts), retriever.EMBEDDING_DIM), "float32")
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[i, zlib.crc32(word.encode()) % retriever.EMBEDDING_DIM] += 1
+        return vectors
+
+
+def _document(merchant, category, amount):
+    return {
+        "text": f"paid {amount} at {merchant} for {category}",
+        "data": {
+            "date": "2026-02-10",
+            "type": "expense",
+            "merchant": merchant,
+            "category": category,
+            "amount": float(amount),
+            "account": "HDFC",
+            "payment_method": "UPI",
+            "notes": "",
+        },
+    }
+
+
+def _add(doc):
+    retriever.add_document(doc["text"], doc["data"])
+
+
+def _restart():
+    retriever.index = None
+    retriever.documents = None
+    retriever._bm25 = None
+    retriever._result_cache.clear()
+    retriever.load_index()
+
+
+@pytest.fixture
+def fresh_retriever(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(retriever, "model", WordModel())
+    monkeypatch.setattr(retriever, "PERSISTENCE_MODE", "write_behind")
+    _restart()
+
+    yield
+
+    # Nothing left for the atexit checkpoint to write elsewhere
+    retriever._pending_writes = 0
+    retriever.index = None
+    retriever.documents = None
+    retriever._bm25 = None
+    retriever._result_cache.clear()
+
+
+@pytest.mark.parametrize("mode", ["dense", "hybrid"])
+def test_add_after_another_process_appended(fresh_retriever, mode):
+    _add(_document("swiggy", "food", 450))
+    retriever.search_documents("swiggy", mode=mode)  # builds BM25 in hybrid mode
+
+    other = DocumentStore(DOC_STORE_PREFIX)
+    other.extend([_document("landlord", "rent", 18000), _document("irctc", "travel", 900)])
+
+    _add(_document("uber", "taxi", 320))
+
+    assert retriever.index.ntotal == len(retriever.documents) == 4
+
+    for merchant in ("swiggy", "landlord", "irctc", "uber"):
+        hits = retriever.search_documents(merchant, k=1, mode=mode)
+        assert hits[0]["data"]["merchant"] == merchant
+
+    hits = retriever.search_documents("paid", k=4, mode=mode, filters={"category": "taxi"})
+    assert [hit["data"]["merchant"] for hit in hits] == ["uber"]
+
+
+def test_restart_keeps_documents_the_index_missed(fresh_retriever):
+    _add(_document("swiggy", "food", 450))
+
+    other = DocumentStore(DOC_STORE_PREFIX)
+    other.extend([_document("landlord", "rent", 18000)])
+
+    # The checkpoint only holds this process's vector
+    retriever.checkpoint()
+    _restart()
+
+    assert retriever.index.ntotal == len(retriever.documents) == 2
+
+    _add(_document("uber", "taxi", 320))
+    _restart()
+
+    assert len(retriever.documents) == 3
+    for merchant in ("swiggy", "landlord", "uber"):
+        assert retriever.search_documents(merchant, k=1)[0]["data"]["merchant"] == merchant
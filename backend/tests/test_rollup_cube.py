@@ -0,0 +1,84 @@
+# ==========================================================
+# ROLLUP CUBE - EXACT PARITY WITH THE SCAN PATH
+# ==========================================================
+#
+# Run from backend/:
+#   python -m pytest -q tests
+#
+
+import random
+
+import pytest
+
+from rag import finance_engine, ledger_store, rollup_cube
+from rag.ledger_store import CSV_FIELDS
+
+
+def _rows(count, seed=7):
+    rng = random.Random(seed)
+    rows = []
+
+    for i in range(count):
+        day, month = rng.randint(1, 28), rng.randint(1, 3)
+        rows.append((
+            f"{day:02d}-{month:02d}-2026" if i % 2 else f"2026-{month:02d}-{day:02d}",
+            rng.choice(["income", "Income", "expense", "Expense", "expense", "transfer"]),
+            f"Merchant {i % 20}",
+            rng.choice(["Food", "food", "Rent", "Travel", "Shopping"]),
+            f"{rng.uniform(1, 20000):.2f}",
+            rng.choice(["HDFC", "ICICI"]),
+            "UPI",
+            "",
+        ))
+
+    return rows
+
+
+def _write_csv(path, rows, mode="w", newline=True):
+    with open(path, mode) as f:
+        if mode == "w":
+            f.write(",".join(CSV_FIELDS) + "\n")
+        f.write("\n".join(",".join(row) for row in rows) + ("\n" if newline else ""))
+
+
+@pytest.fixture
+def ledger_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    ledger_store.invalidate()
+
+    yield tmp_path / "data" / "transactions.csv"
+
+    ledger_store.invalidate()
+
+
+def test_rollup_matches_scan_exactly(ledger_csv):
+    rows = _rows(3000)
+    _write_csv(ledger_csv, rows)
+
+    assert rollup_cube.verify() == []
+
+    # Same float as adding the month's income rows in CSV order
+    expected = 0
+    for date, tx_type, _, _, amount, *_ in rows:
+        month = date[3:5] if date[2] == "-" else date[5:7]
+        if tx_type.lower() == "income" and month == "02":
+            expected += float(amount)
+
+    assert finance_engine.monthly_income("2026-02") == expected
+
+
+def test_rollup_follows_appends_and_unterminated_line(ledger_csv):
+    rows = _rows(400)
+    _write_csv(ledger_csv, rows[:300])
+    assert rollup_cube.verify() == []
+
+    _write_csv(ledger_csv, rows[300:399], mode="a", newline=False)
+    assert rollup_cube.verify() == []
+
+    # The last line gets its newline, one more row follows
+    with open(ledger_csv, "a") as f:
+        f.write("\n")
+    _write_csv(ledger_csv, rows[399:], mode="a")
+    assert rollup_cube.verify() == []
+    assert rollup_cube.rollup_stats()["rows"] == 400
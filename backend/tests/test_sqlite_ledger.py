@@ -0,0 +1,108 @@
+# ==========================================================
+# SQLITE LEDGER - PARITY WITH THE COLUMNAR (CSV) PATH
+# ==========================================================
+#
+# Run from backend/:
+#   python -m pytest -q tests
+#
+
+import pytest
+
+from rag import finance_engine, ledger_store, sqlite_ledger
+from rag.ledger_store import CSV_FIELDS
+
+
+ROWS = [
+    ("05-01-2026", "income", "Acme Payroll", "Salary", "85000", "HDFC", "Bank Transfer", "January salary"),
+    ("06-01-2026", "expense", "Swiggy", "Food", "450.50", "HDFC", "UPI", ""),
+    ("06-01-2026", "expense", "Amazon", "Shopping", "8986.90", "ICICI", "Credit Card", "headphones"),
+    ("15-01-2026", "expense", "Uber", "Travel", "320", "HDFC", "UPI", ""),
+    ("2026-02-01", "income", "Upwork", "Freelance", "12000.00", "ICICI", "Bank Transfer", ""),
+    ("2026-02-03", "expense", "Zomato", "food", "610.25", "ICICI", "UPI", "lowercase category"),
+    ("2026-02-10", "expense", "Landlord", "Rent", "18000", "HDFC", "Bank Transfer", "February rent"),
+    ("2026-02-10", "expense", "Swiggy", "Food", "275", "Cash", "Cash", ""),
+    ("2026-03-01", "expense", "Big Bazaar", "Groceries", "5000.00", "HDFC", "Debit Card", ""),
+    ("31-02-2026", "expense", "Typo Date", "Food", "99", "HDFC", "UPI", "impossible date"),
+    ("2026-03-02", "expense", "Broken Row", "Food", "n/a", "HDFC", "UPI", "bad amount, skipped"),
+]
+
+
+def _write_csv(path, rows, mode="w"):
+    with open(path, mode) as f:
+        if mode == "w":
+            f.write(",".join(CSV_FIELDS) + "\n")
+        for row in rows:
+            f.write(",".join(row) + "\n")
+
+
+@pytest.fixture
+def ledger_dir(tmp_path, monkeypatch):
+    """Empty backend-style working directory with a private database."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+
+    monkeypatch.setattr(sqlite_ledger, "SQLITE_LEDGER_FILE", str(tmp_path / "data" / "ledger.db"))
+    sqlite_ledger._synced_versions.clear()
+    ledger_store.invalidate()
+
+    yield tmp_path / "data" / "transactions.csv"
+
+    ledger_store.invalidate()
+
+
+def test_verify_matches_columnar(ledger_dir):
+    _write_csv(ledger_dir, ROWS)
+
+    assert sqlite_ledger.verify(timings=False) == []
+
+
+def test_verify_after_append_and_rewrite(ledger_dir):
+    _write_csv(ledger_dir, ROWS[:4])
+    assert sqlite_ledger.verify(timings=False) == []
+
+    _write_csv(ledger_dir, ROWS[4:], mode="a")
+    assert sqlite_ledger.verify(timings=False) == []
+    assert sqlite_ledger.total_income() == 97000
+
+    # Rewritten (not appended) CSV -> full re-import
+    _write_csv(ledger_dir, ROWS[1:3])
+    assert sqlite_ledger.verify(timings=False) == []
+    assert sqlite_ledger.total_income() == 0
+
+
+def test_verify_counts_unterminated_last_line(ledger_dir):
+    _write_csv(ledger_dir, ROWS[:3])
+    with open(ledger_dir, "a") as f:
+        f.write(",".join(ROWS[3]))  # no trailing newline yet
+
+    assert sqlite_ledger.verify(timings=False) == []
+    assert sqlite_ledger.transaction_count() == 3
+
+    # The line gets its newline, then more rows follow
+    with open(ledger_dir, "a") as f:
+        f.write("\n")
+    _write_csv(ledger_dir, ROWS[4:6], mode="a")
+
+    assert sqlite_ledger.verify(timings=False) == []
+    assert sqlite_ledger.transaction_count() == 4
+
+
+def test_large_transactions_keep_csv_rows(ledger_dir):
+    _write_csv(ledger_dir, ROWS)
+
+    expected = finance_engine.detect_large_transactions.columnar(5000)
+
+    assert sqlite_ledger.detect_large_transactions(5000) == expected
+    assert [row["merchant"] for row in expected] == ["Acme Payroll", "Landlord", "Upwork", "Amazon"]
+    # Amounts come back as written in the CSV, not re-formatted floats
+    assert [row["amount"] for row in expected] == ["85000", "18000", "12000.00", "8986.90"]
+
+
+def test_verify_fails_without_transactions(ledger_dir):
+    with pytest.raises(RuntimeError):
+        sqlite_ledger.verify(timings=False)
+
+    _write_csv(ledger_dir, [])
+
+    with pytest.raises(RuntimeError):
+        sqlite_ledger.verify(timings=False)